@@ -1,4 +1,5 @@
 # core/__init__.py
 import signal
-print("Core package loaded.")
+import sys
+print("Core package loaded.", file=sys.stderr)
 signal.signal(signal.SIGINT, lambda s, f: print("\nInterrupted!"))
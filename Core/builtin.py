@@ -1,18 +1,34 @@
 
 import os
+import sys
 import signal
-from Core.process_monitor.tui import start_tui
+from Core.process_monitor.cli import run_pmon
 from Core.history import show_history
 from Core.process_monitor.monitor import job_manager
+from Core.process_monitor.spool import job_spooler
+from Core.command_hash import command_hash
+from Core.parallel import run_parallel
+
+BUILTINS = ("exit", "cd", "help", "history", "hash", "jobs", "joblog", "wait", "sched", "parallel", "fg", "bg", "kill", "pmon")
+
+
+def is_builtin(line):
+    parts = line.split(None, 1)
+    return bool(parts) and parts[0] in BUILTINS
 
 
 def handle_builtin(line):
+    """Chạy built-in, trả về exit status của nó (None nếu line không phải built-in)."""
     parts = line.split()
-    if not parts: return False
+    if not parts: return None
     cmd = parts[0]
 
     if cmd == "exit":
-        exit(0)
+        try:
+            sys.exit(int(parts[1]) if len(parts) > 1 else 0)
+        except ValueError:
+            print(f"exit: {parts[1]}: numeric argument required")
+            sys.exit(2)
 
     elif cmd == "cd":
         path = parts[1] if len(parts) > 1 else os.path.expanduser("~")
@@ -20,55 +36,175 @@ def handle_builtin(line):
             os.chdir(path)
         except Exception as e:
             print(f"cd: {e}")
-        return True
+            return 1
+        return 0
 
     elif cmd == "help":
-        print("Built-ins: cd, exit, help, history, jobs, fg, bg, kill, pmon")
+        print("Built-ins: cd, exit, help, history, hash, jobs, joblog, wait, sched, parallel, fg, bg, kill, pmon")
         print("\nProcess Monitor (pmon) - New Features:")
         print("  • Enhanced display with threads, I/O stats, and color coding")
         print("  • Pagination (PgUp/PgDn) for large process lists")
-        print("  • Interactive signal sending (k=KILL, t=TERM, s=STOP, C=CONT)")
-        print("  • Process filtering by name (/), CPU (c), Memory (m)")
+        print("  • Batched signals to marked processes, process groups and subtrees (k=KILL, t=TERM, s=STOP, C=CONT)")
+        print("  • Process filtering: expressions (f), name (/), CPU (c), Memory (m), presets (F)")
         print("  • Adjustable refresh interval (+/-), default 1.5s")
         print("  • Press 'h' in pmon for detailed help")
-        return True
+        print("  • Headless: pmon -b [-n COUNT] [-d DELAY] [--format ndjson|csv] [--top K]")
+        print("  • Prometheus exporter: pmon --serve HOST:PORT [-d DELAY] [--top K]")
+        print("  • Alert rules watchdog: pmon --alerts RULES.json [-d DELAY]")
+        return 0
 
     elif cmd == "history":
         show_history()
-        return True
+        return 0
+
+    elif cmd == "hash":
+        if len(parts) == 1:
+            for entry in command_hash.list_entries():
+                print(entry)
+        elif parts[1] == "-r":
+            command_hash.reset()
+        else:
+            status = 0
+            for name in parts[1:]:
+                if not command_hash.add(name):
+                    print(f"hash: {name}: not found")
+                    status = 1
+            return status
+        return 0
 
     elif cmd == "jobs":
         job_list = job_manager.list_jobs()
         for job_str in job_list:
             print(job_str)
-        return True
+        return 0
+
+    elif cmd == "joblog":
+        args = [a for a in parts[1:] if a != "-f"]
+        if len(args) != 1:
+            print("joblog: usage: joblog <jid> [-f]")
+            return 2
+        return show_joblog(args[0], follow="-f" in parts[1:])
+
+    elif cmd == "wait":
+        return wait_jobs(parts[1:])
+
+    elif cmd == "sched":
+        return configure_scheduler(parts[1:])
+
+    elif cmd == "parallel":
+        return run_parallel(line)
 
     elif cmd == "fg":
         if len(parts) < 2:
             print("fg: usage: fg <jid>")
-        else:
-            result = job_manager.bring_to_foreground(parts[1])
-            if result: print(result)
-        return True
+            return 2
+        result = job_manager.bring_to_foreground(parts[1])
+        if result: print(result)
+        return 0
 
     elif cmd == "bg":
         if len(parts) < 2:
             print("bg: usage: bg <jid>")
-        else:
-            result = job_manager.send_signal_to_job(parts[1], signal.SIGCONT)
-            print(result)
-        return True
+            return 2
+        print(job_manager.send_signal_to_job(parts[1], signal.SIGCONT))
+        return 0
 
     elif cmd == "kill":
         if len(parts) < 2:
             print("kill: usage: kill <jid>")
-        else:
-            result = job_manager.send_signal_to_job(parts[1], signal.SIGTERM)
-            print(result)
-        return True
+            return 2
+        print(job_manager.send_signal_to_job(parts[1], signal.SIGTERM))
+        return 0
 
     elif cmd == "pmon":
-        start_tui()
-        return True
+        return run_pmon(parts[1:])
+
+    return None
+
+
+def show_joblog(jid_str, follow=False):
+    """In output đã spool của job nền; với -f thì theo dõi tới khi job đóng output."""
+    try:
+        jid = int(jid_str)
+    except ValueError:
+        print(f"joblog: invalid job id: {jid_str}")
+        return 1
+
+    result = job_spooler.read(jid)
+    if result is None:
+        print(f"joblog: no output log for job {jid_str}")
+        return 1
+
+    data, offset, eof = result
+    if offset > len(data):
+        print(f"joblog: ({offset - len(data)} earlier bytes discarded)")
+    sys.stdout.buffer.write(data)
+    sys.stdout.flush()
+    if not follow:
+        return 0
+
+    # Cho phép Ctrl+C dừng theo dõi
+    old_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        while not eof:
+            job_spooler.wait_for_output(jid, offset, timeout=0.5)
+            result = job_spooler.read(jid, offset)
+            if result is None:
+                break
+            data, offset, eof = result
+            sys.stdout.buffer.write(data)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        signal.signal(signal.SIGINT, old_handler)
+    return 0
+
+
+def wait_jobs(args):
+    """wait [jid...] | wait -n: chờ job nền kết thúc (Ctrl+C để thôi chờ)."""
+    any_job = "-n" in args
+    jids = []
+    for a in args:
+        if a == "-n":
+            continue
+        try:
+            jids.append(int(a.lstrip("%")))
+        except ValueError:
+            print(f"wait: invalid job id: {a}")
+            return 2
+    missing = [j for j in jids if j not in job_manager.jobs]
+    for j in missing:
+        print(f"wait: no such job: {j}")
+    jids = [j for j in jids if j not in missing]
+    if missing and not jids:
+        return 127
+
+    old_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        return job_manager.wait_for_jobs(jids or None, any_job=any_job)
+    except KeyboardInterrupt:
+        print()
+        return 128 + signal.SIGINT
+    finally:
+        signal.signal(signal.SIGINT, old_handler)
+
 
-    return False
\ No newline at end of file
+def configure_scheduler(args):
+    """sched [-j N] [-n NICE]: giới hạn số job nền đồng thời và mức nice mặc định."""
+    try:
+        i = 0
+        while i < len(args):
+            if args[i] == "-j":
+                job_manager.set_max_concurrent(int(args[i + 1]))
+            elif args[i] == "-n":
+                job_manager.default_nice = int(args[i + 1])
+            else:
+                raise ValueError(args[i])
+            i += 2
+    except (ValueError, IndexError):
+        print("sched: usage: sched [-j MAX_JOBS] [-n NICE]")
+        return 2
+    print(f"max concurrent: {job_manager.max_concurrent} | nice: {job_manager.default_nice} "
+          f"| running: {len(job_manager.jobs) - job_manager.queued_count()} | queued: {job_manager.queued_count()}")
+    return 0
@@ -0,0 +1,137 @@
+# command_hash.py
+# bang hash tim duong dan lenh (giong 'hash' cua bash) cho MiniShell Plus
+
+import os
+import time
+from typing import Dict, List, Optional
+
+# khoang thoi gian toi thieu (giay) giua 2 lan kiem tra mtime cua cac thu muc PATH
+MTIME_CHECK_INTERVAL = 1.0
+
+
+class CommandHashTable:
+    """
+    Ánh xạ tên lệnh -> đường dẫn thực thi, dựng bằng os.scandir trên PATH.
+    Bị vô hiệu hoá khi PATH thay đổi hoặc mtime của một thư mục trong PATH thay đổi.
+    Thư mục tương đối trong PATH ("." hay mục rỗng) phụ thuộc thư mục hiện tại nên không được
+    quét vào bảng: chúng được kiểm tra trực tiếp mỗi lần tra cứu, giống như sau mỗi 'cd'.
+    """
+
+    def __init__(self):
+        self._path: Optional[str] = None
+        self._dirs: List[str] = []               # các mục PATH theo thứ tự, không trùng
+        self._has_relative = False
+        self._dir_mtimes: Dict[str, float] = {}
+        self._names: Dict[str, List[str]] = {}   # tên -> các thư mục chứa tên đó (theo thứ tự PATH)
+        self._table: Dict[str, str] = {}         # tên -> đường dẫn đã xác nhận thực thi được
+        self.hits: Dict[str, int] = {}
+        self._last_check = 0.0
+
+    def _scan(self, path: str):
+        self._path = path
+        self._dirs = list(dict.fromkeys(d or "." for d in path.split(os.pathsep)))
+        self._has_relative = not all(os.path.isabs(d) for d in self._dirs)
+        self._dir_mtimes = {}
+        self._names = {}
+        self._table = {}
+        self.hits = {}
+        for d in self._dirs:
+            if not os.path.isabs(d):
+                continue
+            try:
+                self._dir_mtimes[d] = os.stat(d).st_mtime
+                with os.scandir(d) as it:
+                    for entry in it:
+                        self._names.setdefault(entry.name, []).append(d)
+            except OSError:
+                self._dir_mtimes[d] = -1.0
+        self._last_check = time.monotonic()
+
+    def _dirs_changed(self) -> bool:
+        for d, mtime in self._dir_mtimes.items():
+            try:
+                if os.stat(d).st_mtime != mtime:
+                    return True
+            except OSError:
+                if mtime != -1.0:
+                    return True
+        return False
+
+    def _validate(self, force: bool = False):
+        path = os.environ.get("PATH", os.defpath)
+        if path != self._path:
+            self._scan(path)
+            return
+        now = time.monotonic()
+        if force or now - self._last_check >= MTIME_CHECK_INTERVAL:
+            self._last_check = now
+            if self._dirs_changed():
+                self._scan(path)
+
+    def _resolve(self, name: str) -> Optional[str]:
+        found_in = self._names.get(name, ())
+        cacheable = True
+        for d in (self._dirs if self._has_relative else found_in):
+            relative = not os.path.isabs(d)
+            if not relative and d not in found_in:
+                continue
+            full = os.path.join(d, name)
+            if os.access(full, os.X_OK) and not os.path.isdir(full):
+                # Chỉ ghi nhớ khi không có thư mục tương đối nào đứng trước: sau 'cd' nó có thể thắng
+                if cacheable and not relative:
+                    self._table[name] = full
+                return full
+            if relative:
+                cacheable = False
+        return None
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Trả về đường dẫn đầy đủ của lệnh, hoặc None nếu không tìm thấy."""
+        if os.sep in name:
+            if os.access(name, os.X_OK) and not os.path.isdir(name):
+                return name
+            return None
+
+        self._validate()
+        full = self._table.get(name)
+        if full is None:
+            full = self._resolve(name)
+            if full is None:
+                # Có thể lệnh vừa được cài: kiểm tra lại mtime trước khi báo lỗi
+                self._validate(force=True)
+                full = self._resolve(name)
+                if full is None:
+                    return None
+        self.hits[name] = self.hits.get(name, 0) + 1
+        return full
+
+    def add(self, name: str) -> bool:
+        """Thêm một lệnh vào bảng (hash <name>) mà không tính hit."""
+        self._validate(force=True)
+        return (self._table.get(name) or self._resolve(name)) is not None
+
+    def forget(self, name: str):
+        self._table.pop(name, None)
+        self.hits.pop(name, None)
+
+    def reset(self):
+        """Xoá toàn bộ bảng (hash -r); lần tra cứu tiếp theo sẽ quét lại PATH."""
+        self._path = None
+        self._dirs = []
+        self._has_relative = False
+        self._dir_mtimes = {}
+        self._names = {}
+        self._table = {}
+        self.hits = {}
+
+    def list_entries(self) -> List[str]:
+        if not self._table:
+            return ["hash: hash table empty"]
+        lines = ["hits\tcommand"]
+        for name, full in self._table.items():
+            lines.append(f"{self.hits.get(name, 0):4d}\t{full}")
+        return lines
+
+
+# TAO MOT INSTANCE DUY NHAT CUA BANG HASH
+command_hash = CommandHashTable()
@@ -1,62 +1,184 @@
-import subprocess, sys, shutil, os
-from Core.process_monitor.monitor import job_manager
+import subprocess, sys, os, signal, selectors, codecs
+from Core.process_monitor.monitor import job_manager, JobStatus
+from Core.process_monitor.spool import job_spooler
+from Core.command_hash import command_hash
+from Core.spawn import spawn_process
 from Core.utils import build_popen_args
 
+# Kích thước tối đa mỗi lần chuyển tiếp output (bytes).
+# Bộ nhớ của shell giữ cố định bất kể pipeline ghi ra bao nhiêu.
+RELAY_CHUNK_SIZE = 64 * 1024
+
+# Exit status theo quy ước của sh
+EXIT_NOT_FOUND = 127
+EXIT_INTERRUPTED = 128 + signal.SIGINT
 
-def run_external(args, stdin=None, stdout=None):
-    if shutil.which(args[0]) is None:
-        print(f"minishell: command not found: {args[0]}")
-        return None
 
-    # Thiết lập các tham số Popen
-    popen_kwargs = {
-        "stdin": stdin,
-        "stdout": stdout,
-        "stderr": subprocess.PIPE,
-    }
+def exit_status(returncode):
+    """Chuyển returncode của Popen thành exit status kiểu shell (128+N khi bị signal N)."""
+    return 128 - returncode if returncode < 0 else returncode
 
-    popen_kwargs["preexec_fn"] = os.setpgrp
+
+def run_external(args, stdin=None, stdout=None, stderr=None, pgid=0):
+    executable = command_hash.lookup(args[0])
+    if executable is None:
+        print(f"minishell: command not found: {args[0]}", file=sys.stderr)
+        return None
 
     try:
-        return subprocess.Popen(args, **popen_kwargs)
+        return spawn_process(args, executable=executable, stdin=stdin, stdout=stdout, stderr=stderr, pgid=pgid)
     except Exception as e:
-        print(f"Error running external command: {e}")
+        print(f"Error running external command: {e}", file=sys.stderr)
+        return None
+
+
+def _stream_fd(stream):
+    """Trả về fd thật của stream, hoặc None nếu stream không có fd (vd. StringIO)."""
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, ValueError):
         return None
 
 
-def execute_pipeline(cmds, background=False):
+def _write_chunk(stream, chunk, decoder):
+    buf = getattr(stream, "buffer", None)
+    if buf is not None:
+        buf.write(chunk)
+    else:
+        stream.write(decoder.decode(chunk))
+    stream.flush()
+
+
+def _relay_output(procs):
+    """
+    Chuyển tiếp stdout/stderr của các stage ra sys.stdout/sys.stderr
+    theo từng khối RELAY_CHUNK_SIZE qua selector, không buffer toàn bộ output.
+    """
+    sel = selectors.DefaultSelector()
+    for p in procs:
+        for pipe, target in ((p.stdout, sys.stdout), (p.stderr, sys.stderr)):
+            if pipe is not None and not pipe.closed:
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                sel.register(pipe, selectors.EVENT_READ, (target, decoder))
+
+    try:
+        while sel.get_map():
+            for key, _ in sel.select():
+                chunk = os.read(key.fd, RELAY_CHUNK_SIZE)
+                if not chunk:
+                    sel.unregister(key.fileobj)
+                    key.fileobj.close()
+                    continue
+                target, decoder = key.data
+                _write_chunk(target, chunk, decoder)
+    finally:
+        for key in list(sel.get_map().values()):
+            key.fileobj.close()
+        sel.close()
+
+
+def _abort(procs):
+    """Dừng và thu hồi các stage đã chạy khi pipeline không khởi chạy trọn vẹn."""
+    if not procs:
+        return
+    try:
+        os.killpg(procs[0].pid, signal.SIGTERM)
+    except OSError:
+        pass
+    for p in procs:
+        p.wait()
+
+
+def spawn_stages(cmds, stderr, last_stdout):
+    """
+    Khởi chạy các stage nối với nhau bằng pipe, chung một process group.
+    Trả về list Popen, hoặc None nếu có stage không chạy được.
+    """
     procs, opened_files = [], []
     prev_stdout = None
-    cmd_string = " | ".join(cmds)
-
-    for idx, cmd_str in enumerate(cmds):
-        args, stdin_f, stdout_f = build_popen_args(cmd_str)
-        stdin = stdin_f or prev_stdout
-        stdout = stdout_f or (subprocess.PIPE if idx < len(cmds) - 1 else None)
-        p = run_external(args, stdin=stdin, stdout=stdout)
-        if not p: return
-        procs.append(p)
+    try:
+        for idx, cmd in enumerate(cmds):
+            last = idx == len(cmds) - 1
+            args, stdin_f, stdout_f = build_popen_args(cmd)
+            opened_files += [f for f in (stdin_f, stdout_f) if f]
+            stdin = stdin_f or prev_stdout
+            stdout = stdout_f or (last_stdout if last else subprocess.PIPE)
+            # Mọi stage vào chung process group của stage đầu tiên
+            pgid = procs[0].pid if procs else 0
+            p = run_external(args, stdin=stdin, stdout=stdout, stderr=stderr, pgid=pgid)
+            if prev_stdout:
+                prev_stdout.close()
+                prev_stdout = None
+            if not p:
+                _abort(procs)
+                return None
+            procs.append(p)
+            if not last:
+                prev_stdout = p.stdout
+    except BaseException:
+        _abort(procs)
+        raise
+    finally:
         if prev_stdout: prev_stdout.close()
-        prev_stdout = p.stdout
-        if stdin_f: opened_files.append(stdin_f)
-        if stdout_f: opened_files.append(stdout_f)
+        for f in opened_files: f.close()
+    return procs
+
+
+def _launch_background(cmds, jid):
+    # Job nền: stdout của stage cuối và stderr mọi stage vào chung một pipe,
+    # được luồng spool đọc liên tục vào ring buffer (xem bằng 'joblog').
+    log_r, log_w = os.pipe()
+    try:
+        procs = spawn_stages(cmds, log_w, log_w)
+    except BaseException:
+        os.close(log_r)
+        raise
+    finally:
+        os.close(log_w)
+    if procs is None:
+        os.close(log_r)
+        return None
+    job_spooler.add(jid, log_r)
+    return procs
 
-    if background:
-        job = job_manager.register_job(procs[-1], cmd_string)
-        if job:
+
+def execute_pipeline(pipeline):
+    """Chạy pipeline, trả về exit status của stage cuối (0 nếu chạy nền)."""
+    cmds = pipeline.stages
+
+    if pipeline.background:
+        # Job nền đi qua hàng đợi của job manager (giới hạn số job chạy đồng thời)
+        job = job_manager.submit(pipeline.text, lambda jid: _launch_background(cmds, jid))
+        if job.status == JobStatus.TERMINATED:
+            return EXIT_NOT_FOUND
+        if job.pid:
             print(f"[{job.jid}] {job.pid}")
-        return
+        else:
+            print(f"[{job.jid}] queued")
+        return 0
 
-    for p in procs[:-1]:
-        p.wait()
-    if procs:
-        try:
-            out, err = procs[-1].communicate()
-            if out: sys.stdout.buffer.write(out)
-            if err: sys.stderr.buffer.write(err)
-        except KeyboardInterrupt:
-            print()
-            import signal
-            procs[-1].send_signal(signal.SIGINT)
-
-    for f in opened_files: f.close()
\ No newline at end of file
+    # Foreground: stdout/stderr đi thẳng ra fd của terminal.
+    # Chỉ khi shell không có fd thật (stream bị thay thế) mới chuyển tiếp qua pipe.
+    relay = _stream_fd(sys.stdout) is None or _stream_fd(sys.stderr) is None
+    stream = subprocess.PIPE if relay else None
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    procs = spawn_stages(cmds, stream, stream)
+    if procs is None:
+        return EXIT_NOT_FOUND
+
+    try:
+        if relay:
+            _relay_output(procs)
+        for p in procs:
+            p.wait()
+        status = exit_status(procs[-1].returncode)
+    except KeyboardInterrupt:
+        print()
+        for p in procs:
+            if p.poll() is None:
+                p.send_signal(signal.SIGINT)
+        status = EXIT_INTERRUPTED
+
+    return status
@@ -0,0 +1,261 @@
+# parallel.py
+# builtin 'parallel': chay mot lenh tren nhieu input, giu N worker luon ban (giong xargs -P / GNU parallel)
+
+import glob
+import os
+import selectors
+import shlex
+import signal
+import sys
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, List
+
+from Core.parser import parse_command, tokenize, ParseError
+from Core.executor import spawn_stages
+from Core.process_monitor.monitor import job_manager, DEFAULT_MAX_CONCURRENT, HAS_PIDFD
+from Core.process_monitor.spool import job_spooler
+
+USAGE = "parallel: usage: parallel [-j N] command [{}] [::: inputs... | :::: file] [&]"
+
+# Kích thước mỗi lần chép output đã gom của một task ra ngoài
+COPY_CHUNK_SIZE = 64 * 1024
+# GNU parallel: exit status là số task lỗi, tối đa 101
+MAX_FAILED_STATUS = 101
+
+
+class _Task:
+    def __init__(self, index: int, pipeline, output):
+        self.index = index
+        self.pipeline = pipeline
+        self.output = output
+        self.procs = []
+        self.pidfds: Dict[int, int] = {}
+
+
+class ParallelRun:
+    """
+    Chạy danh sách pipeline với tối đa max_workers task cùng lúc.
+    Output (stdout + stderr) của mỗi task được gom vào file tạm và chỉ ghi ra
+    out_fd khi task kết thúc, nên các dòng của các task không bị trộn lẫn.
+    """
+
+    def __init__(self, tasks: List, max_workers: int, out_fd: int):
+        self.max_workers = max(1, max_workers)
+        self.out_fd = out_fd
+        self.total = len(tasks)
+        self.done = 0
+        self.failed = 0
+        self.finished = False
+        self.exit_status = 0
+        self._pending = deque(tasks)
+        self._running: Dict[int, _Task] = {}
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._selector = selectors.DefaultSelector()
+
+    def progress(self) -> str:
+        with self._lock:
+            return f"{self.done}/{self.total} done, {len(self._running)} running, {self.failed} failed"
+
+    def send_signal(self, sig: int):
+        """Chuyển tín hiệu tới các task đang chạy; TERM/KILL/INT còn huỷ các task chưa chạy."""
+        with self._lock:
+            if sig in (signal.SIGTERM, signal.SIGKILL, signal.SIGINT):
+                self._cancelled = True
+            pgids = [t.procs[0].pid for t in self._running.values()]
+        for pgid in pgids:
+            try:
+                os.killpg(pgid, sig)
+            except OSError:
+                pass
+
+    def _start_task(self, pipeline, index: int):
+        output = tempfile.TemporaryFile()
+        task = _Task(index, pipeline, output)
+        try:
+            procs = spawn_stages(pipeline.stages, output, output)
+        except Exception as e:
+            output.write(f"parallel: {e}\n".encode())
+            procs = None
+        if not procs:
+            self._finish(task, failed=True)
+            return
+
+        task.procs = procs
+        with self._lock:
+            self._running[index] = task
+        if HAS_PIDFD:
+            for p in procs:
+                try:
+                    fd = os.pidfd_open(p.pid)
+                except OSError:
+                    continue
+                task.pidfds[p.pid] = fd
+                self._selector.register(fd, selectors.EVENT_READ, (task, p))
+
+    def _close_pidfd(self, task: _Task, pid: int):
+        fd = task.pidfds.pop(pid)
+        self._selector.unregister(fd)
+        os.close(fd)
+
+    def _finish(self, task: _Task, failed: bool):
+        for pid in list(task.pidfds):
+            self._close_pidfd(task, pid)
+
+        # Ghi output đã gom của task trong một lượt
+        task.output.seek(0)
+        while True:
+            chunk = task.output.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            while chunk:
+                try:
+                    written = os.write(self.out_fd, chunk)
+                except BrokenPipeError:
+                    break
+                chunk = chunk[written:]
+        task.output.close()
+
+        with self._lock:
+            self._running.pop(task.index, None)
+            self.done += 1
+            if failed:
+                self.failed += 1
+
+    def _reap(self, timeout: float):
+        if HAS_PIDFD:
+            for key, _ in self._selector.select(timeout):
+                task, proc = key.data
+                # pidfd của stage đã thoát luôn sẵn sàng đọc: gỡ ngay, nếu không select() quay tròn
+                # cho tới khi cả task xong
+                if proc.poll() is not None:
+                    self._close_pidfd(task, proc.pid)
+        else:
+            threading.Event().wait(min(timeout, 0.05))
+        for task in list(self._running.values()):
+            if all(p.poll() is not None for p in task.procs):
+                self._finish(task, failed=task.procs[-1].returncode != 0)
+
+    def run(self) -> int:
+        index = 0
+        try:
+            while True:
+                while self._pending and not self._cancelled and len(self._running) < self.max_workers:
+                    self._start_task(self._pending.popleft(), index)
+                    index += 1
+                if not self._running and (self._cancelled or not self._pending):
+                    break
+                try:
+                    self._reap(timeout=0.5)
+                except KeyboardInterrupt:
+                    self.send_signal(signal.SIGINT)
+        finally:
+            self._selector.close()
+            self.exit_status = min(self.failed, MAX_FAILED_STATUS)
+            self.finished = True
+        return self.exit_status
+
+
+def _build_task(template, item: str):
+    """Thay {} bằng input (đã quote) và parse thành Pipeline."""
+    quoted = shlex.quote(item)
+    if len(template) == 1 and not template[0][0] and any(c.isspace() for c in template[0][1]):
+        # Cả lệnh nằm trong một chuỗi: "sort {} | uniq -c"
+        line = template[0][1]
+        line = line.replace("{}", quoted) if "{}" in line else f"{line} {quoted}"
+        return parse_command(line)
+
+    words = []
+    has_placeholder = False
+    for is_op, value in template:
+        if is_op:
+            words.append(value)
+            continue
+        if "{}" in value:
+            has_placeholder = True
+            value = value.replace("{}", item)
+        words.append(shlex.quote(value))
+    if not has_placeholder:
+        words.append(quoted)
+    return parse_command(" ".join(words))
+
+
+def _expand_inputs(words: List[str]) -> List[str]:
+    # MiniShell không tự mở rộng wildcard nên 'parallel' làm việc đó cho input
+    items = []
+    for w in words:
+        matches = sorted(glob.glob(os.path.expanduser(w))) if glob.has_magic(w) else []
+        items.extend(matches or [w])
+    return items
+
+
+def parse_parallel_args(line: str):
+    """Trả về (max_workers, template, inputs | None nếu đọc stdin, background)."""
+    tokens = tokenize(line)[1:]
+    background = bool(tokens) and tokens[-1] == (True, "&")
+    if background:
+        tokens.pop()
+
+    max_workers = DEFAULT_MAX_CONCURRENT
+    while tokens and not tokens[0][0] and tokens[0][1].startswith("-j"):
+        value = tokens[0][1][2:]
+        tokens.pop(0)
+        if not value:
+            if not tokens:
+                raise ParseError("-j requires a number")
+            value = tokens.pop(0)[1]
+        max_workers = int(value)
+
+    template, inputs = [], None
+    for i, tok in enumerate(tokens):
+        if tok == (False, ":::"):
+            inputs = _expand_inputs([v for _, v in tokens[i + 1:]])
+            break
+        if tok == (False, "::::"):
+            inputs = []
+            for path in (v for _, v in tokens[i + 1:]):
+                with open(os.path.expanduser(path), encoding="utf-8") as f:
+                    inputs.extend(l.rstrip("\n") for l in f if l.strip())
+            break
+        template.append(tok)
+
+    if not template:
+        raise ParseError("missing command")
+    return max_workers, template, inputs, background
+
+
+def run_parallel(line: str) -> int:
+    try:
+        max_workers, template, inputs, background = parse_parallel_args(line)
+        if inputs is None:
+            inputs = [l.rstrip("\n") for l in sys.stdin if l.strip()]
+        tasks = [_build_task(template, item) for item in inputs]
+    except (ParseError, ValueError, OSError) as e:
+        print(f"parallel: {e}\n{USAGE}")
+        return 2
+
+    if not background:
+        sys.stdout.flush()
+        old_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+        try:
+            return ParallelRun(tasks, max_workers, sys.stdout.fileno()).run()
+        finally:
+            signal.signal(signal.SIGINT, old_handler)
+
+    # Chạy nền: một luồng điều phối, output đã gom đi vào joblog như job nền khác
+    log_r, log_w = os.pipe()
+    runner = ParallelRun(tasks, max_workers, log_w)
+    job = job_manager.register_runner(line.strip().rstrip("&").strip(), runner)
+    job_spooler.add(job.jid, log_r)
+
+    def drive():
+        try:
+            runner.run()
+        finally:
+            os.close(log_w)
+
+    threading.Thread(target=drive, name=f"minishell-parallel-{job.jid}", daemon=True).start()
+    print(f"[{job.jid}] parallel: {runner.total} tasks, {runner.max_workers} workers")
+    return 0
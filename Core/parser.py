@@ -1,20 +1,133 @@
-import shlex
+from functools import lru_cache
+from typing import NamedTuple, Tuple
 
-def parse_command(line):
-    line = line.strip()
-    if not line:
-        return [], False
-    background = line.endswith("&")
-    if background:
-        line = line[:-1].strip()
-    tokens = list(shlex.shlex(line, posix=True))
-    segments, cur = [], []
-    for tok in tokens:
-        if tok == "|":
-            segments.append(" ".join(cur))
-            cur = []
+# so dong lenh da parse duoc giu trong cache (history, script lap lai cung mot dong)
+PARSE_CACHE_SIZE = 1024
+
+_REDIRECTS = ("<", ">", ">>")
+_SPECIAL = "|<>&"
+
+
+class ParseError(ValueError):
+    pass
+
+
+class Redirect(NamedTuple):
+    op: str        # "<", ">" hoặc ">>"
+    target: str
+
+
+class Command(NamedTuple):
+    argv: Tuple[str, ...]
+    redirects: Tuple[Redirect, ...] = ()
+
+
+class Pipeline(NamedTuple):
+    stages: Tuple[Command, ...]
+    background: bool = False
+    text: str = ""     # dòng lệnh gốc (không có '&'), dùng để hiển thị trong jobs
+
+
+def tokenize(line: str):
+    """
+    Tách dòng lệnh trong một lượt duy nhất.
+    Trả về list các cặp (is_operator, value); toán tử nằm trong dấu nháy là từ thường.
+    """
+    tokens = []
+    i, n = 0, len(line)
+    while i < n:
+        c = line[i]
+        if c.isspace():
+            i += 1
+            continue
+        if c == "#":
+            break
+        if c in _SPECIAL:
+            if c == ">" and line.startswith(">>", i):
+                tokens.append((True, ">>"))
+                i += 2
+            else:
+                tokens.append((True, c))
+                i += 1
+            continue
+
+        word = []
+        while i < n:
+            c = line[i]
+            if c.isspace() or c in _SPECIAL:
+                break
+            if c == "'":
+                end = line.find("'", i + 1)
+                if end < 0:
+                    raise ParseError("unterminated single quote")
+                word.append(line[i + 1:end])
+                i = end + 1
+            elif c == '"':
+                i += 1
+                while True:
+                    if i >= n:
+                        raise ParseError("unterminated double quote")
+                    c = line[i]
+                    if c == '"':
+                        i += 1
+                        break
+                    if c == "\\" and i + 1 < n and line[i + 1] in '"\\$`':
+                        word.append(line[i + 1])
+                        i += 2
+                    else:
+                        word.append(c)
+                        i += 1
+            elif c == "\\":
+                if i + 1 >= n:
+                    raise ParseError("trailing backslash")
+                word.append(line[i + 1])
+                i += 2
+            else:
+                word.append(c)
+                i += 1
+        tokens.append((False, "".join(word)))
+    return tokens
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_command(line: str) -> Pipeline:
+    """Parse một dòng lệnh thành Pipeline (stages, argv, redirect, background)."""
+    tokens = tokenize(line)
+    if not tokens:
+        return Pipeline((), False, "")
+
+    background = False
+    if tokens[-1] == (True, "&"):
+        background = True
+        tokens.pop()
+
+    stages = []
+    argv, redirects = [], []
+    i = 0
+    while i < len(tokens):
+        is_op, value = tokens[i]
+        if not is_op:
+            argv.append(value)
+            i += 1
+        elif value in _REDIRECTS:
+            if i + 1 >= len(tokens) or tokens[i + 1][0]:
+                raise ParseError(f"syntax error: missing file after '{value}'")
+            redirects.append(Redirect(value, tokens[i + 1][1]))
+            i += 2
+        elif value == "|":
+            if not argv:
+                raise ParseError("syntax error near '|'")
+            stages.append(Command(tuple(argv), tuple(redirects)))
+            argv, redirects = [], []
+            i += 1
         else:
-            cur.append(tok)
-    if cur:
-        segments.append(" ".join(cur))
-    return segments, background
+            raise ParseError(f"syntax error near '{value}'")
+
+    if not argv:
+        raise ParseError("syntax error: missing command")
+    stages.append(Command(tuple(argv), tuple(redirects)))
+
+    text = line.strip()
+    if background:
+        text = text[:text.rfind("&")].strip()
+    return Pipeline(tuple(stages), background, text)
@@ -10,20 +10,8 @@ from Core.prompt import get_prompt
 # luu cac tien trinh chay nen dang hoat dong
 bg_jobs = {}
 
-# ham xu ly khi 1 tien trinh con ket thuc
-def sigchld_handler(sig, frame):
-    while True:
-        try:
-            pid, _ = os.waitpid(-1, os.WNOHANG)
-            if pid == 0:
-                break
-            if pid in bg_jobs:
-                print(f"\n[{pid}] done: {bg_jobs.pop(pid)}")
-        except ChildProcessError:
-            break
-
-# dang ky tin hieu SIGCHLD
-signal.signal(signal.SIGCHLD, sigchld_handler)
+# SIGCHLD do JobManager (Core/process_monitor/monitor.py) xu ly theo su kien,
+# khong dung waitpid(-1) o day de tranh thu hoi nham tien trinh foreground.
 
 
 # them tien trinh vao danh sach chay nen
@@ -0,0 +1,351 @@
+import json
+import os
+import signal
+import subprocess
+import time
+from collections import deque
+from operator import itemgetter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from Core.parser import Command, Redirect, parse_command
+from Core.executor import exit_status, spawn_stages
+
+from . import log
+from .filters import ROW_KEYS, ProcessFilter, _parse_number, load_presets
+from .signals import signal_processes
+from .utils import format_bytes
+
+ALERTS_FILE = os.path.join(os.path.expanduser("~"), ".minishell_plus_pmon_alerts.json")
+ACTIONS = ('log', 'exec', 'signal')
+# Sau khi báo, cùng một luật/tiến trình không báo lại trong chừng này giây (chống dội)
+DEFAULT_COOLDOWN = 300.0
+# Cửa sổ mặc định của rss_growth (giây); ngưỡng luôn tính theo byte/phút
+DEFAULT_GROWTH_WINDOW = 60.0
+# Các placeholder dùng được trong "command"
+COMMAND_FIELDS = ('rule', 'pid', 'name', 'value')
+# Khi watchdog dừng, chờ các lệnh exec còn chạy tối đa chừng này giây
+HOOK_CLOSE_TIMEOUT = 5.0
+
+_pid = itemgetter(0)
+
+# Khoá trạng thái: (pid, create_time) của một tiến trình, hoặc None cho luật đếm (toàn hệ thống)
+Key = Optional[Tuple[int, float]]
+
+
+class Alert(NamedTuple):
+    rule: str
+    pid: Optional[int]      # None với luật đếm
+    name: str
+    value: float            # %CPU, byte/phút (rss_growth) hoặc số tiến trình (count)
+    timestamp: float
+
+
+def parse_signal(value) -> int:
+    if isinstance(value, int):
+        return signal.Signals(value)
+    name = str(value).upper()
+    try:
+        return signal.Signals[name if name.startswith("SIG") else "SIG" + name]
+    except KeyError:
+        raise ValueError(f"unknown signal '{value}'") from None
+
+
+class AlertRule:
+    """
+    Một luật cảnh báo, gồm biểu thức lọc (match, cùng cú pháp phím 'f') và một trong ba dạng:
+      - mặc định: mỗi tiến trình khớp match liên tục 'for' giây
+      - rss_growth: RSS của tiến trình khớp match tăng quá ngưỡng (byte/phút) trong 'window' giây
+      - count: có nhiều hơn 'count' tiến trình khớp match
+    Trạng thái (đang chờ đủ 'for', đã báo, cửa sổ RSS) được giữ theo từng tiến trình và chỉ được
+    cập nhật cho các dòng đổi so với snapshot trước.
+    """
+
+    def __init__(self, name: str, match: str = "", duration: float = 0.0,
+                 cooldown: float = DEFAULT_COOLDOWN, rss_growth: Optional[float] = None,
+                 window: float = DEFAULT_GROWTH_WINDOW, count: Optional[int] = None,
+                 action: str = 'log', command: Optional[str] = None, sig=None,
+                 presets: Optional[Dict[str, str]] = None):
+        if rss_growth is not None and count is not None:
+            raise ValueError("rss_growth and count are mutually exclusive")
+        if action not in ACTIONS:
+            raise ValueError(f"action must be one of {', '.join(ACTIONS)}")
+        if duration < 0 or cooldown < 0 or window <= 0:
+            raise ValueError("for/cooldown must be >= 0 and window > 0")
+        self.name = name
+        self.filter = ProcessFilter(match, presets)
+        self.duration = duration
+        self.cooldown = cooldown
+        self.rss_growth = rss_growth
+        self.window = window
+        self.count = count
+        self.action = action
+        self.pipeline = None
+        self.signal = None
+        if action == 'exec':
+            if not command:
+                raise ValueError("exec action needs a command")
+            # Parse một lần; placeholder được thay trong từng từ sau khi tách nên tên tiến trình
+            # chứa ký tự đặc biệt không thể chèn thêm lệnh
+            self.pipeline = parse_command(command)
+            self._format_pipeline({f: "" for f in COMMAND_FIELDS})
+        elif action == 'signal':
+            self.signal = parse_signal(sig if sig is not None else "TERM")
+
+        self._pending: Dict[Key, float] = {}      # đang khớp, chưa báo: thời điểm bắt đầu khớp
+        self._rows: Dict[Key, dict] = {}          # dòng mới nhất của các khoá đang chờ
+        self._firing: Set[Key] = set()            # đã báo (hoặc bị chặn bởi cooldown) trong đợt này
+        self._last_fired: Dict[Key, float] = {}
+        self._windows: Dict[Key, deque] = {}      # rss_growth: các điểm (thời điểm, rss) khi rss đổi
+        self._matching: Set[Key] = set()          # count: các tiến trình đang khớp
+
+    def describe(self) -> str:
+        if self.count is not None:
+            condition = f"count({self.filter.expression or '*'}) > {self.count}"
+        elif self.rss_growth is not None:
+            condition = f"rss growth > {format_bytes(self.rss_growth)}/min over {self.window:g}s"
+            if self.filter.is_active():
+                condition = f"{self.filter.expression} && {condition}"
+        else:
+            condition = self.filter.expression or "*"
+        if self.duration:
+            condition += f" for {self.duration:g}s"
+        return condition
+
+    def tracked_keys(self) -> Set[str]:
+        """Các trường của dòng mà luật đọc: trường trong biểu thức lọc và trường đo của luật."""
+        keys = {ROW_KEYS[field] for field in self.filter.fields}
+        if self.rss_growth is not None:
+            keys.add('rss')
+        elif self.count is None:
+            keys.add('cpu_percent')    # giá trị báo của luật theo tiến trình
+        return keys
+
+    def _format_pipeline(self, fields: Dict[str, str]):
+        try:
+            stages = tuple(Command(tuple(word.format_map(fields) for word in cmd.argv),
+                                   tuple(Redirect(r.op, r.target.format_map(fields)) for r in cmd.redirects))
+                           for cmd in self.pipeline.stages)
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"bad placeholder in command: {e} (use {{{'}, {'.join(COMMAND_FIELDS)}}})") from None
+        return self.pipeline._replace(stages=stages)
+
+    def _growth(self, key: Key, rss: int, now: float) -> float:
+        """Mức tăng RSS trong 'window' giây gần nhất, quy ra byte/phút."""
+        points = self._windows.get(key)
+        if points is None:
+            self._windows[key] = deque([(now, rss)])
+            return 0.0
+        if points[-1][1] != rss:
+            points.append((now, rss))
+        # Giữ điểm cuối cùng trước mốc cắt: đó là giá trị RSS tại đầu cửa sổ
+        cutoff = now - self.window
+        while len(points) > 1 and points[1][0] <= cutoff:
+            points.popleft()
+        return (rss - points[0][1]) * 60.0 / self.window
+
+    def _set(self, key: Key, condition: bool, now: float, info: Optional[dict] = None):
+        if condition:
+            if key in self._pending:
+                self._rows[key] = info
+            elif key not in self._firing:
+                self._pending[key] = now
+                self._rows[key] = info
+        else:
+            # Điều kiện hết: kết thúc đợt, lần khớp sau được báo lại (sau cooldown)
+            self._pending.pop(key, None)
+            self._rows.pop(key, None)
+            self._firing.discard(key)
+
+    def update(self, changed: Iterable[dict], gone: Iterable[Key], now: float):
+        matches = self.filter.matches
+        for info in changed:
+            key = (info['pid'], info['create_time'])
+            if self.count is not None:
+                if matches(info):
+                    self._matching.add(key)
+                else:
+                    self._matching.discard(key)
+            elif self.rss_growth is not None:
+                if matches(info):
+                    self._set(key, self._growth(key, info['rss'], now) > self.rss_growth, now, info)
+                else:
+                    self._windows.pop(key, None)
+                    self._set(key, False, now)
+            else:
+                self._set(key, matches(info), now, info)
+        for key in gone:
+            self._pending.pop(key, None)
+            self._rows.pop(key, None)
+            self._firing.discard(key)
+            self._last_fired.pop(key, None)
+            self._windows.pop(key, None)
+            self._matching.discard(key)
+        if self.count is not None:
+            self._set(None, len(self._matching) > self.count, now)
+
+    def due(self, now: float) -> List[Tuple[Key, Optional[dict], float]]:
+        """Các khoá vừa khớp đủ 'for' giây và không bị cooldown chặn, kèm dòng và giá trị đo được."""
+        fired = []
+        for key, since in list(self._pending.items()):
+            info = self._rows[key]
+            if self.rss_growth is not None:
+                # RSS đứng yên thì dòng không đổi nhưng cửa sổ vẫn trượt: tính lại cho các khoá đang chờ
+                growth = self._growth(key, info['rss'], now)
+                if growth <= self.rss_growth:
+                    self._set(key, False, now)
+                    continue
+            if now - since < self.duration:
+                continue
+            del self._pending[key]
+            del self._rows[key]
+            self._firing.add(key)
+            last = self._last_fired.get(key)
+            if last is not None and now - last < self.cooldown:
+                continue
+            self._last_fired[key] = now
+            if key is None:
+                value = float(len(self._matching))
+            elif self.rss_growth is not None:
+                value = growth
+            else:
+                value = info['cpu_percent']
+            fired.append((key, info, value))
+        return fired
+
+    def matching_pids(self) -> List[int]:
+        return [key[0] for key in self._matching]
+
+
+def load_rules(path: str = ALERTS_FILE, presets: Optional[Dict[str, str]] = None) -> List[AlertRule]:
+    """
+    Đọc luật từ file JSON: {"rules": [{"name": ..., "match": ..., "for": ..., ...}, ...]}.
+    ValueError (kèm tên luật) nếu file hoặc một luật không hợp lệ; OSError nếu không đọc được.
+    """
+    with open(path, encoding="utf-8") as f:
+        try:
+            config = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from None
+    specs = config.get('rules') if isinstance(config, dict) else config
+    if not isinstance(specs, list):
+        raise ValueError(f"{path}: expected a list of rules")
+    presets = load_presets() if presets is None else presets
+    rules = []
+    for i, spec in enumerate(specs, 1):
+        name = spec.get('name', f"rule{i}") if isinstance(spec, dict) else f"rule{i}"
+        try:
+            if not isinstance(spec, dict):
+                raise ValueError("expected an object")
+            unknown = set(spec) - {'name', 'match', 'for', 'cooldown', 'rss_growth', 'window', 'count',
+                                   'action', 'command', 'signal'}
+            if unknown:
+                raise ValueError(f"unknown keys: {', '.join(sorted(unknown))}")
+            growth = spec.get('rss_growth')
+            count = spec.get('count')
+            rules.append(AlertRule(
+                str(name), str(spec.get('match', "")), float(spec.get('for', 0)),
+                float(spec.get('cooldown', DEFAULT_COOLDOWN)),
+                _parse_number(str(growth)) if growth is not None else None,
+                float(spec.get('window', DEFAULT_GROWTH_WINDOW)),
+                int(count) if count is not None else None,
+                spec.get('action', 'log'), spec.get('command'), spec.get('signal'), presets))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"{path}: rule '{name}': {e}") from None
+    return rules
+
+
+class AlertEngine:
+    """
+    Đánh giá các luật trên mỗi snapshot. Chỉ các dòng có trường mà luật dùng tới đổi so với
+    snapshot trước (và tiến trình đã biến mất) được đưa qua luật, nên chi phí Python
+    ~ số luật x số dòng đổi thay vì x mọi tiến trình.
+    """
+
+    def __init__(self, rules: List[AlertRule]):
+        self.rules = rules
+        keys = set().union(*(rule.tracked_keys() for rule in rules))
+        # Như chỉ mục cây: so tuple các trường liên quan thay vì cả dict của dòng
+        self._values = itemgetter('pid', 'create_time', *sorted(keys - {'pid'}))
+        self._prev: Dict[int, tuple] = {}
+        self._seq = -1
+        self._hooks: List[Tuple[str, list]] = []     # (tên luật, Popen của các stage) của lệnh exec đang chạy
+
+    @property
+    def needs_extended(self) -> bool:
+        return any(rule.filter.needs_extended for rule in self.rules)
+
+    def evaluate(self, snapshot) -> List[Alert]:
+        if snapshot.seq == self._seq:
+            return []
+        self._seq = snapshot.seq
+        self._reap_hooks()
+        now = snapshot.timestamp
+        prev = self._prev
+        processes = snapshot.processes
+        values = list(map(self._values, processes))
+        current = dict(zip(map(_pid, values), values))
+        get = prev.get
+        changed = [p for p, v in zip(processes, values) if get(v[0]) != v]
+        gone = [prev[pid][:2] for pid in prev.keys() - current.keys()]
+        # PID bị dùng lại: tiến trình cũ coi như đã biến mất
+        gone += [prev[p['pid']][:2] for p in changed
+                 if p['pid'] in prev and prev[p['pid']][1] != p['create_time']]
+        self._prev = current
+
+        alerts = []
+        for rule in self.rules:
+            rule.update(changed, gone, now)
+            for key, info, value in rule.due(now):
+                if key is None:
+                    alert = Alert(rule.name, None, "", value, now)
+                else:
+                    alert = Alert(rule.name, key[0], info['name'], value, now)
+                alerts.append(alert)
+                self._run(rule, alert)
+        return alerts
+
+    def _run(self, rule: AlertRule, alert: Alert):
+        target = f"pid {alert.pid} ({alert.name})" if alert.pid is not None else f"{alert.value:g} processes"
+        log.warning(f"alert {rule.name}: {target}: {rule.describe()}")
+        if rule.action == 'exec':
+            fields = {'rule': rule.name, 'pid': "" if alert.pid is None else str(alert.pid),
+                      'name': alert.name, 'value': f"{alert.value:.1f}"}
+            # Không chờ lệnh: hook chậm không được chặn các lần lấy mẫu sau; thu hồi ở evaluate() kế tiếp
+            try:
+                procs = spawn_stages(rule._format_pipeline(fields).stages, None, None)
+            except Exception as e:
+                log.error(f"alert {rule.name}: command failed: {e}")
+                return
+            if procs is None:
+                log.error(f"alert {rule.name}: command not found")
+                return
+            self._hooks.append((rule.name, procs))
+        elif rule.action == 'signal':
+            pids = [alert.pid] if alert.pid is not None else rule.matching_pids()
+            log.warning(f"alert {rule.name}: {signal_processes(pids, rule.signal).summary(rule.signal.name)}")
+
+    def _reap_hooks(self, timeout: Optional[float] = None):
+        """Thu hồi các lệnh exec đã xong (không chặn); với timeout thì chờ tối đa chừng đó giây."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        running = []
+        for name, procs in self._hooks:
+            if deadline is not None:
+                for p in procs:
+                    try:
+                        p.wait(max(0.0, deadline - time.monotonic()))
+                    except subprocess.TimeoutExpired:
+                        break
+            if any(p.poll() is None for p in procs):
+                running.append((name, procs))
+                continue
+            status = exit_status(procs[-1].returncode)
+            if status:
+                log.warning(f"alert {name}: command exited with status {status}")
+        self._hooks = running
+
+    def close(self):
+        """Chờ các lệnh exec còn chạy (tối đa HOOK_CLOSE_TIMEOUT giây); lệnh quá hạn được để chạy tiếp."""
+        self._reap_hooks(HOOK_CLOSE_TIMEOUT)
+        for name, procs in self._hooks:
+            log.warning(f"alert {name}: command still running (pid {procs[0].pid})")
+        self._hooks = []
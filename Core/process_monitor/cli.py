@@ -0,0 +1,310 @@
+import csv
+import json
+import signal
+import sys
+import time
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+import psutil
+
+from .utils import get_process_info
+from .tui import SORT_COLUMNS, start_tui, top_processes
+from .filters import ProcessFilter, load_presets
+from .procfs import read_cgroup
+from .sampler import ProcessSampler
+from .recording import RecordingWriter, RecordingReader, ReplaySource
+from .alerts import AlertEngine, load_rules
+from .exporter import DEFAULT_TOP_K, MetricsExporter, MetricsServer, parse_address
+
+USAGE = ("pmon: usage: pmon [-b [-n COUNT] [-d DELAY] [--format ndjson|csv] [--top K]\n"
+         "                  [--filter EXPR] [--name SUBSTR] [--cpu PCT] [--mem PCT]]\n"
+         "       pmon --record FILE [-n COUNT] [-d DELAY]\n"
+         "       pmon --replay FILE\n"
+         "       pmon --serve HOST:PORT [-d DELAY] [--top K] [-n COUNT]\n"
+         "       pmon --alerts RULES.json [-d DELAY] [-n COUNT]")
+
+# Thứ tự cột của CSV; NDJSON dùng cùng các khoá
+FIELDS = ('sample', 'timestamp', 'pid', 'username', 'name', 'status', 'cpu_percent',
+          'memory_percent', 'num_threads', 'create_time', 'io_read_bytes', 'io_write_bytes')
+FORMATS = ("ndjson", "csv")
+# Lần đầu psutil.cpu_percent(interval=0) luôn trả 0.0: mồi một lượt rồi chờ chừng này
+PRIME_INTERVAL = 0.1
+
+
+class PmonOptions(NamedTuple):
+    batch: bool = False
+    count: Optional[int] = None     # None: chạy tới khi bị ngắt (như top -b)
+    delay: float = 1.5
+    format: str = "ndjson"
+    top: Optional[int] = None
+    process_filter: Optional[ProcessFilter] = None
+    record: Optional[str] = None
+    replay: Optional[str] = None
+    serve: Optional[Tuple[str, int]] = None
+    alerts: Optional[str] = None
+
+
+def parse_pmon_args(args: List[str]) -> PmonOptions:
+    """Phân tích tham số của builtin pmon; ValueError nếu không hợp lệ."""
+    opts = {}
+    expressions = []
+    shortcuts = []      # (trường, toán tử, giá trị) từ --name/--cpu/--mem
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "-b":
+            opts['batch'] = True
+            i += 1
+            continue
+        if i + 1 >= len(args):
+            raise ValueError(f"{arg}: missing value" if arg.startswith("-") else f"unexpected argument: {arg}")
+        value = args[i + 1]
+        if arg == "-n":
+            opts['count'] = int(value)
+            if opts['count'] < 1:
+                raise ValueError("-n: COUNT must be >= 1")
+        elif arg == "-d":
+            opts['delay'] = float(value)
+            if opts['delay'] < 0:
+                raise ValueError("-d: DELAY must be >= 0")
+        elif arg == "--format":
+            if value not in FORMATS:
+                raise ValueError(f"--format: expected one of {', '.join(FORMATS)}")
+            opts['format'] = value
+        elif arg == "--top":
+            opts['top'] = int(value)
+            if opts['top'] < 1:
+                raise ValueError("--top: K must be >= 1")
+        elif arg == "--filter":
+            expressions.append(value)
+        elif arg == "--name":
+            shortcuts.append(('name', '~', value))
+        elif arg == "--cpu":
+            shortcuts.append(('cpu', '>=', float(value)))
+        elif arg == "--mem":
+            shortcuts.append(('mem', '>=', float(value)))
+        elif arg in ("--record", "--replay", "--alerts"):
+            opts[arg[2:]] = value
+        elif arg == "--serve":
+            opts['serve'] = parse_address(value)
+        else:
+            raise ValueError(f"unknown option: {arg}")
+        i += 2
+    process_filter = ProcessFilter(" && ".join(f"({e})" for e in expressions), load_presets())
+    for field, op, value in shortcuts:
+        process_filter = process_filter.with_clause(field, op, value)
+    modes = [m for m in ('batch', 'record', 'replay', 'serve', 'alerts') if opts.get(m)]
+    if len(modes) > 1:
+        raise ValueError("-b, --record, --replay, --serve and --alerts are mutually exclusive")
+    mode = modes[0] if modes else None
+    # Tùy chọn hợp lệ theo từng chế độ
+    allowed = {None: set(), 'replay': set(), 'record': {'count', 'delay'},
+               'batch': {'count', 'delay', 'format', 'top'}, 'serve': {'count', 'delay', 'top'},
+               'alerts': {'count', 'delay'}}[mode]
+    extra = set(opts) - allowed - set(modes)
+    if extra or (process_filter.is_active() and mode != 'batch'):
+        raise ValueError("options require batch mode (-b)" if mode is None
+                         else f"option not supported with {'-b' if mode == 'batch' else '--' + mode}")
+    return PmonOptions(process_filter=process_filter, **opts)
+
+
+def iter_processes(process_filter: ProcessFilter) -> Iterator[dict]:
+    """Sinh từng tiến trình khớp bộ lọc, không dựng cả danh sách trong bộ nhớ."""
+    need_cgroup = 'cgroup' in process_filter.fields
+    for p in psutil.process_iter():
+        info = get_process_info(p)
+        if info is None:
+            continue
+        if need_cgroup:
+            info['cgroup'] = read_cgroup(info['pid'])
+        if process_filter.matches(info):
+            yield info
+
+
+class BatchWriter:
+    """Ghi bản ghi theo NDJSON hoặc CSV (header một lần), flush sau mỗi lượt mẫu."""
+
+    def __init__(self, out, fmt: str):
+        self.out = out
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(out, fieldnames=FIELDS, extrasaction='ignore')
+            self._csv.writeheader()
+
+    def write(self, record: dict):
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self.out.write(json.dumps({k: record[k] for k in FIELDS}, separators=(",", ":")))
+            self.out.write("\n")
+
+    def flush(self):
+        self.out.flush()
+
+
+def run_batch(options: PmonOptions, out=None) -> int:
+    out = out or sys.stdout
+    writer = BatchWriter(out, options.format)
+    # Ctrl-C dừng vòng lặp (handler SIGINT của Core chỉ in thông báo)
+    old_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        for p in psutil.process_iter():
+            try:
+                p.cpu_percent(interval=0)
+            except psutil.Error:
+                pass
+        time.sleep(min(options.delay, PRIME_INTERVAL))
+
+        sample = 0
+        while options.count is None or sample < options.count:
+            if sample:
+                time.sleep(options.delay)
+            sample += 1
+            timestamp = time.time()
+            records = iter_processes(options.process_filter)
+            if options.top is not None:
+                # heapq chỉ giữ K bản ghi, theo %CPU giảm dần như bảng TUI
+                records = top_processes(records, SORT_COLUMNS[0], True, options.top)
+            for info in records:
+                info['sample'] = sample
+                info['timestamp'] = timestamp
+                writer.write(info)
+            writer.flush()
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # Đầu đọc đã đóng (vd. | head): dừng im lặng
+        return 0
+    finally:
+        signal.signal(signal.SIGINT, old_handler)
+    return 0
+
+
+def run_record(options: PmonOptions) -> int:
+    """Lấy mẫu như TUI (không vẽ) và ghi nối tiếp vào bản ghi cho tới khi đủ COUNT hoặc Ctrl-C."""
+    try:
+        writer = RecordingWriter(options.record)
+    except (OSError, ValueError) as e:
+        print(f"pmon: {e}", file=sys.stderr)
+        return 1
+    sampler = ProcessSampler(options.delay)
+    frames, written = 0, 0
+    old_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        sampler.sample_once()   # mồi %CPU
+        time.sleep(min(options.delay, PRIME_INTERVAL))
+        while options.count is None or frames < options.count:
+            if frames:
+                time.sleep(options.delay)
+            written += writer.write(sampler.sample_once())
+            frames += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGINT, old_handler)
+        writer.close()
+    print(f"pmon: recorded {frames} samples ({written} bytes) to {options.record}", file=sys.stderr)
+    return 0
+
+
+def run_serve(options: PmonOptions) -> int:
+    """
+    Lấy mẫu theo chu kỳ (không vẽ) và phục vụ /metrics cho Prometheus tới khi đủ COUNT hoặc Ctrl-C.
+    Trang metrics được dựng lại một lần mỗi mẫu; scrape chỉ đọc bản đã dựng.
+    """
+    exporter = MetricsExporter(options.top or DEFAULT_TOP_K)
+    try:
+        server = MetricsServer(exporter, *options.serve)
+    except OSError as e:
+        print(f"pmon: --serve: {e}", file=sys.stderr)
+        return 1
+    sampler = ProcessSampler(options.delay)
+    # Gộp theo user cần username/I/O của mọi tiến trình; gauge hệ thống cần panel hệ thống
+    sampler.set_extended(True)
+    sampler.set_system_panel(True)
+    server.start()
+    host, port = server.address
+    print(f"pmon: serving metrics on http://{host}:{port}/metrics", file=sys.stderr)
+    frames = 0
+    old_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        sampler.sample_once()   # mồi %CPU và bộ đếm disk/net
+        time.sleep(min(options.delay, PRIME_INTERVAL))
+        while options.count is None or frames < options.count:
+            if frames:
+                time.sleep(options.delay)
+            exporter.update(sampler.sample_once())
+            frames += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGINT, old_handler)
+        server.stop()
+    return 0
+
+
+def run_alerts(options: PmonOptions) -> int:
+    """Watchdog: lấy mẫu theo chu kỳ và đánh giá các luật cảnh báo trên từng snapshot."""
+    try:
+        engine = AlertEngine(load_rules(options.alerts))
+    except (OSError, ValueError) as e:
+        print(f"pmon: {e}", file=sys.stderr)
+        return 1
+    if not engine.rules:
+        print(f"pmon: {options.alerts}: no rules", file=sys.stderr)
+        return 1
+    sampler = ProcessSampler(options.delay)
+    sampler.set_extended(engine.needs_extended)
+    print(f"pmon: watching {len(engine.rules)} rule(s) from {options.alerts}", file=sys.stderr)
+    frames = 0
+    old_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        sampler.sample_once()   # mồi %CPU; luật chỉ xét từ mẫu thứ hai
+        time.sleep(min(options.delay, PRIME_INTERVAL))
+        while options.count is None or frames < options.count:
+            if frames:
+                time.sleep(options.delay)
+            engine.evaluate(sampler.sample_once())
+            frames += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGINT, old_handler)
+        engine.close()
+    return 0
+
+
+def run_replay(options: PmonOptions) -> int:
+    try:
+        reader = RecordingReader(options.replay)
+    except (OSError, ValueError) as e:
+        print(f"pmon: {e}", file=sys.stderr)
+        return 1
+    if reader.frame_count == 0:
+        reader.close()
+        print(f"pmon: {options.replay}: no samples recorded", file=sys.stderr)
+        return 1
+    start_tui(ReplaySource(reader))
+    return 0
+
+
+def run_pmon(args: List[str]) -> int:
+    """Điểm vào của builtin pmon: TUI nếu không có tham số, chế độ batch với -b."""
+    try:
+        options = parse_pmon_args(args)
+    except ValueError as e:
+        print(f"pmon: {e}\n{USAGE}", file=sys.stderr)
+        return 2
+    if options.batch:
+        return run_batch(options)
+    if options.record:
+        return run_record(options)
+    if options.replay:
+        return run_replay(options)
+    if options.serve:
+        return run_serve(options)
+    if options.alerts:
+        return run_alerts(options)
+    start_tui()
+    return 0
@@ -0,0 +1,180 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+from .groups import GroupAggregator
+from .sampler import Snapshot
+from .tui import SORT_COLUMNS, top_processes
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Giới hạn số series mỗi lần scrape: K tiến trình mỗi bảng xếp hạng, N user (phần còn lại gộp vào "__other__")
+DEFAULT_TOP_K = 10
+MAX_USERS = 20
+# Không phải tên user hợp lệ thông thường, nên không trùng với một user thật tên "other"
+OTHER_USER = "__other__"
+# Tên lệnh bị cắt để label không phình theo argv dài
+MAX_LABEL_LENGTH = 32
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """'HOST:PORT' hoặc ':PORT' (mặc định 127.0.0.1); ValueError nếu không hợp lệ."""
+    host, sep, port = value.rpartition(":")
+    if not sep or not port.isdigit() or int(port) > 65535:
+        raise ValueError(f"--serve: expected HOST:PORT, got '{value}'")
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+def escape_label(value) -> str:
+    text = str(value)[:MAX_LABEL_LENGTH]
+    return text.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class _Metrics:
+    """Gom các dòng theo từng metric để HELP/TYPE chỉ in một lần, đúng thứ tự khai báo."""
+
+    def __init__(self):
+        self._families = {}
+
+    def add(self, name: str, help_text: str, value: float, labels: Optional[dict] = None,
+            kind: str = "gauge"):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        if labels:
+            label_text = ",".join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+            family.append(f"{name}{{{label_text}}} {value!r}")
+        else:
+            family.append(f"{name} {value!r}")
+
+    def render(self) -> bytes:
+        return ("\n".join(line for family in self._families.values() for line in family) + "\n").encode()
+
+
+class MetricsExporter:
+    """
+    Dựng trang /metrics (định dạng text của Prometheus) một lần cho mỗi snapshot mới;
+    mỗi lần scrape chỉ trả về bytes đã dựng sẵn nên chi phí không phụ thuộc tần suất scrape.
+    """
+
+    def __init__(self, top_k: int = DEFAULT_TOP_K, max_users: int = MAX_USERS):
+        self.top_k = top_k
+        self.max_users = max_users
+        self._users = GroupAggregator('user')
+        self._seq = -1
+        self.body = b"# no samples yet\n"
+
+    def update(self, snapshot: Snapshot):
+        if snapshot.seq == self._seq:
+            return
+        self._seq = snapshot.seq
+        # Gán một tham chiếu là nguyên tử: luồng HTTP không bao giờ thấy trang dựng dở
+        self.body = self.render(snapshot)
+
+    def render(self, snapshot: Snapshot) -> bytes:
+        m = _Metrics()
+        processes = snapshot.processes
+        m.add("pmon_cpu_percent", "System-wide CPU utilisation.", snapshot.cpu_percent)
+        m.add("pmon_memory_percent", "System-wide memory utilisation.", snapshot.mem_percent)
+        m.add("pmon_processes", "Number of processes.", len(processes))
+        statuses = {}
+        for info in processes:
+            statuses[info['status']] = statuses.get(info['status'], 0) + 1
+        for status, count in sorted(statuses.items()):
+            m.add("pmon_processes_by_status", "Number of processes per state.", count, {'status': status})
+        m.add("pmon_sample_duration_seconds", "Time spent collecting the last sample.", snapshot.duration)
+        m.add("pmon_sample_timestamp_seconds", "Unix time of the last sample.", snapshot.timestamp)
+
+        system = snapshot.system
+        if system is not None:
+            for period, value in zip(("1m", "5m", "15m"), system.load):
+                m.add("pmon_load_average", "Load average.", value, {'period': period})
+            m.add("pmon_swap_used_bytes", "Swap in use.", system.swap_used)
+            m.add("pmon_swap_total_bytes", "Total swap.", system.swap_total)
+            for core, value in enumerate(system.cores):
+                m.add("pmon_cpu_core_percent", "Per-core CPU utilisation.", value, {'core': core})
+            for device, read, write in system.disks:
+                m.add("pmon_disk_read_bytes_per_second", "Disk read throughput.", read, {'device': device})
+                m.add("pmon_disk_write_bytes_per_second", "Disk write throughput.", write, {'device': device})
+            for iface, rx, tx in system.nets:
+                m.add("pmon_network_receive_bytes_per_second", "Network receive throughput.", rx,
+                      {'interface': iface})
+                m.add("pmon_network_transmit_bytes_per_second", "Network transmit throughput.", tx,
+                      {'interface': iface})
+
+        # Top-K: gauge giá trị chỉ có nhãn rank cố định 1..K nên số series không đổi khi tiến trình
+        # vào/ra top-K. Tên lệnh (đã cắt) nằm ở gauge *_info riêng (giá trị 1) để join theo rank;
+        # không có nhãn pid, vì mỗi pid mới lọt top-K sẽ đẻ ra một series mới
+        for column, metric, help_text in ((SORT_COLUMNS[0], "pmon_top_cpu_percent", "Top processes by CPU."),
+                                          (SORT_COLUMNS[1], "pmon_top_memory_percent",
+                                           "Top processes by memory.")):
+            for rank, info in enumerate(top_processes(processes, column, True, self.top_k), 1):
+                m.add(metric, help_text, column.key(info), {'rank': rank})
+                m.add(f"{metric}_info", f"{help_text[:-1]}: process at each rank.", 1,
+                      {'rank': rank, 'name': info['name']})
+
+        for group in self._top_users(self._users.update(processes, snapshot.timestamp)):
+            labels = {'user': group['name']}
+            m.add("pmon_user_processes", "Processes per user.", group['count'], labels)
+            m.add("pmon_user_cpu_percent", "CPU utilisation per user.", group['cpu_percent'], labels)
+            m.add("pmon_user_memory_percent", "Memory utilisation per user.", group['memory_percent'], labels)
+            m.add("pmon_user_threads", "Threads per user.", group['num_threads'], labels)
+            m.add("pmon_user_io_read_bytes_per_second", "I/O read throughput per user.",
+                  group['io_read_rate'], labels)
+            m.add("pmon_user_io_write_bytes_per_second", "I/O write throughput per user.",
+                  group['io_write_rate'], labels)
+        return m.render()
+
+    def _top_users(self, groups: List[dict]) -> List[dict]:
+        """N user dùng CPU nhiều nhất; các user còn lại cộng dồn vào một series OTHER_USER."""
+        if len(groups) <= self.max_users:
+            return sorted(groups, key=lambda g: g['name'])
+        groups.sort(key=lambda g: (g['cpu_percent'], g['memory_percent']), reverse=True)
+        kept, rest = groups[:self.max_users - 1], groups[self.max_users - 1:]
+        other = {'name': OTHER_USER, 'count': 0, 'cpu_percent': 0.0, 'memory_percent': 0.0,
+                 'num_threads': 0, 'io_read_rate': 0.0, 'io_write_rate': 0.0}
+        for g in rest:
+            for key in ('count', 'cpu_percent', 'memory_percent', 'num_threads', 'io_read_rate', 'io_write_rate'):
+                other[key] += g[key]
+        return sorted(kept, key=lambda g: g['name']) + [other]
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    exporter: MetricsExporter = None   # gán bởi MetricsServer
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._reply(200, self.exporter.body, CONTENT_TYPE)
+        elif path == "/":
+            self._reply(200, b"pmon exporter: see /metrics\n", "text/plain; charset=utf-8")
+        else:
+            self._reply(404, b"not found\n", "text/plain; charset=utf-8")
+
+    def _reply(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass   # mỗi lần scrape không in một dòng ra stderr
+
+
+class MetricsServer:
+    """HTTP server /metrics chạy ở luồng nền; port 0 chọn một port trống (xem .address)."""
+
+    def __init__(self, exporter: MetricsExporter, host: str, port: int):
+        handler = type("MetricsHandler", (_MetricsHandler,), {'exporter': exporter})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="pmon-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=2.0)
@@ -0,0 +1,341 @@
+import json
+import os
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from . import log
+
+PRESETS_FILE = os.path.join(os.path.expanduser("~"), ".minishell_plus_pmon_filters.json")
+
+# Trường có thể lọc: (biểu thức truy cập trong mã sinh ra, kiểu). Trường không có trong
+# mọi dòng (vd. dòng nhóm không có rss/status) dùng giá trị mặc định qua .get().
+FIELDS: Dict[str, Tuple[str, type]] = {
+    'name': ("p['name']", str),
+    'user': ("(p.get('username') or '')", str),
+    'status': ("p.get('status', '')", str),
+    'cgroup': ("p.get('cgroup', '')", str),
+    'pid': ("p['pid']", float),
+    'ppid': ("p.get('ppid', 0)", float),
+    'cpu': ("p['cpu_percent']", float),
+    'mem': ("p['memory_percent']", float),
+    'rss': ("p.get('rss', 0)", float),
+    'threads': ("p.get('num_threads', 0)", float),
+}
+# Khoá trong dòng snapshot mà mỗi trường đọc tới (để so sánh dòng cũ/mới, vd. luật cảnh báo)
+ROW_KEYS: Dict[str, str] = {
+    'name': 'name', 'user': 'username', 'status': 'status', 'cgroup': 'cgroup', 'pid': 'pid',
+    'ppid': 'ppid', 'cpu': 'cpu_percent', 'mem': 'memory_percent', 'rss': 'rss', 'threads': 'num_threads',
+}
+ALIASES = {'comm': 'name', 'state': 'status', 'thr': 'threads'}
+# Trường chỉ có khi sampler thu thập mở rộng (ProcessSampler.set_extended)
+EXTENDED_FIELDS = {'user', 'cgroup'}
+
+STATUSES = ('running', 'sleeping', 'disk-sleep', 'stopped', 'tracing-stop', 'zombie', 'dead',
+            'wake-kill', 'waking', 'parked', 'idle', 'locked', 'waiting')
+_UNITS = {'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30, 't': 1 << 40}
+_OPERATORS = ('!=', '!~', '>=', '<=', '=', '>', '<', '~')
+_PY_OPERATORS = {'=': '==', '!=': '!=', '>': '>', '>=': '>=', '<': '<', '<=': '<='}
+_WORD_END = set(' \t()&|!=<>~"')
+# Chi phí ước lượng để sắp xếp các vế của '&&'
+_COST_NUMBER, _COST_TEXT, _COST_REGEX, _COST_GROUP = 0, 1, 2, 3
+
+
+class Clause(NamedTuple):
+    """Một vế ở cấp cao nhất của chuỗi '&&' (field None nếu là nhóm/preset/phủ định, op '||' nếu cả biểu thức là phép hoặc)."""
+    field: Optional[str]
+    op: Optional[str]
+    value: Optional[str]
+    source: str
+
+
+class _Parser:
+    """
+    Cú pháp:  expr   := and ('||' and)*
+              and    := unary ('&&' unary)*
+              unary  := '!' unary | '(' expr ')' | '@' PRESET | FIELD OP VALUE
+    VALUE là số (hậu tố K/M/G/T), từ, "chuỗi" hoặc /regex/ (sau ~ hoặc !~, cờ i không phân biệt hoa thường).
+    Sinh mã Python cho cả biểu thức; hằng số/regex được gắn tên trong namespace.
+    """
+
+    def __init__(self, text: str, presets: Dict[str, str], expanding: Tuple[str, ...] = ()):
+        self.text = text
+        self.pos = 0
+        self.presets = presets
+        self.expanding = expanding
+        self.constants: Dict[str, object] = {}
+        self.fields: Set[str] = set()
+
+    def error(self, message: str):
+        raise ValueError(f"{message} at position {self.pos + 1}")
+
+    def skip(self):
+        while self.pos < len(self.text) and self.text[self.pos] in " \t":
+            self.pos += 1
+
+    def peek(self, token: str) -> bool:
+        self.skip()
+        return self.text.startswith(token, self.pos)
+
+    def take(self, token: str) -> bool:
+        if self.peek(token):
+            self.pos += len(token)
+            return True
+        return False
+
+    def constant(self, value) -> str:
+        name = f"_c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def parse(self) -> Tuple[str, List[Clause]]:
+        self.skip()
+        if self.pos == len(self.text):
+            return "True", []
+        code, clauses = self.parse_or()
+        self.skip()
+        if self.pos != len(self.text):
+            self.error(f"unexpected '{self.text[self.pos]}'")
+        return code, clauses
+
+    def parse_or(self) -> Tuple[str, List[Clause]]:
+        start = self.pos
+        code, clauses = self.parse_and()
+        parts = [code]
+        while self.take("||"):
+            parts.append(self.parse_and()[0])
+        if len(parts) == 1:
+            return code, clauses
+        return "(" + " or ".join(parts) + ")", [Clause(None, '||', None, self.text[start:self.pos].strip())]
+
+    def parse_and(self) -> Tuple[str, List[Clause]]:
+        parts, clauses = [], []
+        while True:
+            self.skip()
+            start = self.pos
+            code, clause, cost = self.parse_unary()
+            parts.append((cost, len(parts), code))
+            clauses.append(clause or Clause(None, None, None, self.text[start:self.pos].strip()))
+            if not self.take("&&"):
+                break
+        # Các vế không có tác dụng phụ: so sánh số chạy trước, regex/nhóm chạy sau để 'and' dừng sớm
+        codes = [code for _, _, code in sorted(parts)]
+        return (codes[0] if len(codes) == 1 else "(" + " and ".join(codes) + ")"), clauses
+
+    def parse_unary(self) -> Tuple[str, Optional[Clause], int]:
+        if self.peek("!") and not self.peek("!="):
+            self.pos += 1
+            code, _, cost = self.parse_unary()
+            return f"(not {code})", None, cost
+        if self.take("("):
+            code, _ = self.parse_or()
+            if not self.take(")"):
+                self.error("expected ')'")
+            return code, None, _COST_GROUP
+        if self.take("@"):
+            return self.parse_preset(), None, _COST_GROUP
+        return self.parse_clause()
+
+    def parse_preset(self) -> str:
+        name = self.read_word()
+        if name not in self.presets:
+            self.error(f"unknown preset '@{name}'")
+        if name in self.expanding:
+            self.error(f"preset '@{name}' refers to itself")
+        inner = _Parser(self.presets[name], self.presets, self.expanding + (name,))
+        inner.constants = self.constants      # dùng chung namespace hằng số
+        try:
+            code, _ = inner.parse()
+        except ValueError as e:
+            raise ValueError(f"in preset '@{name}': {e}") from None
+        self.fields |= inner.fields
+        return code
+
+    def read_word(self) -> str:
+        self.skip()
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] not in _WORD_END:
+            self.pos += 1
+        if start == self.pos:
+            self.error("expected a value")
+        return self.text[start:self.pos]
+
+    def read_quoted(self) -> str:
+        self.pos += 1
+        chars = []
+        while self.pos < len(self.text):
+            c = self.text[self.pos]
+            if c == '\\' and self.pos + 1 < len(self.text):
+                chars.append(self.text[self.pos + 1])
+                self.pos += 2
+                continue
+            self.pos += 1
+            if c == '"':
+                return "".join(chars)
+            chars.append(c)
+        self.error("unterminated string")
+
+    def read_regex(self):
+        start = self.pos
+        self.pos += 1
+        while self.pos < len(self.text) and self.text[self.pos] != '/':
+            self.pos += 2 if self.text[self.pos] == '\\' else 1
+        if self.pos >= len(self.text):
+            self.error("unterminated regex")
+        pattern = self.text[start + 1:self.pos]
+        self.pos += 1
+        flags = 0
+        while self.pos < len(self.text) and self.text[self.pos].isalpha():
+            if self.text[self.pos] != 'i':
+                self.error(f"unknown regex flag '{self.text[self.pos]}'")
+            flags |= re.IGNORECASE
+            self.pos += 1
+        try:
+            return re.compile(pattern, flags)
+        except re.error as e:
+            raise ValueError(f"bad regex /{pattern}/: {e}") from None
+
+    def parse_clause(self) -> Tuple[str, Clause, int]:
+        self.skip()
+        start = self.pos
+        field = self.read_word().lower()
+        field = ALIASES.get(field, field)
+        if field not in FIELDS:
+            self.pos = start
+            self.error(f"unknown field '{field}'")
+        self.fields.add(field)
+        accessor, kind = FIELDS[field]
+
+        op = next((o for o in _OPERATORS if self.take(o)), None)
+        if op is None:
+            self.error("expected an operator (= != > >= < <= ~ !~)")
+        self.skip()
+
+        if op in ('~', '!~'):
+            if kind is not str:
+                self.error(f"'{op}' needs a text field")
+            if self.peek("/"):
+                regex = self.read_regex()
+                text = regex.pattern
+                test = "is None" if op == '!~' else "is not None"
+                code = f"({self.constant(regex.search)}({accessor}) {test})"
+                cost = _COST_REGEX
+            else:
+                # Không có /.../: tìm chuỗi con không phân biệt hoa thường; hằng số hạ chữ thường sẵn
+                text = self.read_quoted() if self.peek('"') else self.read_word()
+                test = "not in" if op == '!~' else "in"
+                code = f"({self.constant(text.lower())} {test} {accessor}.lower())"
+                cost = _COST_TEXT
+            return code, Clause(field, op, text, self.text[start:self.pos].strip()), cost
+
+        raw = self.read_quoted() if self.peek('"') else self.read_word()
+        if kind is str:
+            if op not in ('=', '!='):
+                self.error(f"'{op}' needs a numeric field")
+            value = _normalize_status(raw) if field == 'status' else raw
+        else:
+            value = _parse_number(raw)
+        code = f"({accessor} {_PY_OPERATORS[op]} {self.constant(value)})"
+        cost = _COST_TEXT if kind is str else _COST_NUMBER
+        return code, Clause(field, op, raw, self.text[start:self.pos].strip()), cost
+
+
+def _parse_number(text: str) -> float:
+    scale = _UNITS.get(text[-1].lower(), 1) if text else 1
+    try:
+        return float(text[:-1] if scale != 1 else text) * scale
+    except ValueError:
+        raise ValueError(f"expected a number, got '{text}'") from None
+
+
+def _normalize_status(text: str) -> str:
+    """'sleep' -> 'sleeping': chấp nhận tiền tố duy nhất của tên trạng thái."""
+    text = text.lower()
+    if text in STATUSES:
+        return text
+    matches = [s for s in STATUSES if s.startswith(text)]
+    if len(matches) != 1:
+        raise ValueError(f"unknown status '{text}'")
+    return matches[0]
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class ProcessFilter:
+    """
+    Bộ lọc tiến trình từ một biểu thức, vd. user=postgres && cpu>5 && name~/^python/.
+    Biểu thức được phân tích một lần thành mã Python (hằng số và regex dựng sẵn):
+    matches() cho từng dòng và filter() lọc cả danh sách trong một list comprehension.
+    ValueError nếu biểu thức sai cú pháp.
+    """
+
+    def __init__(self, expression: str = "", presets: Optional[Dict[str, str]] = None):
+        self.expression = expression.strip()
+        self.presets = presets if presets is not None else {}
+        parser = _Parser(self.expression, self.presets)
+        code, self.clauses = parser.parse()
+        self.fields = frozenset(parser.fields)
+        namespace = dict(parser.constants, __builtins__={})
+        self.matches: Callable[[dict], bool] = eval(f"lambda p: {code}", namespace)
+        self._filter = eval(f"lambda rows: [p for p in rows if {code}]", namespace)
+
+    def filter(self, rows) -> List[dict]:
+        return self._filter(rows)
+
+    @property
+    def needs_extended(self) -> bool:
+        """Biểu thức dùng user/cgroup: sampler phải thu thập các trường đó cho mọi tiến trình."""
+        return bool(self.fields & EXTENDED_FIELDS)
+
+    def is_active(self) -> bool:
+        return bool(self.expression)
+
+    def get_description(self) -> str:
+        return self.expression or "None"
+
+    def clause_value(self, field: str) -> str:
+        """Giá trị của vế đơn giản trên field ở cấp cao nhất (để điền sẵn lời nhắc), hoặc ""."""
+        return next((c.value for c in self.clauses if c.field == field and c.op != '!~'), "")
+
+    def with_clause(self, field: str, op: str, value) -> "ProcessFilter":
+        """
+        Bộ lọc mới thay mọi vế cấp cao nhất trên field bằng 'field op value' (bỏ vế nếu value rỗng).
+        Dùng cho các phím tắt /, c, m và các tuỳ chọn --name/--cpu/--mem.
+        """
+        if self.clauses and self.clauses[0].op == '||':
+            kept = [f"({self.expression})"]
+        else:
+            kept = [c.source for c in self.clauses if c.field != field]
+        if value not in ("", None):
+            kept.append(f"{field}{op}{_quote(str(value)) if isinstance(value, str) else value}")
+        return ProcessFilter(" && ".join(kept), self.presets)
+
+
+def load_presets(path: str = PRESETS_FILE) -> Dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            presets = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        log.warning(f"Cannot load filter presets from {path}: {e}")
+        return {}
+    return {str(k): str(v) for k, v in presets.items()} if isinstance(presets, dict) else {}
+
+
+def save_preset(name: str, expression: str, path: str = PRESETS_FILE) -> Dict[str, str]:
+    """Lưu (hoặc xoá nếu expression rỗng) một preset; trả về bộ preset mới. OSError nếu không ghi được."""
+    if not re.fullmatch(r"[A-Za-z0-9_.-]+", name):
+        raise ValueError(f"invalid preset name '{name}'")
+    presets = load_presets(path)
+    if expression:
+        ProcessFilter(expression, presets)    # không lưu biểu thức sai
+        presets[name] = expression
+    else:
+        presets.pop(name, None)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(presets, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return presets
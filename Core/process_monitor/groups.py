@@ -0,0 +1,69 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Các kiểu nhóm (phím 'G' xoay vòng) và cách lấy khoá nhóm từ một dòng snapshot.
+# USER và cgroup chỉ có khi sampler đang thu thập mở rộng (ProcessSampler.set_extended).
+GROUP_KINDS: Dict[str, Callable[[dict], str]] = {
+    'user': lambda p: p.get('username') or 'N/A',
+    'name': lambda p: p['name'],
+    'cgroup': lambda p: p.get('cgroup') or '/',
+}
+
+
+def group_key(kind: str, info: dict) -> str:
+    return GROUP_KINDS[kind](info)
+
+
+class GroupAggregator:
+    """
+    Gộp snapshot theo user/tên/cgroup trong một lượt duyệt: số tiến trình, tổng %CPU, %MEM,
+    threads và tốc độ I/O (delta byte của từng tiến trình so với snapshot trước).
+    Mỗi nhóm là một dict cùng khoá với dòng tiến trình (name, pid, cpu_percent, ...)
+    để dùng lại bộ lọc và SORT_COLUMNS của bảng.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._prev_io: Dict[Tuple[int, float], Tuple[int, int]] = {}
+        self._prev_time: Optional[float] = None
+
+    def update(self, processes, timestamp: float) -> List[dict]:
+        key_of = GROUP_KINDS[self.kind]
+        prev_io = self._prev_io
+        elapsed = timestamp - self._prev_time if self._prev_time is not None else 0.0
+        scale = 1.0 / elapsed if elapsed > 0 else 0.0
+        new_io = {}
+        groups: Dict[str, dict] = {}
+
+        for info in processes:
+            key = key_of(info)
+            g = groups.get(key)
+            if g is None:
+                g = groups[key] = {
+                    'name': key, 'pid': info['pid'], 'count': 0,
+                    'cpu_percent': 0.0, 'memory_percent': 0.0, 'num_threads': 0,
+                    'io_read_rate': 0.0, 'io_write_rate': 0.0,
+                    'create_time': info['create_time'],
+                }
+            g['count'] += 1
+            g['cpu_percent'] += info['cpu_percent']
+            g['memory_percent'] += info['memory_percent']
+            g['num_threads'] += info.get('num_threads', 0)
+            # pid nhỏ nhất làm khoá phụ ổn định; create_time sớm nhất cho cột RUNTIME
+            if info['pid'] < g['pid']:
+                g['pid'] = info['pid']
+            if info['create_time'] < g['create_time']:
+                g['create_time'] = info['create_time']
+
+            read = info.get('io_read_bytes')
+            if read is not None:
+                write = info['io_write_bytes']
+                ident = (info['pid'], info['create_time'])
+                new_io[ident] = (read, write)
+                prev = prev_io.get(ident)
+                if prev is not None:
+                    g['io_read_rate'] += max(0, read - prev[0]) * scale
+                    g['io_write_rate'] += max(0, write - prev[1]) * scale
+
+        self._prev_io = new_io
+        self._prev_time = timestamp
+        return list(groups.values())
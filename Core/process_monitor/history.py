@@ -0,0 +1,112 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Số mẫu giữ lại cho mỗi tiến trình (60 mẫu x 1.5s ~ 90 giây lịch sử)
+HISTORY_SAMPLES = 60
+# Số mẫu CPU vẽ thành sparkline trong bảng
+SPARKLINE_WIDTH = 8
+SPARK_CHARS = " ▁▂▃▄▅▆▇█"
+
+
+class ProcessSeries:
+    """
+    Lịch sử của một tiến trình trong các mảng cố định (array('f')), ghi vòng theo seq
+    của snapshot. Bộ nhớ cố định: 2 * size * 4 byte cho dữ liệu + vài trường I/O.
+    """
+    __slots__ = ('first_seq', 'cpu', 'rss',
+                 'io_read', 'io_write', 'io_time', 'io_read_rate', 'io_write_rate')
+
+    def __init__(self, first_seq: int, size: int):
+        self.first_seq = first_seq
+        self.cpu = array('f', bytes(4 * size))
+        self.rss = array('f', bytes(4 * size))
+        # Lần đọc I/O gần nhất (chỉ có khi dòng được hiển thị) và tốc độ tính từ đó
+        self.io_read = self.io_write = -1
+        self.io_time = 0.0
+        self.io_read_rate = self.io_write_rate = 0.0
+
+
+class ProcessHistory:
+    """
+    Ring buffer theo (pid, create_time) cho %CPU và RSS, ghi từ luồng sampler.
+    Tiến trình không còn trong snapshot bị loại ngay ở lần ghi kế tiếp.
+    """
+
+    def __init__(self, size: int = HISTORY_SAMPLES):
+        self.size = size
+        self.timestamps = array('d', bytes(8 * size))
+        self.seq = 0
+        self._series: Dict[Tuple[int, float], ProcessSeries] = {}
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def record(self, seq: int, timestamp: float, processes: Iterable[dict]):
+        slot = seq % self.size
+        self.timestamps[slot] = timestamp
+        old = self._series
+        series = {}
+        for info in processes:
+            key = (info['pid'], info['create_time'])
+            s = old.get(key)
+            if s is None:
+                s = ProcessSeries(seq, self.size)
+            s.cpu[slot] = info['cpu_percent']
+            s.rss[slot] = info['rss']
+            series[key] = s
+        # Thay cả dict một lần: luồng giao diện luôn thấy một bản nhất quán
+        self._series = series
+        self.seq = seq
+
+    def get(self, pid: int, create_time: float) -> Optional[ProcessSeries]:
+        return self._series.get((pid, create_time))
+
+    def _slots(self, s: ProcessSeries, count: int) -> List[int]:
+        """Các slot của count mẫu gần nhất, cũ trước mới sau."""
+        available = min(self.size, self.seq - s.first_seq + 1, count)
+        return [(self.seq - i) % self.size for i in range(available - 1, -1, -1)]
+
+    def cpu_values(self, s: ProcessSeries, count: int = SPARKLINE_WIDTH) -> List[float]:
+        return [s.cpu[slot] for slot in self._slots(s, count)]
+
+    def rss_rate(self, s: ProcessSeries) -> float:
+        """Tốc độ tăng RSS (byte/giây) trên toàn bộ cửa sổ lịch sử."""
+        slots = self._slots(s, self.size)
+        if len(slots) < 2:
+            return 0.0
+        first, last = slots[0], slots[-1]
+        elapsed = self.timestamps[last] - self.timestamps[first]
+        return (s.rss[last] - s.rss[first]) / elapsed if elapsed > 0 else 0.0
+
+    def annotate(self, rows: Iterable[dict], timestamp: float) -> List[dict]:
+        """
+        Thêm io_read_rate/io_write_rate, rss_rate và cpu_history vào các dòng đã có chi tiết
+        (gọi từ luồng giao diện). Tốc độ I/O tính giữa hai lần đọc I/O liên tiếp của dòng đó.
+        """
+        result = []
+        for info in rows:
+            s = self.get(info['pid'], info['create_time'])
+            if s is None:
+                result.append({**info, 'io_read_rate': 0.0, 'io_write_rate': 0.0,
+                               'rss_rate': 0.0, 'cpu_history': ()})
+                continue
+            read, write = info['io_read_bytes'], info['io_write_bytes']
+            if timestamp > s.io_time:
+                if s.io_read >= 0:
+                    elapsed = timestamp - s.io_time
+                    s.io_read_rate = max(0, read - s.io_read) / elapsed
+                    s.io_write_rate = max(0, write - s.io_write) / elapsed
+                s.io_read, s.io_write, s.io_time = read, write, timestamp
+            result.append({**info,
+                           'io_read_rate': s.io_read_rate,
+                           'io_write_rate': s.io_write_rate,
+                           'rss_rate': self.rss_rate(s),
+                           'cpu_history': self.cpu_values(s)})
+        return result
+
+
+def sparkline(values: Sequence[float], width: int = SPARKLINE_WIDTH, scale: float = 100.0) -> str:
+    """Sparkline căn phải, mỗi ký tự một mẫu; giá trị vượt scale bị cắt."""
+    top = len(SPARK_CHARS) - 1
+    chars = [SPARK_CHARS[min(top, int(v * top / scale + 0.5))] for v in values[-width:]]
+    return "".join(chars).rjust(width)
@@ -1,17 +1,32 @@
 import subprocess
 import os
 import signal
+import select
+import selectors
 import sys
+import threading
 import psutil
+from collections import OrderedDict, deque
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from . import log
-from .utils import get_process_status
+from .utils import get_process_status, get_group_usage, format_bytes
 
+# pidfd_open có từ Linux 5.3 / Python 3.9. Nếu không có, job được poll() khi nhận SIGCHLD.
+HAS_PIDFD = hasattr(os, "pidfd_open")
+
+# Số job nền chạy đồng thời tối đa; job vượt quá sẽ xếp hàng chờ
+DEFAULT_MAX_CONCURRENT = os.cpu_count() or 1
+# Số exit status của job đã xong được giữ lại cho 'wait'
+EXIT_STATUS_HISTORY = 1024
+EXIT_NOT_FOUND = 127
+# Luồng khởi chạy job xếp hàng tự kiểm tra lại sau chừng này giây dù không có tín hiệu nào
+REAPER_POLL_INTERVAL = 1.0
 
 
 class JobStatus(Enum):
+    QUEUED = "Queued"
     RUNNING = "Running"
     STOPPED = "Stopped"
     DONE = "Done"
@@ -20,34 +35,84 @@ class JobStatus(Enum):
 
 class Job:
 
-    def __init__(self, jid: int, process: subprocess.Popen, command: str):
+    def __init__(self, jid: int, command: str, nice: int = 0):
         self.jid = jid
-        self.process = process
-        self.pid = process.pid
-        self.pgid = os.getpgid(self.pid)
         self.command = command
+        self.nice = nice
+        self.status = JobStatus.QUEUED
+        self.processes: List[subprocess.Popen] = []
+        self.process: Optional[subprocess.Popen] = None
+        self.pid: Optional[int] = None
+        self.pgid: Optional[int] = None
+        self.pidfds: Dict[int, int] = {}
+        self.launch: Optional[Callable[[int], Optional[List[subprocess.Popen]]]] = None
+        # Job do một luồng trong shell điều khiển (vd. 'parallel ... &'), không có tiến trình riêng
+        self.runner = None
+
+    def attach(self, processes: List[subprocess.Popen]):
+        """Gắn các tiến trình đã khởi chạy (mọi stage của pipeline) vào job."""
+        self.processes = processes
+        self.process = processes[-1]
+        self.pid = self.process.pid
+        # Mọi stage của pipeline nằm chung một process group, leader là stage đầu tiên
+        self.pgid = processes[0].pid
         self.status = JobStatus.RUNNING
 
     def __str__(self):
-        return f"[{self.jid}]\t{self.pid}\t{self.status.value}\t{self.command}"
+        return f"[{self.jid}]\t{self.pid or '-'}\t{self.status.value}\t{self.command}"
+
+    def format_line(self) -> str:
+        """Dòng hiển thị cho 'jobs': CPU/RSS cộng dồn của cả pipeline và exit status từng stage."""
+        if self.runner is not None:
+            return f"[{self.jid}]\t-\t{self.status.value}\t{self.runner.progress()}\t{self.command}"
+        if not self.processes:
+            return str(self)
+        cpu_time, rss = get_group_usage(p.pid for p in self.processes if p.returncode is None)
+        line = f"[{self.jid}]\t{self.pid}\t{self.status.value}\tCPU {cpu_time:.2f}s\tRSS {format_bytes(rss)}\t{self.command}"
+        if len(self.processes) > 1:
+            stages = " | ".join("-" if rc is None else str(rc) for rc in self.stage_statuses())
+            line += f"\t(exit: {stages})"
+        return line
+
+    def stage_statuses(self) -> List[Optional[int]]:
+        return [p.returncode for p in self.processes]
+
+    def exit_status(self) -> int:
+        """Exit status kiểu shell của stage cuối (127 nếu job không khởi chạy được)."""
+        if self.runner is not None:
+            return self.runner.exit_status
+        if self.process is None or self.process.returncode is None:
+            return EXIT_NOT_FOUND
+        rc = self.process.returncode
+        return 128 - rc if rc < 0 else rc
 
     def update_status(self):
-        if self.status in [JobStatus.DONE, JobStatus.TERMINATED]:
+        if self.status in [JobStatus.QUEUED, JobStatus.DONE, JobStatus.TERMINATED]:
             return
 
-        return_code = self.process.poll()
+        live = [p for p in self.processes if p.poll() is None]
 
-        if return_code is None:
-            real_status = get_process_status(self.pid)
-            if real_status == "Stopped":
+        if live:
+            if any(get_process_status(p.pid) == "Stopped" for p in live):
                 self.status = JobStatus.STOPPED
             else:
                 self.status = JobStatus.RUNNING
         else:
-            if return_code == 0:
-                self.status = JobStatus.DONE
-            else:
-                self.status = JobStatus.TERMINATED
+            self._set_finished()
+
+    def handle_exit(self, process: Optional[subprocess.Popen] = None):
+        """Gọi khi pidfd báo tiến trình đã kết thúc: thu hồi bằng poll(), không dùng psutil."""
+        for p in ([process] if process else self.processes):
+            p.poll()
+        if all(p.returncode is not None for p in self.processes):
+            self._set_finished()
+
+    def _set_finished(self):
+        # Giống shell: trạng thái của pipeline là trạng thái của stage cuối
+        if self.process.returncode == 0:
+            self.status = JobStatus.DONE
+        else:
+            self.status = JobStatus.TERMINATED
 
 
 class JobManager:
@@ -56,47 +121,285 @@ class JobManager:
         self.jobs: Dict[int, Job] = {}
         self.next_jid = 1
         self.shell_pgid = os.getpgrp()
+        self._pid_to_job: Dict[int, Job] = {}
+        self._polled_jobs: Dict[int, Job] = {}   # job không có pidfd cho mọi stage
+        self._runner_jobs: Dict[int, Job] = {}
+        self._selector = selectors.DefaultSelector()
+        self._sigchld_pending = False
+        self._sigchld_installed = self._install_sigchld_handler()
+        self.max_concurrent = DEFAULT_MAX_CONCURRENT
+        self.default_nice = 0
+        self._queue: "deque[Job]" = deque()
+        self._active = 0
+        self._exit_statuses: "OrderedDict[int, int]" = OrderedDict()
+        # Luồng reaper và luồng chính cùng đụng tới bảng job
+        self._lock = threading.RLock()
+        self._wakeup_r: Optional[int] = None
+        self._start_reaper()
         log.info(f"Job Manager initialized (PID: {self.shell_pgid}, Platform: Linux/Unix).")
 
-    def register_job(self, process: subprocess.Popen, command: str) -> Optional[Job]:
-        if not process:
+    def _install_sigchld_handler(self) -> bool:
+        try:
+            signal.signal(signal.SIGCHLD, self._on_sigchld)
+            # Không làm gián đoạn các syscall đang chạy (SA_RESTART)
+            signal.siginterrupt(signal.SIGCHLD, False)
+            return True
+        except (ValueError, OSError) as e:
+            log.warning(f"Cannot install SIGCHLD handler, falling back to polling: {e}")
+            return False
+
+    def _on_sigchld(self, signum, frame):
+        # Chỉ đánh dấu; việc thu hồi được làm ở update_all_statuses()
+        self._sigchld_pending = True
+
+    def _start_reaper(self):
+        """
+        Khi shell đứng ở prompt, input() không chạy handler Python của SIGCHLD, nên job xếp hàng
+        sẽ không được khởi chạy tới lệnh kế tiếp. signal.set_wakeup_fd ghi một byte vào pipe ngay
+        trong handler C của tín hiệu; một luồng nền chờ trên pipe đó và khởi chạy job xếp hàng
+        ngay khi job đang chạy kết thúc.
+        """
+        try:
+            r, w = os.pipe()
+            os.set_blocking(r, False)
+            os.set_blocking(w, False)
+            signal.set_wakeup_fd(w, warn_on_full_buffer=False)
+        except (ValueError, OSError) as e:
+            # vd. không ở luồng chính: job xếp hàng chỉ được khởi chạy giữa các lệnh
+            log.debug(f"Cannot install wakeup fd, queued jobs start between commands: {e}")
+            return
+        self._wakeup_r = r
+        threading.Thread(target=self._reap_loop, name="minishell-job-reaper", daemon=True).start()
+
+    def _reap_loop(self):
+        while True:
+            select.select([self._wakeup_r], [], [], REAPER_POLL_INTERVAL)
+            try:
+                while os.read(self._wakeup_r, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+            # Không có job xếp hàng thì để việc thu hồi cho luồng chính như trước
+            if self._queue:
+                self.update_all_statuses(stop_events=False)
+
+    def submit(self, command: str, launch: Callable[[int], Optional[List[subprocess.Popen]]],
+               nice: Optional[int] = None) -> Job:
+        """
+        Đưa một job nền vào hàng đợi. launch(jid) khởi chạy pipeline và trả về list Popen
+        (hoặc None nếu lỗi); nó được gọi ngay nếu còn slot, ngược lại khi một job khác kết thúc.
+        """
+        with self._lock:
+            jid = self.next_jid
+            self.next_jid += 1
+
+            job = Job(jid, command, self.default_nice if nice is None else nice)
+            job.launch = launch
+            self.jobs[jid] = job
+            self._queue.append(job)
+            log.info(f"Queued new job: {job}")
+
+            self._start_queued()
+            return job
+
+    def register_job(self, processes: List[subprocess.Popen], command: str) -> Optional[Job]:
+        """Đăng ký các tiến trình đã chạy sẵn làm job (không qua hàng đợi)."""
+        if not processes:
             return None
 
-        jid = self.next_jid
-        self.next_jid += 1
+        with self._lock:
+            jid = self.next_jid
+            self.next_jid += 1
 
-        job = Job(jid, process, command)
-        self.jobs[jid] = job
+            job = Job(jid, command)
+            self.jobs[jid] = job
+            job.attach(processes)
+            self._watch(job)
+            self._active += 1
 
-        log.info(f"Registered new job: {job}")
-        return job
+            log.info(f"Registered new job: {job}")
+            return job
 
-    def _cleanup_finished_jobs(self):
-        finished_jids = [
-            jid for jid, job in self.jobs.items()
-            if job.status in (JobStatus.DONE, JobStatus.TERMINATED)
-        ]
+    def register_runner(self, command: str, runner) -> Job:
+        """
+        Đăng ký job do một luồng trong shell điều khiển. runner cần có progress(),
+        send_signal(sig), các thuộc tính finished và exit_status.
+        """
+        with self._lock:
+            jid = self.next_jid
+            self.next_jid += 1
+
+            job = Job(jid, command)
+            job.runner = runner
+            job.status = JobStatus.RUNNING
+            self.jobs[jid] = job
+            self._runner_jobs[jid] = job
+
+            log.info(f"Registered runner job: {job}")
+            return job
 
-        for jid in finished_jids:
-            log.info(f"Cleaning up finished job [{jid}].")
-            del self.jobs[jid]
+    def _watch(self, job: Job):
+        for p in job.processes:
+            self._pid_to_job[p.pid] = job
+            if not HAS_PIDFD:
+                continue
+            try:
+                pidfd = os.pidfd_open(p.pid)
+            except OSError as e:
+                log.debug(f"pidfd_open failed for PID {p.pid}: {e}")
+                continue
+            job.pidfds[p.pid] = pidfd
+            self._selector.register(pidfd, selectors.EVENT_READ, (job, p))
+
+        if len(job.pidfds) < len(job.processes):
+            self._polled_jobs[job.jid] = job
+
+    def _start(self, job: Job):
+        try:
+            processes = job.launch(job.jid)
+        except Exception as e:
+            print(f"minishell: [{job.jid}] {e}", file=sys.stderr)
+            processes = None
+        job.launch = None
 
-    def update_all_statuses(self):
-        if not self.jobs:
+        if not processes:
+            log.error(f"Failed to start job [{job.jid}]: {job.command}")
+            job.status = JobStatus.TERMINATED
+            self._cleanup_finished_jobs([job])
             return
 
-        log.debug("Updating all job statuses...")
-        for job in self.jobs.values():
-            job.update_status()
+        job.attach(processes)
+        self._watch(job)
+        self._active += 1
 
-        self._cleanup_finished_jobs()
+        if job.nice:
+            try:
+                # Một lời gọi cho cả process group của pipeline
+                os.setpriority(os.PRIO_PGRP, job.pgid, job.nice)
+            except OSError as e:
+                log.warning(f"Cannot set nice {job.nice} for job [{job.jid}]: {e}")
+
+        log.info(f"Started job: {job}")
+
+    def _start_queued(self):
+        while self._queue and self._active < self.max_concurrent:
+            self._start(self._queue.popleft())
+
+    def set_max_concurrent(self, limit: int):
+        with self._lock:
+            self.max_concurrent = max(1, limit)
+            self._start_queued()
+
+    def queued_count(self) -> int:
+        return len(self._queue)
+
+    def _cleanup_finished_jobs(self, candidates: Optional[List[Job]] = None):
+        if candidates is None:
+            candidates = list(self.jobs.values())
+        finished_jids = {
+            job.jid for job in candidates
+            if job.status in (JobStatus.DONE, JobStatus.TERMINATED) and job.jid in self.jobs
+        }
+
+        for jid in finished_jids:
+            log.info(f"Cleaning up finished job [{jid}].")
+            job = self.jobs.pop(jid)
+            self._polled_jobs.pop(jid, None)
+            self._runner_jobs.pop(jid, None)
+            if job.processes:
+                self._active -= 1
+            self._exit_statuses[jid] = job.exit_status()
+            while len(self._exit_statuses) > EXIT_STATUS_HISTORY:
+                self._exit_statuses.popitem(last=False)
+            for p in job.processes:
+                self._pid_to_job.pop(p.pid, None)
+            for pid in list(job.pidfds):
+                self._close_pidfd(job, pid)
+
+    def _close_pidfd(self, job: Job, pid: int):
+        pidfd = job.pidfds.pop(pid)
+        self._selector.unregister(pidfd)
+        os.close(pidfd)
+
+    def _drain_stop_events(self):
+        """Đọc các sự kiện stop/continue đang chờ (không thu hồi tiến trình đã thoát)."""
+        while True:
+            try:
+                info = os.waitid(os.P_ALL, 0, os.WSTOPPED | os.WCONTINUED | os.WNOHANG)
+            except ChildProcessError:
+                return
+            if info is None:
+                return
+            job = self._pid_to_job.get(info.si_pid)
+            if job is None:
+                continue
+            if info.si_code == os.CLD_CONTINUED:
+                job.status = JobStatus.RUNNING
+            else:
+                job.status = JobStatus.STOPPED
+
+    def update_all_statuses(self, timeout: float = 0, stop_events: bool = True):
+        """
+        Cập nhật theo sự kiện: chi phí O(số sự kiện), không phải O(số job).
+        timeout > 0 thì chờ tối đa chừng đó giây cho sự kiện đầu tiên (dùng cho 'wait').
+        stop_events=False (luồng reaper) chỉ thu hồi job đã thoát, không đọc sự kiện stop/continue.
+        """
+        with self._lock:
+            if not self.jobs:
+                return
+
+            touched = []
+            # Tiến trình đã thoát: pidfd của nó sẵn sàng để đọc
+            for key, _ in self._selector.select(timeout=timeout):
+                job, process = key.data
+                job.handle_exit(process)
+                if process.returncode is not None:
+                    self._close_pidfd(job, process.pid)
+                touched.append(job)
+
+            if not stop_events or self._sigchld_pending or not self._sigchld_installed:
+                if stop_events:
+                    self._sigchld_pending = False
+                    self._drain_stop_events()
+                for job in self._polled_jobs.values():
+                    job.handle_exit()
+                    touched.append(job)
+
+            for job in self._runner_jobs.values():
+                if job.runner.finished:
+                    job.status = JobStatus.DONE if job.runner.exit_status == 0 else JobStatus.TERMINATED
+                    touched.append(job)
+
+            if touched:
+                self._cleanup_finished_jobs(touched)
+            # Job kết thúc giải phóng slot cho job đang xếp hàng
+            self._start_queued()
+
+    def wait_for_jobs(self, jids: Optional[List[int]] = None, any_job: bool = False) -> int:
+        """
+        Chờ các job (mặc định: tất cả) kết thúc; any_job=True là 'wait -n'.
+        Trả về exit status của job cuối cùng kết thúc.
+        """
+        targets = set(jids) if jids else set(self.jobs)
+        status = 0
+        while targets:
+            finished = [jid for jid in targets if jid not in self.jobs]
+            for jid in finished:
+                status = self._exit_statuses.get(jid, EXIT_NOT_FOUND)
+                targets.discard(jid)
+            if finished and any_job:
+                break
+            if targets:
+                self.update_all_statuses(timeout=0.5)
+        return status
 
     def list_jobs(self) -> List[str]:
-        self.update_all_statuses()
-        if not self.jobs:
-            return ["No active jobs."]
+        with self._lock:
+            self.update_all_statuses()
+            if not self.jobs:
+                return ["No active jobs."]
 
-        return [str(job) for job in self.jobs.values()]
+            return [job.format_line() for job in self.jobs.values()]
 
     def get_job_by_id(self, jid_str: str) -> Optional[Job]:
         try:
@@ -110,6 +413,10 @@ class JobManager:
             return None
 
     def send_signal_to_job(self, jid_str: str, signal_type: int) -> str:
+        with self._lock:
+            return self._send_signal_to_job(jid_str, signal_type)
+
+    def _send_signal_to_job(self, jid_str: str, signal_type: int) -> str:
         job = self.get_job_by_id(jid_str)
         if not job:
             return f"Job not found: {jid_str}"
@@ -117,6 +424,19 @@ class JobManager:
         if job.status in (JobStatus.DONE, JobStatus.TERMINATED):
             return f"Job {jid_str} is already finished."
 
+        if job.status == JobStatus.QUEUED:
+            if signal_type in (signal.SIGTERM, signal.SIGKILL, signal.SIGINT):
+                self._queue.remove(job)
+                job.status = JobStatus.TERMINATED
+                self._cleanup_finished_jobs([job])
+                return f"Removed queued job {job.jid}."
+            return f"Job {job.jid} is queued."
+
+        if job.runner is not None:
+            job.runner.send_signal(signal_type)
+            log.info(f"Sent signal {signal_type} to runner job [{job.jid}]")
+            return f"Sent signal {signal_type} to job {job.jid}."
+
         try:
             os.killpg(job.pgid, signal_type)
 
@@ -133,13 +453,30 @@ class JobManager:
             return f"Error sending signal: {e}"
 
     def bring_to_foreground(self, jid_str: str) -> str:
+        # Giữ khoá suốt lúc chờ: waitpid ở đây và poll() của luồng reaper không được tranh nhau thu hồi
+        with self._lock:
+            return self._bring_to_foreground(jid_str)
+
+    def _bring_to_foreground(self, jid_str: str) -> str:
         job = self.get_job_by_id(jid_str)
         if not job:
             return f"fg: job not found: {jid_str}"
 
+        if job.status == JobStatus.QUEUED:
+            # fg bỏ qua giới hạn của hàng đợi
+            self._queue.remove(job)
+            self._start(job)
+            if not job.processes:
+                return f"fg: job {job.jid} failed to start"
+
         if job.status == JobStatus.STOPPED:
             self.send_signal_to_job(jid_str, signal.SIGCONT)
 
+        if job.runner is not None:
+            # Không có process group riêng để giao terminal: chỉ chờ luồng kết thúc
+            self.wait_for_jobs([job.jid])
+            return ""
+
         try:
             # Giao quyền kiểm soát terminal
             os.tcsetpgrp(sys.stdin.fileno(), job.pgid)
@@ -147,9 +484,17 @@ class JobManager:
             log.error(f"Failed to set terminal control: {e}")
             return f"Error: {e}"
 
+        pending = {p.pid: p for p in job.processes if p.returncode is None}
         try:
-            # Chờ đợi, WUNTRACED là để bắt cả tín hiệu STOP (Ctrl+Z)
-            _, status = os.waitpid(job.pid, os.WUNTRACED)
+            # Chờ mọi stage trong process group, WUNTRACED là để bắt cả tín hiệu STOP (Ctrl+Z)
+            while pending:
+                pid, status = os.waitpid(-job.pgid, os.WUNTRACED)
+                if os.WIFSTOPPED(status):
+                    break
+                process = pending.pop(pid, None)
+                if process is not None:
+                    # Đã thu hồi ở đây nên ghi lại mã thoát cho Popen
+                    process.returncode = os.waitstatus_to_exitcode(status)
         except ChildProcessError:
             pass  # Tiến trình đã kết thúc
 
@@ -0,0 +1,222 @@
+import os
+import pwd
+import time
+from typing import Dict, Optional, Tuple
+
+from . import log
+
+# Kích thước buffer đọc dùng lại cho mọi file /proc/<pid>/* (stat, io đều < 1 KiB)
+READ_BUFFER_SIZE = 4096
+
+_STATUS_MAP = {
+    'R': 'running',
+    'S': 'sleeping',
+    'D': 'disk-sleep',
+    'T': 'stopped',
+    't': 'tracing-stop',
+    'Z': 'zombie',
+    'X': 'dead',
+    'x': 'dead',
+    'K': 'wake-kill',
+    'W': 'waking',
+    'P': 'parked',
+    'I': 'idle',
+}
+
+
+def procfs_available(proc_root: str = "/proc") -> bool:
+    return os.path.exists(os.path.join(proc_root, "self", "stat"))
+
+
+def parse_cgroup(data: bytes) -> str:
+    """Đường dẫn cgroup từ nội dung /proc/<pid>/cgroup: ưu tiên cgroup v2 ('0::'), rồi name=systemd."""
+    fallback = ""
+    for line in data.split(b"\n"):
+        if line.startswith(b"0::"):
+            return line[3:].decode(errors="replace")
+        parts = line.split(b":", 2)
+        if len(parts) == 3 and (parts[1] == b"name=systemd" or not fallback):
+            fallback = parts[2].decode(errors="replace")
+    return fallback
+
+
+def read_cgroup(pid: int, proc_root: str = "/proc") -> str:
+    try:
+        with open(f"{proc_root}/{pid}/cgroup", "rb") as f:
+            return parse_cgroup(f.read())
+    except OSError:
+        return ""
+
+
+class ProcfsCollector:
+    """
+    Bộ thu thập nhanh cho Linux: quét /proc bằng os.scandir và đọc bằng os.open/os.readv
+    vào buffer dùng lại. collect() chỉ đọc stat (RSS, ppid, số thread đều nằm trong stat);
+    details() đọc thêm uid và io cho các dòng đang hiển thị. Cùng schema với PsutilCollector.
+    Khi extended bật (chế độ gộp nhóm), collect() đọc thêm uid, io và cgroup cho mọi tiến trình.
+    """
+
+    def __init__(self, proc_root: str = "/proc"):
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.mem_total = self._read_mem_total()
+        self.boot_time = self._read_boot_time()
+        # Buffer riêng cho luồng sampler (collect) và luồng giao diện (details)
+        self._buf = bytearray(READ_BUFFER_SIZE)
+        self._detail_buf = bytearray(READ_BUFFER_SIZE)
+        self._usernames: Dict[int, str] = {}
+        # pid -> (starttime, tổng jiffies) của lần thu thập trước, để tính %CPU theo delta
+        self._prev_ticks: Dict[int, Tuple[int, int]] = {}
+        self._prev_time: Optional[float] = None
+        self.extended = False
+
+    def _read_mem_total(self) -> int:
+        with open(os.path.join(self.proc_root, "meminfo"), "rb") as f:
+            for line in f:
+                if line.startswith(b"MemTotal:"):
+                    return int(line.split()[1]) * 1024
+        return 1
+
+    def _read_boot_time(self) -> float:
+        with open(os.path.join(self.proc_root, "stat"), "rb") as f:
+            for line in f:
+                if line.startswith(b"btime"):
+                    return float(line.split()[1])
+        return 0.0
+
+    @staticmethod
+    def _read(path: str, buf: bytearray) -> Optional[bytes]:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            n = os.readv(fd, [buf])
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        return bytes(buf[:n])
+
+    def _username(self, uid: int) -> str:
+        name = self._usernames.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self._usernames[uid] = name
+        return name
+
+    def _read_io(self, path: str, buf: bytearray) -> Tuple[int, int]:
+        io_read = io_write = 0
+        io = self._read(path + "/io", buf)
+        if io:
+            for line in io.split(b"\n"):
+                if line.startswith(b"read_bytes:"):
+                    io_read = int(line[11:])
+                elif line.startswith(b"write_bytes:"):
+                    io_write = int(line[12:])
+        return io_read, io_write
+
+    def collect(self) -> Tuple[dict, ...]:
+        """Tầng rẻ: một lần đọc stat cho mỗi tiến trình (thêm uid/io/cgroup khi extended)."""
+        extended = self.extended
+        now = time.monotonic()
+        elapsed = (now - self._prev_time) if self._prev_time is not None else 0.0
+        cpu_scale = 100.0 / (elapsed * self.clock_ticks) if elapsed > 0 else 0.0
+        mem_scale = 100.0 / self.mem_total
+        page_size = self.page_size
+        prev_ticks = self._prev_ticks
+        new_ticks: Dict[int, Tuple[int, int]] = {}
+        procs = []
+
+        try:
+            entries = os.scandir(self.proc_root)
+        except OSError as e:
+            log.error(f"Cannot scan {self.proc_root}: {e}")
+            return ()
+
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if not name.isdigit():
+                    continue
+                pid = int(name)
+
+                stat = self._read(entry.path + "/stat", self._buf)
+                if not stat:
+                    continue   # tiến trình vừa kết thúc
+                lpar = stat.find(b"(")
+                rpar = stat.rfind(b")")
+                fields = stat[rpar + 2:].split()
+
+                ticks = int(fields[11]) + int(fields[12])
+                starttime = int(fields[19])
+                new_ticks[pid] = (starttime, ticks)
+                prev = prev_ticks.get(pid)
+                # Chỉ tính delta khi cùng một tiến trình (pid có thể bị tái sử dụng)
+                if prev is not None and prev[0] == starttime:
+                    cpu_percent = (ticks - prev[1]) * cpu_scale
+                else:
+                    cpu_percent = 0.0
+
+                state = fields[0].decode()
+                rss = int(fields[21]) * page_size
+                procs.append({
+                    'pid': pid,
+                    'ppid': int(fields[1]),
+                    'cpu_percent': cpu_percent,
+                    'memory_percent': rss * mem_scale,
+                    'rss': rss,
+                    'name': stat[lpar + 1:rpar].decode(errors="replace"),
+                    'status': _STATUS_MAP.get(state, state),
+                    'num_threads': int(fields[17]),
+                    'create_time': self.boot_time + starttime / self.clock_ticks,
+                })
+                if extended:
+                    info = procs[-1]
+                    try:
+                        info['username'] = self._username(os.stat(entry.path).st_uid)
+                    except OSError:
+                        info['username'] = None
+                    info['io_read_bytes'], info['io_write_bytes'] = self._read_io(entry.path, self._buf)
+                    cgroup = self._read(entry.path + "/cgroup", self._buf)
+                    info['cgroup'] = parse_cgroup(cgroup) if cgroup else ""
+
+        self._prev_ticks = new_ticks
+        self._prev_time = now
+        return tuple(procs)
+
+    def details(self, pid: int, create_time: float) -> Optional[dict]:
+        """Tầng đắt cho một dòng đang hiển thị: uid và I/O (gọi từ luồng giao diện)."""
+        base = f"{self.proc_root}/{pid}"
+        stat = self._read(base + "/stat", self._detail_buf)
+        if not stat:
+            return None
+        fields = stat[stat.rfind(b")") + 2:].split()
+        if self.boot_time + int(fields[19]) / self.clock_ticks != create_time:
+            return None   # pid đã bị tái sử dụng
+        try:
+            uid = os.stat(base).st_uid
+        except OSError:
+            return None
+
+        io_read, io_write = self._read_io(base, self._detail_buf)
+        return {
+            'username': self._username(uid),
+            'io_read_bytes': io_read,
+            'io_write_bytes': io_write,
+        }
+
+
+def make_collector():
+    """Dùng /proc trực tiếp trên Linux, ngược lại quay về psutil."""
+    if procfs_available():
+        try:
+            return ProcfsCollector()
+        except (OSError, ValueError) as e:
+            log.warning(f"procfs collector unavailable, falling back to psutil: {e}")
+    from .sampler import PsutilCollector
+    return PsutilCollector()
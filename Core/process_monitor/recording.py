@@ -0,0 +1,448 @@
+import bisect
+import mmap
+import os
+import struct
+import time
+import zlib
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import log
+from .history import ProcessHistory
+from .sampler import Snapshot, EMPTY_DETAILS
+
+# Định dạng file ghi (FILE) + chỉ mục thời gian (FILE.idx):
+#   FILE     = MAGIC, rồi các frame: FRAME_HEADER(flags, len) + payload (có thể nén zlib)
+#   FILE.idx = các bản ghi INDEX_ENTRY(timestamp, offset trong FILE, số thứ tự keyframe gần nhất)
+# Keyframe chứa toàn bộ bảng tiến trình; frame delta chỉ chứa pid mới/mất và các ô thay đổi.
+MAGIC = b"PMONREC\x02"      # byte cuối là phiên bản định dạng
+FRAME_HEADER = struct.Struct("<BI")
+SNAPSHOT_HEADER = struct.Struct("<dff")      # timestamp, cpu_percent, mem_percent
+INDEX_ENTRY = struct.Struct("<dQI")
+COUNT = struct.Struct("<I")
+FLAG_KEYFRAME = 1
+FLAG_ZLIB = 2
+
+# Cứ chừng này frame lại ghi một keyframe: seek chỉ phải giải mã tối đa ngần ấy frame
+KEYFRAME_INTERVAL = 60
+ZLIB_LEVEL = 6
+# Khi phát lại, khoảng trống giữa hai phiên ghi không bắt người xem chờ quá chừng này (giây)
+MAX_REPLAY_GAP = 2.0
+REPLAY_SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+
+# Các cột được ghi (tầng rẻ của sampler); typecode None là chuỗi.
+# Cột 0 (create_time) cùng pid xác định một tiến trình: đổi create_time = pid bị tái sử dụng.
+COLUMNS = (
+    ('create_time', 'd'),
+    ('cpu_percent', 'f'),
+    ('memory_percent', 'f'),
+    ('rss', 'q'),
+    ('ppid', 'i'),
+    ('num_threads', 'i'),
+    ('status', None),
+    ('name', None),
+)
+
+
+def _check_magic(path: str, header: bytes):
+    if header != MAGIC:
+        if header[:-1] == MAGIC[:-1]:
+            raise ValueError(f"{path}: unsupported recording version {header[-1]}")
+        raise ValueError(f"{path}: not a pmon recording")
+
+
+def _pack_column(typecode: Optional[str], values: List) -> bytes:
+    if typecode is None:
+        data = "\0".join(values).encode()
+        return COUNT.pack(len(data)) + data
+    return array(typecode, values).tobytes()
+
+
+def _unpack_column(buf, pos: int, typecode: Optional[str], n: int) -> Tuple[List, int]:
+    if typecode is None:
+        (size,) = COUNT.unpack_from(buf, pos)
+        pos += COUNT.size
+        values = bytes(buf[pos:pos + size]).decode().split("\0") if n else []
+        return values, pos + size
+    values = array(typecode)
+    size = values.itemsize * n
+    values.frombytes(buf[pos:pos + size])
+    return values.tolist(), pos + size
+
+
+def _pack_pids(pids: List[int]) -> bytes:
+    return COUNT.pack(len(pids)) + array('i', pids).tobytes()
+
+
+def _unpack_pids(buf, pos: int) -> Tuple[List[int], int]:
+    (n,) = COUNT.unpack_from(buf, pos)
+    pos += COUNT.size
+    pids = array('i')
+    pids.frombytes(buf[pos:pos + 4 * n])
+    return pids.tolist(), pos + 4 * n
+
+
+def _pack_rows(state: Dict[int, tuple], pids: List[int]) -> bytes:
+    parts = [_pack_pids(pids)]
+    for c, (_, typecode) in enumerate(COLUMNS):
+        parts.append(_pack_column(typecode, [state[pid][c] for pid in pids]))
+    return b"".join(parts)
+
+
+class SnapshotEncoder:
+    """Mã hoá Snapshot thành payload cột (keyframe) hoặc delta so với snapshot trước."""
+
+    def __init__(self):
+        self._state: Dict[int, tuple] = {}
+
+    def encode(self, snapshot: Snapshot, keyframe: bool) -> bytes:
+        state = {info['pid']: tuple(info[key] for key, _ in COLUMNS) for info in snapshot.processes}
+        parts = [SNAPSHOT_HEADER.pack(snapshot.timestamp, snapshot.cpu_percent, snapshot.mem_percent)]
+        if keyframe:
+            parts.append(_pack_rows(state, list(state)))
+        else:
+            prev = self._state
+            removed = [pid for pid, row in prev.items()
+                       if pid not in state or state[pid][0] != row[0]]
+            added = [pid for pid, row in state.items()
+                     if pid not in prev or prev[pid][0] != row[0]]
+            parts.append(_pack_pids(removed))
+            parts.append(_pack_rows(state, added))
+            kept = [(pid, row, prev[pid]) for pid, row in state.items()
+                    if pid in prev and prev[pid][0] == row[0]]
+            for c, (_, typecode) in enumerate(COLUMNS[1:], 1):
+                changed = [(pid, row[c]) for pid, row, old in kept if row[c] != old[c]]
+                parts.append(_pack_pids([pid for pid, _ in changed]))
+                parts.append(_pack_column(typecode, [value for _, value in changed]))
+        self._state = state
+        return b"".join(parts)
+
+
+class SnapshotDecoder:
+    """Dựng lại bảng tiến trình bằng cách áp lần lượt keyframe rồi các frame delta."""
+
+    def __init__(self):
+        self.state: Dict[int, list] = {}
+        self.header = (0.0, 0.0, 0.0)
+
+    def apply(self, flags: int, payload) -> None:
+        buf = zlib.decompress(payload) if flags & FLAG_ZLIB else payload
+        self.header = SNAPSHOT_HEADER.unpack_from(buf, 0)
+        pos = SNAPSHOT_HEADER.size
+        if flags & FLAG_KEYFRAME:
+            self.state = {}
+        else:
+            removed, pos = _unpack_pids(buf, pos)
+            for pid in removed:
+                self.state.pop(pid, None)
+
+        pids, pos = _unpack_pids(buf, pos)
+        columns = []
+        for _, typecode in COLUMNS:
+            values, pos = _unpack_column(buf, pos, typecode, len(pids))
+            columns.append(values)
+        for i, pid in enumerate(pids):
+            self.state[pid] = [col[i] for col in columns]
+
+        if not flags & FLAG_KEYFRAME:
+            for c, (_, typecode) in enumerate(COLUMNS[1:], 1):
+                changed, pos = _unpack_pids(buf, pos)
+                values, pos = _unpack_column(buf, pos, typecode, len(changed))
+                for pid, value in zip(changed, values):
+                    self.state[pid][c] = value
+
+    def processes(self) -> Tuple[dict, ...]:
+        keys = [key for key, _ in COLUMNS]
+        return tuple({'pid': pid, **dict(zip(keys, row))} for pid, row in self.state.items())
+
+
+def _index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def build_index(data) -> bytes:
+    """Dựng lại chỉ mục bằng cách quét các frame (khi FILE.idx bị mất); bỏ qua frame ghi dở."""
+    entries = bytearray()
+    pos, frame, key_index = len(MAGIC), 0, 0
+    while pos + FRAME_HEADER.size <= len(data):
+        flags, length = FRAME_HEADER.unpack_from(data, pos)
+        end = pos + FRAME_HEADER.size + length
+        if end > len(data):
+            break
+        payload = data[pos + FRAME_HEADER.size:end]
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        if flags & FLAG_KEYFRAME:
+            key_index = frame
+        entries += INDEX_ENTRY.pack(SNAPSHOT_HEADER.unpack_from(payload, 0)[0], pos, key_index)
+        pos, frame = end, frame + 1
+    return bytes(entries)
+
+
+class RecordingWriter:
+    """
+    Ghi nối tiếp snapshot vào FILE và chỉ mục vào FILE.idx. Nếu FILE đã tồn tại thì
+    ghi tiếp sau frame cuối cùng đã có chỉ mục (phần dở dang do bị ngắt sẽ bị cắt bỏ).
+    """
+
+    def __init__(self, path: str, compress: bool = True, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.path = path
+        self.compress = compress
+        self.keyframe_interval = keyframe_interval
+        self._encoder = SnapshotEncoder()
+        self._key_index: Optional[int] = None   # frame đầu tiên của phiên ghi luôn là keyframe
+
+        index_path = _index_path(path)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._data = open(path, "w+b")
+            self._data.write(MAGIC)
+            open(index_path, "wb").close()
+            self.frames = 0
+        else:
+            self._data = open(path, "r+b")
+            header = self._data.read(len(MAGIC))
+            if header != MAGIC:
+                self._data.close()
+                _check_magic(path, header)
+            self.frames, end = self._recover(index_path)
+            self._data.truncate(end)
+        self._index = open(index_path, "ab")
+
+    def _recover(self, index_path: str) -> Tuple[int, int]:
+        """Số frame hợp lệ và vị trí kết thúc của frame cuối (theo chỉ mục)."""
+        if os.path.exists(index_path):
+            with open(index_path, "r+b") as f:
+                index = f.read()
+                frames = len(index) // INDEX_ENTRY.size
+                f.truncate(frames * INDEX_ENTRY.size)
+        else:
+            with mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                index = build_index(data)
+            with open(index_path, "wb") as f:
+                f.write(index)
+            frames = len(index) // INDEX_ENTRY.size
+        if not frames:
+            return 0, len(MAGIC)
+        _, offset, _ = INDEX_ENTRY.unpack_from(index, (frames - 1) * INDEX_ENTRY.size)
+        self._data.seek(offset)
+        _, length = FRAME_HEADER.unpack(self._data.read(FRAME_HEADER.size))
+        return frames, offset + FRAME_HEADER.size + length
+
+    def write(self, snapshot: Snapshot) -> int:
+        """Ghi một snapshot, trả về số byte đã ghi vào FILE."""
+        keyframe = self._key_index is None or self.frames - self._key_index >= self.keyframe_interval
+        payload = self._encoder.encode(snapshot, keyframe)
+        flags = FLAG_KEYFRAME if keyframe else 0
+        if self.compress:
+            compressed = zlib.compress(payload, ZLIB_LEVEL)
+            if len(compressed) < len(payload):
+                payload = compressed
+                flags |= FLAG_ZLIB
+        if keyframe:
+            self._key_index = self.frames
+
+        offset = self._data.seek(0, os.SEEK_END)
+        self._data.write(FRAME_HEADER.pack(flags, len(payload)))
+        self._data.write(payload)
+        self._data.flush()
+        # Chỉ mục ghi sau dữ liệu: không bao giờ trỏ tới frame chưa ghi xong
+        self._index.write(INDEX_ENTRY.pack(snapshot.timestamp, offset, self._key_index))
+        self._index.flush()
+        self.frames += 1
+        return FRAME_HEADER.size + len(payload)
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+
+class _Timestamps:
+    """Dãy timestamp đọc thẳng từ chỉ mục mmap, để bisect không phải nạp cả chỉ mục."""
+
+    def __init__(self, reader: "RecordingReader"):
+        self._reader = reader
+
+    def __len__(self) -> int:
+        return self._reader.frame_count
+
+    def __getitem__(self, i: int) -> float:
+        return self._reader.entry(i)[0]
+
+
+class RecordingReader:
+    """
+    Đọc bản ghi qua mmap. Tìm frame theo thời gian là bisect trên chỉ mục (O(log n));
+    dựng một frame chỉ cần giải mã từ keyframe gần nhất trước nó.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size < len(MAGIC):
+            self._file.close()
+            raise ValueError(f"{path}: empty recording")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._data[:len(MAGIC)]
+        if header != MAGIC:
+            self._data.close()
+            self._file.close()
+            _check_magic(path, header)
+
+        self._index_file = None
+        index_path = _index_path(path)
+        if os.path.exists(index_path) and os.path.getsize(index_path) >= INDEX_ENTRY.size:
+            self._index_file = open(index_path, "rb")
+            self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            log.warning(f"{index_path} missing, rebuilding index in memory")
+            self._index = build_index(self._data)
+        self.frame_count = len(self._index) // INDEX_ENTRY.size
+        self._decoder = SnapshotDecoder()
+        self._position: Optional[int] = None
+
+    def entry(self, i: int) -> Tuple[float, int, int]:
+        return INDEX_ENTRY.unpack_from(self._index, i * INDEX_ENTRY.size)
+
+    def timestamp(self, i: int) -> float:
+        return self.entry(i)[0]
+
+    def find(self, timestamp: float) -> int:
+        """Frame cuối cùng có timestamp <= timestamp (hoặc frame đầu)."""
+        i = bisect.bisect_right(_Timestamps(self), timestamp) - 1
+        return min(max(i, 0), self.frame_count - 1)
+
+    def _apply(self, i: int):
+        _, offset, _ = self.entry(i)
+        flags, length = FRAME_HEADER.unpack_from(self._data, offset)
+        start = offset + FRAME_HEADER.size
+        with memoryview(self._data) as mv:
+            payload = mv[start:start + length]
+            try:
+                self._decoder.apply(flags, payload)
+            finally:
+                payload.release()
+
+    def snapshot(self, i: int, seq: int = 0) -> Snapshot:
+        _, _, key_index = self.entry(i)
+        pos = self._position
+        if pos is not None and key_index <= pos <= i:
+            start = pos + 1          # tiến tiếp từ frame đang giữ (hoặc giữ nguyên)
+        else:
+            start = key_index        # lùi về keyframe gần nhất
+        for j in range(start, i + 1):
+            self._apply(j)
+        self._position = i
+        timestamp, cpu_percent, mem_percent = self._decoder.header
+        return Snapshot(seq, timestamp, cpu_percent, mem_percent, self._decoder.processes(), 0.0)
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+        if self._index_file is not None:
+            self._index.close()
+            self._index_file.close()
+
+
+def parse_goto(text: str, reference: float) -> float:
+    """'HH:MM', 'HH:MM:SS' (cùng ngày với reference) hoặc 'YYYY-MM-DD HH:MM[:SS]' -> timestamp."""
+    text = text.strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            t = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        day = datetime.fromtimestamp(reference)
+        return day.replace(hour=t.hour, minute=t.minute, second=t.second, microsecond=0).timestamp()
+    raise ValueError(f"invalid time: {text}")
+
+
+class ReplaySource:
+    """
+    Nguồn snapshot cho TUI khi phát lại (thay cho ProcessSampler): cùng giao diện
+    latest()/enrich()/start()/stop(), thêm điều khiển tạm dừng, tốc độ và seek.
+    """
+
+    replay = True
+
+    def __init__(self, reader: RecordingReader, interval: float = 1.5):
+        self.reader = reader
+        self.interval = interval
+        self.playing = True
+        self.speed = 1.0
+        self.position = 0
+        self.history = ProcessHistory()
+        self._seq = 0
+        self._snapshot: Optional[Snapshot] = None
+        self._next_advance = 0.0
+
+    def start(self):
+        self._show(0)
+
+    def stop(self):
+        self.reader.close()
+
+    def _show(self, index: int):
+        index = min(max(index, 0), self.reader.frame_count - 1)
+        if index != self.position + 1 or self._snapshot is None:
+            # Nhảy cóc: lịch sử (sparkline, tốc độ) bắt đầu lại từ frame mới
+            self.history = ProcessHistory()
+        self.position = index
+        self._seq += 1
+        self._snapshot = self.reader.snapshot(index, self._seq)
+        self.history.record(self._seq, self._snapshot.timestamp, self._snapshot.processes)
+        self._schedule_next()
+
+    def _schedule_next(self):
+        if self.position + 1 >= self.reader.frame_count:
+            return
+        gap = self.reader.timestamp(self.position + 1) - self.reader.timestamp(self.position)
+        self._next_advance = time.monotonic() + min(max(gap, 0.0) / self.speed, MAX_REPLAY_GAP)
+
+    def latest(self) -> Optional[Snapshot]:
+        if (self.playing and self.position + 1 < self.reader.frame_count
+                and time.monotonic() >= self._next_advance):
+            self._show(self.position + 1)
+        return self._snapshot
+
+    def enrich(self, rows: Iterable[dict], snapshot: Snapshot) -> List[dict]:
+        # Bản ghi chỉ chứa tầng rẻ: USER và I/O không có khi phát lại
+        rows = [{**info, **EMPTY_DETAILS} for info in rows]
+        return self.history.annotate(rows, snapshot.timestamp)
+
+    def request_refresh(self):
+        pass
+
+    def set_extended(self, enabled: bool):
+        pass   # bản ghi không có USER/I/O/cgroup: gộp nhóm theo user/cgroup chỉ ra một nhóm
+
+    def set_system_panel(self, enabled: bool):
+        pass   # bản ghi không lưu số liệu hệ thống; panel báo "không có dữ liệu"
+
+    def toggle_pause(self):
+        self.playing = not self.playing
+        if self.playing:
+            self._schedule_next()
+
+    def change_speed(self, step: int):
+        i = REPLAY_SPEEDS.index(self.speed) if self.speed in REPLAY_SPEEDS else 2
+        self.speed = REPLAY_SPEEDS[min(max(i + step, 0), len(REPLAY_SPEEDS) - 1)]
+        self._schedule_next()
+
+    def seek(self, delta: int):
+        self._show(self.position + delta)
+
+    def seek_time(self, timestamp: float):
+        self._show(self.reader.find(timestamp))
+
+    def status_line(self) -> str:
+        when = datetime.fromtimestamp(self._snapshot.timestamp).strftime("%Y-%m-%d %H:%M:%S") \
+            if self._snapshot else "-"
+        state = "▶" if self.playing else "⏸"
+        return (f"Replay: {when} | frame {self.position + 1}/{self.reader.frame_count} | {state} x{self.speed:g}"
+                f" | space:pause ←/→:seek ,/.:step g:goto +/-:speed")
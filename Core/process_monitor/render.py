@@ -0,0 +1,70 @@
+import curses
+from typing import Dict, List, Tuple
+
+Segment = Tuple[int, str, int]   # (cột, nội dung, attr)
+
+
+class Frame:
+    """Nội dung một khung hình: mỗi dòng là danh sách các đoạn (col, text, attr)."""
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.rows: Dict[int, List[Segment]] = {}
+
+    def add(self, row: int, col: int, text: str, attr: int = 0):
+        # Cắt trước ở cột cuối: curses báo lỗi khi ghi vào ô cuối cùng của màn hình
+        if not 0 <= row < self.height or not 0 <= col < self.width - 1:
+            return
+        self.rows.setdefault(row, []).append((col, text[:self.width - 1 - col], attr))
+
+
+class ScreenRenderer:
+    """
+    Vẽ Frame theo kiểu vi sai: so từng dòng với khung đã vẽ trước đó và chỉ
+    viết lại những dòng thay đổi, rồi noutrefresh/doupdate một lần. Không gọi
+    clear() nên curses không phải vẽ lại toàn màn hình (đỡ nháy, đỡ băng thông SSH).
+    """
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self._drawn: Dict[int, Tuple[Segment, ...]] = {}
+        self._size = None
+        # Thống kê của khung gần nhất
+        self.rows_written = 0
+        self.chars_written = 0
+
+    def invalidate(self):
+        """Gọi sau khi có gì khác vẽ đè lên màn hình (help, hộp thoại)."""
+        self._drawn = {}
+        self._size = None
+
+    def render(self, frame: Frame):
+        stdscr = self.stdscr
+        size = (frame.height, frame.width)
+        if size != self._size:
+            stdscr.erase()
+            self._drawn = {}
+            self._size = size
+
+        rows_written = chars_written = 0
+        new_drawn = {row: tuple(segments) for row, segments in frame.rows.items()}
+        for row in self._drawn.keys() | new_drawn.keys():
+            segments = new_drawn.get(row, ())
+            if self._drawn.get(row) == segments:
+                continue
+            try:
+                stdscr.move(row, 0)
+                stdscr.clrtoeol()
+                for col, text, attr in segments:
+                    stdscr.addstr(row, col, text, attr)
+                    chars_written += len(text)
+            except curses.error:
+                pass
+            rows_written += 1
+
+        self._drawn = new_drawn
+        self.rows_written = rows_written
+        self.chars_written = chars_written
+        stdscr.noutrefresh()
+        curses.doupdate()
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import psutil
+
+from . import log
+from .utils import get_process_summary, get_process_details
+from .history import ProcessHistory
+from .sysstats import SystemSample, make_system_stats
+
+# Số tiến trình tối đa giữ chi tiết (username, I/O) trong cache
+DETAIL_CACHE_SIZE = 512
+
+# Dùng khi tiến trình đã biến mất trước khi kịp lấy chi tiết
+EMPTY_DETAILS = {'username': None, 'io_read_bytes': 0, 'io_write_bytes': 0}
+
+
+class Snapshot(NamedTuple):
+    """Ảnh chụp bất biến của bảng tiến trình; UI chỉ đọc, không sửa."""
+    seq: int
+    timestamp: float
+    cpu_percent: float
+    mem_percent: float
+    processes: Tuple[dict, ...]
+    duration: float          # thời gian thu thập (giây)
+    system: Optional[SystemSample] = None   # chỉ có khi panel hệ thống đang mở
+
+
+def collect_processes(extended: bool = False) -> Tuple[dict, ...]:
+    procs = []
+    for p in psutil.process_iter():
+        info = get_process_summary(p, extended)
+        if info:
+            procs.append(info)
+    return tuple(procs)
+
+
+class PsutilCollector:
+    """Bộ thu thập mặc định (mọi hệ điều hành psutil hỗ trợ)."""
+
+    def __init__(self):
+        self.extended = False
+
+    def collect(self) -> Tuple[dict, ...]:
+        return collect_processes(self.extended)
+
+    def details(self, pid: int, create_time: float) -> Optional[Dict]:
+        return get_process_details(pid, create_time)
+
+
+class DetailCache:
+    """
+    Cache tầng đắt theo (pid, create_time). Mỗi dòng chỉ được lấy lại chi tiết
+    một lần cho mỗi snapshot mới, và chỉ khi dòng đó đang được hiển thị.
+    """
+
+    def __init__(self, fetch, max_entries: int = DETAIL_CACHE_SIZE):
+        self._fetch = fetch
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[int, Dict]]" = OrderedDict()
+
+    def enrich(self, rows: Iterable[dict], seq: int) -> List[dict]:
+        result = []
+        for info in rows:
+            key = (info['pid'], info['create_time'])
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != seq:
+                details = self._fetch(*key)
+                if details is None:
+                    details = entry[1] if entry is not None else EMPTY_DETAILS
+                entry = (seq, details)
+                self._entries[key] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(key)
+            result.append({**info, **entry[1]})
+        return result
+
+
+class ProcessSampler:
+    """
+    Luồng nền thu thập tiến trình theo chu kỳ và công bố Snapshot mới nhất.
+    Vòng lặp giao diện không bao giờ phải chờ một lần quét process_iter.
+    """
+
+    def __init__(self, interval: float, collector=None):
+        self.interval = interval
+        if collector is None:
+            # Tránh import vòng: procfs.make_collector dùng lại PsutilCollector ở trên
+            from .procfs import make_collector
+            collector = make_collector()
+        self._collector = collector
+        self._details = DetailCache(collector.details)
+        self.history = ProcessHistory()
+        self._latest: Optional[Snapshot] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._seq = 0
+        self._system_stats = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="pmon-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def latest(self) -> Optional[Snapshot]:
+        # Gán/đọc một tham chiếu là nguyên tử trong CPython, không cần khoá
+        return self._latest
+
+    def enrich(self, rows: Iterable[dict], snapshot: Snapshot) -> List[dict]:
+        """Bổ sung username/I/O và các tốc độ/lịch sử cho các dòng sắp vẽ (gọi từ luồng giao diện)."""
+        return self.history.annotate(self._details.enrich(rows, snapshot.seq), snapshot.timestamp)
+
+    def request_refresh(self):
+        """Lấy mẫu ngay (vd. sau khi gửi tín hiệu) thay vì chờ hết chu kỳ."""
+        self._wake.set()
+
+    def set_extended(self, enabled: bool):
+        """Thu thập username/I/O/cgroup cho mọi tiến trình (chế độ gộp nhóm); tắt để về tầng rẻ."""
+        if self._collector.extended != enabled:
+            self._collector.extended = enabled
+            self.request_refresh()
+
+    def set_system_panel(self, enabled: bool):
+        """Bật/tắt đọc số liệu hệ thống (core, load, swap, disk, net); khi tắt không tốn lần đọc nào."""
+        if enabled and self._system_stats is None:
+            self._system_stats = make_system_stats()
+            self.request_refresh()
+        elif not enabled:
+            # Bỏ luôn bộ đếm cũ: mở lại sau một lúc không được tính tốc độ trên khoảng dài
+            self._system_stats = None
+
+    def sample_once(self) -> Snapshot:
+        start = time.perf_counter()
+        cpu_percent = psutil.cpu_percent(interval=0)
+        mem_percent = psutil.virtual_memory().percent
+        system_stats = self._system_stats
+        system = system_stats.sample() if system_stats is not None else None
+        processes = self._collector.collect()
+        self._seq += 1
+        timestamp = time.time()
+        self.history.record(self._seq, timestamp, processes)
+        snapshot = Snapshot(self._seq, timestamp, cpu_percent, mem_percent,
+                            processes, time.perf_counter() - start, system)
+        self._latest = snapshot
+        return snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                log.error(f"Sampler error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,143 @@
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import psutil
+
+# Số lỗi đầu tiên được liệt kê trong thông báo kết quả
+MAX_REPORTED_FAILURES = 3
+
+
+class SignalResult(NamedTuple):
+    sent: int
+    failures: Tuple[Tuple[int, str], ...]    # (pid, lý do)
+    groups: int = 0                           # số nhóm được gửi bằng một lần killpg
+
+    def summary(self, sig_name: str) -> str:
+        text = f"{sig_name}: {self.sent} sent"
+        if self.groups:
+            text += f" ({self.groups} process group{'s' if self.groups > 1 else ''})"
+        if self.failures:
+            shown = "; ".join(f"{pid} {reason}" for pid, reason in self.failures[:MAX_REPORTED_FAILURES])
+            more = " ..." if len(self.failures) > MAX_REPORTED_FAILURES else ""
+            text += f", {len(self.failures)} failed: {shown}{more}"
+        return text
+
+
+def _pgid(pid: int) -> Optional[int]:
+    try:
+        return os.getpgid(pid)
+    except OSError:
+        return None
+
+
+def _failure(pid: int, error: OSError) -> Tuple[int, str]:
+    if isinstance(error, ProcessLookupError):
+        return pid, "no such process"
+    return pid, error.strerror or str(error)
+
+
+def _protected() -> Tuple[int, int, Set[int]]:
+    """(pid của pmon, nhóm của pmon, các tổ tiên của pmon): những thứ không bao giờ được gửi tín hiệu."""
+    own_pid = os.getpid()
+    try:
+        ancestors = {p.pid for p in psutil.Process(own_pid).parents()}
+    except psutil.Error:
+        ancestors = {os.getppid()}
+    return own_pid, os.getpgrp(), ancestors
+
+
+def exclude_own(pids: Iterable[int]) -> Tuple[List[int], List[Tuple[int, str]]]:
+    """
+    Bỏ pmon, các tiến trình cùng nhóm với pmon và mọi tổ tiên của pmon (shell đã chạy pmon,
+    login shell, ...) khỏi pids, giữ thứ tự. Trả về (pid còn lại, [(pid, lý do)]).
+    Các job khác cùng session (vd. job nền của cùng shell) vẫn gửi được.
+    """
+    own_pid, own_group, ancestors = _protected()
+    kept, excluded = [], []
+    for pid in dict.fromkeys(pids):
+        if pid == own_pid:
+            excluded.append((pid, "is pmon itself"))
+        elif pid in ancestors:
+            excluded.append((pid, "is an ancestor of pmon"))
+        elif _pgid(pid) == own_group:
+            excluded.append((pid, "is in pmon's process group"))
+        else:
+            kept.append(pid)      # kể cả pid đã kết thúc: lỗi được báo khi gửi
+    return kept, excluded
+
+
+def is_stopped(pid: int) -> bool:
+    try:
+        return psutil.Process(pid).status() == psutil.STATUS_STOPPED
+    except psutil.Error:
+        return False
+
+
+def group_members(pgids: Iterable[int]) -> Dict[int, List[int]]:
+    """PID hiện có của từng nhóm, đọc lại danh sách tiến trình lúc gửi (không tin snapshot cũ)."""
+    members: Dict[int, List[int]] = {pgid: [] for pgid in pgids}
+    for pid in psutil.pids():
+        pgid = _pgid(pid)
+        if pgid in members:
+            members[pgid].append(pid)
+    return members
+
+
+def signal_processes(pids: Iterable[int], sig: int) -> SignalResult:
+    """
+    Gửi một tín hiệu tới nhiều tiến trình trong một lượt. Nhóm tiến trình mà mọi thành viên
+    đều nằm trong pids được gửi bằng một lần os.killpg; còn lại os.kill từng pid.
+    Không bao giờ gửi tới chính pmon, nhóm của pmon hay tổ tiên của pmon (xem exclude_own).
+    """
+    kept, failures = exclude_own(pids)
+    targets: Set[int] = set(kept)
+
+    by_group: Dict[Optional[int], List[int]] = {}
+    for pid in targets:
+        by_group.setdefault(_pgid(pid), []).append(pid)
+    own_group = os.getpgrp()
+    # Nhóm chỉ có một tiến trình được chọn thì killpg không lợi gì: khỏi quét danh sách
+    candidates = [g for g, members in by_group.items()
+                  if g is not None and g != own_group and len(members) > 1]
+    complete = {}
+    if candidates:
+        for pgid, members in group_members(candidates).items():
+            if members and targets.issuperset(members):
+                complete[pgid] = len(members)
+
+    sent = groups = 0
+    for pgid, group_pids in by_group.items():
+        if pgid in complete:
+            try:
+                os.killpg(pgid, sig)
+                sent += complete[pgid]
+                groups += 1
+                continue
+            except OSError:
+                pass      # nhóm vừa đổi: quay về gửi từng pid
+        for pid in group_pids:
+            try:
+                os.kill(pid, sig)
+                sent += 1
+            except OSError as e:
+                failures.append(_failure(pid, e))
+    return SignalResult(sent, tuple(failures), groups)
+
+
+def signal_process_group(pgid: int, sig: int) -> SignalResult:
+    """
+    os.killpg cả nhóm. Từ chối nhóm của chính pmon và nhóm có chứa một tổ tiên của pmon
+    (vd. shell đã chạy pmon khi nó có nhóm riêng), cùng điều kiện với exclude_own.
+    """
+    own_pid, own_group, ancestors = _protected()
+    if pgid == own_group:
+        return SignalResult(0, ((pgid, "is pmon's own process group"),))
+    members = group_members((pgid,))[pgid]
+    if own_pid in members or ancestors.intersection(members):
+        return SignalResult(0, ((pgid, "contains an ancestor of pmon"),))
+    count = len(members)
+    try:
+        os.killpg(pgid, sig)
+    except OSError as e:
+        return SignalResult(0, (_failure(pgid, e),))
+    return SignalResult(count, (), 1)
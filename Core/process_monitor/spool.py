@@ -0,0 +1,199 @@
+import os
+import selectors
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from . import log
+
+# Dung lượng tối đa của ring buffer cho mỗi job (bytes)
+JOBLOG_BUFFER_SIZE = 64 * 1024
+# Tổng bộ nhớ tối đa cho mọi ring buffer, bất kể số job
+JOBLOG_MEMORY_LIMIT = 8 * 1024 * 1024
+# Số log của job đã kết thúc được giữ lại để xem bằng joblog
+JOBLOG_KEEP_FINISHED = 32
+# Kích thước mỗi lần đọc từ pipe
+READ_CHUNK_SIZE = 16 * 1024
+
+
+class RingBuffer:
+    """
+    Buffer vòng kích thước cố định, chỉ giữ 'capacity' bytes cuối cùng.
+    Bộ nhớ được cấp dần khi có dữ liệu, nên job im lặng gần như không tốn gì.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = bytearray()
+        self.start = 0           # vị trí byte cũ nhất khi buffer đã đầy
+        self.total_written = 0   # tổng số byte đã ghi (offset tuyệt đối)
+
+    def allocated(self) -> int:
+        return len(self.data)
+
+    def write(self, chunk: bytes, grow_limit: int):
+        """Ghi chunk; buffer chỉ được lớn thêm tối đa grow_limit bytes."""
+        self.total_written += len(chunk)
+        if len(chunk) >= self.capacity:
+            chunk = chunk[-self.capacity:]
+
+        room = min(self.capacity - len(self.data), grow_limit)
+        if room > 0 and self.start == 0:
+            take = min(room, len(chunk))
+            self.data += chunk[:take]
+            chunk = chunk[take:]
+
+        size = len(self.data)
+        if not chunk or size == 0:
+            return
+        if len(chunk) > size:
+            chunk = chunk[-size:]
+        end = self.start + len(chunk)
+        if end <= size:
+            self.data[self.start:end] = chunk
+        else:
+            first = size - self.start
+            self.data[self.start:] = chunk[:first]
+            self.data[:end - size] = chunk[first:]
+        self.start = end % size
+
+    def read_from(self, offset: int) -> Tuple[bytes, int]:
+        """Đọc dữ liệu từ offset tuyệt đối; trả về (dữ liệu, offset mới)."""
+        oldest = self.total_written - len(self.data)
+        offset = max(offset, oldest)
+        content = bytes(self.data[self.start:] + self.data[:self.start])
+        return content[offset - oldest:], self.total_written
+
+
+class _JobLog:
+    def __init__(self, jid: int):
+        self.jid = jid
+        self.buffer = RingBuffer(JOBLOG_BUFFER_SIZE)
+        self.eof = False
+        self.dropped = 0
+
+
+class JobOutputSpooler:
+    """
+    Một luồng I/O duy nhất đọc output của mọi job nền vào ring buffer.
+    Nhờ vậy job không bao giờ bị chặn vì pipe đầy (~64 KiB) và bộ nhớ có giới hạn.
+    """
+
+    def __init__(self):
+        self._logs: "OrderedDict[int, _JobLog]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._selector = selectors.DefaultSelector()
+        self._pending: Dict[int, int] = {}   # fd -> jid chờ đăng ký vào selector
+        self._wakeup_r, self._wakeup_w = None, None
+        self._thread: Optional[threading.Thread] = None
+        self._allocated = 0
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, name="minishell-joblog", daemon=True)
+        self._thread.start()
+
+    def add(self, jid: int, fd: int):
+        """Bắt đầu đọc fd (đầu đọc của pipe output) cho job jid."""
+        with self._lock:
+            self._ensure_thread()
+            self._logs[jid] = _JobLog(jid)
+            self._pending[fd] = jid
+        os.write(self._wakeup_w, b"x")
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    self._register_pending()
+                    continue
+                try:
+                    chunk = os.read(key.fd, READ_CHUNK_SIZE)
+                except OSError:
+                    chunk = b""
+                if chunk:
+                    self._store(key.data, chunk)
+                else:
+                    self._selector.unregister(key.fd)
+                    os.close(key.fd)
+                    self._finish(key.data)
+
+    def _register_pending(self):
+        try:
+            os.read(self._wakeup_r, 4096)
+        except BlockingIOError:
+            pass
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for fd, jid in pending.items():
+            self._selector.register(fd, selectors.EVENT_READ, jid)
+
+    def _store(self, jid: int, chunk: bytes):
+        with self._lock:
+            job_log = self._logs.get(jid)
+            if job_log is None:
+                return
+            buf = job_log.buffer
+            want = min(len(chunk), buf.capacity - buf.allocated())
+            grow = self._reserve(want, keep=jid)
+            before = buf.allocated()
+            buf.write(chunk, grow)
+            self._allocated += buf.allocated() - before
+            if buf.allocated() == 0:
+                job_log.dropped += len(chunk)
+            self._changed.notify_all()
+
+    def _reserve(self, want: int, keep: int) -> int:
+        """Giải phóng log cũ đã xong nếu cần; trả về số byte buffer được phép lớn thêm."""
+        if want <= 0:
+            return 0
+        for jid in list(self._logs):
+            if self._allocated + want <= JOBLOG_MEMORY_LIMIT:
+                break
+            job_log = self._logs[jid]
+            if jid != keep and job_log.eof:
+                self._allocated -= job_log.buffer.allocated()
+                del self._logs[jid]
+        return max(0, min(want, JOBLOG_MEMORY_LIMIT - self._allocated))
+
+    def _finish(self, jid: int):
+        with self._lock:
+            job_log = self._logs.get(jid)
+            if job_log is not None:
+                job_log.eof = True
+            finished = [j for j, l in self._logs.items() if l.eof]
+            for old in finished[:-JOBLOG_KEEP_FINISHED]:
+                self._allocated -= self._logs.pop(old).buffer.allocated()
+            self._changed.notify_all()
+
+    def has_log(self, jid: int) -> bool:
+        with self._lock:
+            return jid in self._logs
+
+    def read(self, jid: int, offset: int = 0) -> Optional[Tuple[bytes, int, bool]]:
+        """Trả về (dữ liệu từ offset, offset mới, đã EOF) hoặc None nếu không có log."""
+        with self._lock:
+            job_log = self._logs.get(jid)
+            if job_log is None:
+                return None
+            data, new_offset = job_log.buffer.read_from(offset)
+            return data, new_offset, job_log.eof
+
+    def wait_for_output(self, jid: int, offset: int, timeout: float):
+        with self._lock:
+            job_log = self._logs.get(jid)
+            if job_log and not job_log.eof and job_log.buffer.total_written == offset:
+                self._changed.wait(timeout)
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return self._allocated
+
+
+# TAO MOT INSTANCE DUY NHAT CUA SPOOLER
+job_spooler = JobOutputSpooler()
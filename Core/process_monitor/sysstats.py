@@ -0,0 +1,179 @@
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import psutil
+
+from .procfs import procfs_available
+
+# Buffer đọc các file hệ thống; /proc/stat của máy nhiều core có thể vượt vài KiB nên buffer tự nới
+SYSTEM_BUFFER_SIZE = 16384
+# Thiết bị ảo không đáng hiển thị trong dòng Disk/Net
+_SKIP_DISKS = ("loop", "ram", "zram", "fd", "sr")
+_SKIP_NETS = ("lo",)
+_SECTOR_SIZE = 512        # /proc/diskstats luôn tính theo sector 512 byte
+
+
+class SystemSample(NamedTuple):
+    """Số liệu toàn hệ thống của một lần lấy mẫu; tốc độ tính theo delta với lần trước."""
+    cores: Tuple[float, ...]                       # %CPU từng core
+    load: Tuple[float, float, float]
+    swap_used: int
+    swap_total: int
+    disks: Tuple[Tuple[str, float, float], ...]    # (thiết bị, byte đọc/s, byte ghi/s)
+    nets: Tuple[Tuple[str, float, float], ...]     # (giao diện, byte nhận/s, byte gửi/s)
+
+
+def _rates(prev: Dict[str, Tuple[int, int]], current: Dict[str, Tuple[int, int]],
+           scale: float) -> Tuple[Tuple[str, float, float], ...]:
+    rates = []
+    for name, (a, b) in current.items():
+        old = prev.get(name)
+        if old is not None:
+            rates.append((name, max(0, a - old[0]) * scale, max(0, b - old[1]) * scale))
+        else:
+            rates.append((name, 0.0, 0.0))
+    return tuple(rates)
+
+
+class ProcfsSystemStats:
+    """
+    Đọc /proc/stat, /proc/diskstats, /proc/net/dev, /proc/loadavg và /proc/meminfo,
+    mỗi file đúng một lần đọc vào buffer dùng lại, rồi tính tốc độ từ delta với lần trước.
+    """
+
+    def __init__(self, proc_root: str = "/proc", sys_root: str = "/sys"):
+        self.proc_root = proc_root
+        self.sys_root = sys_root
+        self._buf = bytearray(SYSTEM_BUFFER_SIZE)
+        self._prev_cores: List[Tuple[int, int]] = []
+        self._prev_disks: Dict[str, Tuple[int, int]] = {}
+        self._prev_nets: Dict[str, Tuple[int, int]] = {}
+        self._prev_time: Optional[float] = None
+        self._whole_disks: Dict[str, bool] = {}
+
+    def _read(self, name: str) -> bytes:
+        fd = os.open(f"{self.proc_root}/{name}", os.O_RDONLY)
+        try:
+            while True:
+                n = os.readv(fd, [self._buf])
+                if n < len(self._buf):
+                    return bytes(self._buf[:n])
+                # File lớn hơn buffer: nới gấp đôi và đọc lại từ đầu (chỉ xảy ra vài lần đầu)
+                self._buf = bytearray(2 * len(self._buf))
+                os.lseek(fd, 0, os.SEEK_SET)
+        finally:
+            os.close(fd)
+
+    def _is_whole_disk(self, name: str) -> bool:
+        # Phân vùng (sda1, nvme0n1p2) không có trong /sys/block; chỉ kiểm tra một lần cho mỗi tên
+        whole = self._whole_disks.get(name)
+        if whole is None:
+            whole = (not name.startswith(_SKIP_DISKS)
+                     and os.path.exists(f"{self.sys_root}/block/{name.replace('/', '!')}"))
+            self._whole_disks[name] = whole
+        return whole
+
+    def sample(self) -> SystemSample:
+        now = time.monotonic()
+        elapsed = now - self._prev_time if self._prev_time is not None else 0.0
+        scale = 1.0 / elapsed if elapsed > 0 else 0.0
+
+        cores = []
+        prev_cores = self._prev_cores
+        new_cores = []
+        for line in self._read("stat").split(b"\n"):
+            if not line.startswith(b"cpu"):
+                break           # các dòng cpu luôn đứng đầu file
+            if line.startswith(b"cpu "):
+                continue
+            values = [int(v) for v in line.split()[1:9]]
+            total = sum(values)
+            busy = total - values[3] - values[4]      # trừ idle và iowait
+            i = len(new_cores)
+            new_cores.append((busy, total))
+            if i < len(prev_cores) and total > prev_cores[i][1]:
+                cores.append(100.0 * (busy - prev_cores[i][0]) / (total - prev_cores[i][1]))
+            else:
+                cores.append(0.0)
+        self._prev_cores = new_cores
+
+        disks = {}
+        for line in self._read("diskstats").split(b"\n"):
+            fields = line.split()
+            if len(fields) < 10:
+                continue
+            name = fields[2].decode()
+            if self._is_whole_disk(name):
+                disks[name] = (int(fields[5]) * _SECTOR_SIZE, int(fields[9]) * _SECTOR_SIZE)
+
+        nets = {}
+        for line in self._read("net/dev").split(b"\n")[2:]:
+            iface, sep, data = line.partition(b":")
+            if not sep:
+                continue
+            iface = iface.strip().decode()
+            fields = data.split()
+            if iface not in _SKIP_NETS and len(fields) >= 9:
+                nets[iface] = (int(fields[0]), int(fields[8]))
+
+        load = tuple(float(v) for v in self._read("loadavg").split()[:3])
+
+        swap_total = swap_free = 0
+        for line in self._read("meminfo").split(b"\n"):
+            if line.startswith(b"SwapTotal:"):
+                swap_total = int(line.split()[1]) * 1024
+            elif line.startswith(b"SwapFree:"):
+                swap_free = int(line.split()[1]) * 1024
+                break
+
+        sample = SystemSample(tuple(cores), load, swap_total - swap_free, swap_total,
+                              _rates(self._prev_disks, disks, scale), _rates(self._prev_nets, nets, scale))
+        self._prev_disks = disks
+        self._prev_nets = nets
+        self._prev_time = now
+        return sample
+
+
+class PsutilSystemStats:
+    """Cùng dữ liệu qua psutil cho hệ điều hành không có /proc."""
+
+    def __init__(self):
+        self._prev_disks: Dict[str, Tuple[int, int]] = {}
+        self._prev_nets: Dict[str, Tuple[int, int]] = {}
+        self._prev_time: Optional[float] = None
+        psutil.cpu_percent(percpu=True)   # mồi: lần gọi đầu luôn trả 0
+
+    def sample(self) -> SystemSample:
+        now = time.monotonic()
+        elapsed = now - self._prev_time if self._prev_time is not None else 0.0
+        scale = 1.0 / elapsed if elapsed > 0 else 0.0
+        disks = {name: (c.read_bytes, c.write_bytes)
+                 for name, c in (psutil.disk_io_counters(perdisk=True, nowrap=True) or {}).items()
+                 if not name.startswith(_SKIP_DISKS)}
+        nets = {name: (c.bytes_recv, c.bytes_sent)
+                for name, c in psutil.net_io_counters(pernic=True, nowrap=True).items()
+                if name not in _SKIP_NETS}
+        try:
+            load = psutil.getloadavg()
+        except (AttributeError, OSError):
+            load = (0.0, 0.0, 0.0)
+        swap = psutil.swap_memory()
+        sample = SystemSample(tuple(psutil.cpu_percent(percpu=True)), tuple(load), swap.used, swap.total,
+                              _rates(self._prev_disks, disks, scale), _rates(self._prev_nets, nets, scale))
+        self._prev_disks = disks
+        self._prev_nets = nets
+        self._prev_time = now
+        return sample
+
+
+def make_system_stats():
+    """Dùng /proc trực tiếp trên Linux, ngược lại quay về psutil."""
+    if procfs_available():
+        try:
+            stats = ProcfsSystemStats()
+            stats.sample()
+            return stats
+        except (OSError, ValueError, IndexError):
+            pass
+    return PsutilSystemStats()
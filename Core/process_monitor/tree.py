@@ -0,0 +1,236 @@
+import os
+import signal
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .signals import SignalResult, exclude_own, is_stopped, signal_processes
+
+# Cộng/trừ delta liên tục làm sai số float tích luỹ trong tổng cây con;
+# cứ chừng này lần cập nhật thì tính lại toàn bộ một lần.
+REBUILD_INTERVAL = 300
+
+# Vị trí các tổng trong total[pid]: %CPU, %MEM, số thread, số tiến trình của cây con
+_CPU, _MEM, _THR, _CNT = 0, 1, 2, 3
+
+
+# (create_time, ppid, cpu, mem, threads) của một dòng snapshot; itemgetter chạy ở tốc độ C
+_row = itemgetter('create_time', 'ppid', 'cpu_percent', 'memory_percent', 'num_threads')
+
+
+class ProcessTree:
+    """
+    Chỉ mục cha -> con của bảng tiến trình, kèm tổng %CPU/%MEM/threads/số tiến trình của từng cây con.
+    update() chỉ xử lý các tiến trình mới/mất/đổi ppid/đổi giá trị so với lần trước:
+    thay đổi giá trị được cộng dồn lên các tổ tiên thay vì tính lại cả cây.
+    """
+
+    def __init__(self):
+        self._rows: Dict[int, tuple] = {}          # pid -> (create_time, ppid, cpu, mem, threads)
+        self.parent: Dict[int, Optional[int]] = {}
+        self.children: Dict[int, Set[int]] = {}
+        self.total: Dict[int, List[float]] = {}    # pid -> [cpu, mem, threads, count] của cả cây con
+        # Gốc tạm thời đang chờ tiến trình cha (ppid chưa xuất hiện trong bảng)
+        self._orphans: Dict[int, Set[int]] = {}
+        self.updates = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, pid: int) -> bool:
+        return pid in self._rows
+
+    # --- cập nhật ---------------------------------------------------------
+
+    def update(self, processes: Iterable[dict]):
+        new = {info['pid']: _row(info) for info in processes}
+        self.updates += 1
+        if not self._rows or self.updates % REBUILD_INTERVAL == 0:
+            self.rebuild_from(new)
+            return
+
+        rows = self._rows
+        get = rows.get
+        changed = [(pid, row) for pid, row in new.items() if get(pid) != row]
+        for pid in rows.keys() - new.keys():
+            self._remove(pid)
+
+        pending = []
+        for pid, row in changed:
+            prev = rows.get(pid)
+            if prev is not None and prev[0] != row[0]:
+                self._remove(pid)               # pid bị tái sử dụng
+                prev = None
+            if prev is None:
+                self._create(pid, row)
+                pending.append(pid)
+            elif prev[1] != row[1]:
+                self._detach(pid)
+                self._set_values(pid, row, propagate=False)
+                pending.append(pid)
+            else:
+                self._set_values(pid, row, propagate=True)
+        for pid in pending:
+            self._attach(pid)
+
+    def rebuild(self, processes: Iterable[dict]):
+        """Dựng lại toàn bộ chỉ mục (dùng khi khởi tạo và để so sánh trong benchmark)."""
+        self.rebuild_from({info['pid']: _row(info) for info in processes})
+
+    def rebuild_from(self, rows: Dict[int, tuple]):
+        self._rows = dict(rows)
+        self.parent = {}
+        self.children = {pid: set() for pid in rows}
+        self.total = {pid: [row[2], row[3], row[4], 1] for pid, row in rows.items()}
+        self._orphans = {}
+        for pid, row in rows.items():
+            ppid = row[1]
+            if self._valid_parent(pid, ppid):
+                self.parent[pid] = ppid
+                self.children[ppid].add(pid)
+            else:
+                self.parent[pid] = None
+                self._orphans.setdefault(ppid, set()).add(pid)
+        # Cộng tổng từ lá lên gốc theo thứ tự ngược của DFS
+        for pid in reversed(self._preorder(self.roots())):
+            ppid = self.parent[pid]
+            if ppid is not None:
+                parent_total, own_total = self.total[ppid], self.total[pid]
+                parent_total[_CPU] += own_total[_CPU]
+                parent_total[_MEM] += own_total[_MEM]
+                parent_total[_THR] += own_total[_THR]
+                parent_total[_CNT] += own_total[_CNT]
+
+    def _valid_parent(self, pid: int, ppid: int) -> bool:
+        # Cha phải còn trong bảng và không thể sinh sau con (loại ppid cũ trỏ vào pid đã tái sử dụng)
+        parent_row = self._rows.get(ppid)
+        return ppid != pid and parent_row is not None and parent_row[0] <= self._rows[pid][0]
+
+    def _propagate(self, pid: Optional[int], cpu: float, mem: float, threads: float, count: int = 0):
+        while pid is not None:
+            t = self.total[pid]
+            t[_CPU] += cpu
+            t[_MEM] += mem
+            t[_THR] += threads
+            t[_CNT] += count
+            pid = self.parent[pid]
+
+    def _create(self, pid: int, row: tuple):
+        self._rows[pid] = row
+        self.parent[pid] = None
+        self.children[pid] = set()
+        self.total[pid] = [row[2], row[3], row[4], 1]
+
+    def _set_values(self, pid: int, row: tuple, propagate: bool):
+        prev = self._rows[pid]
+        self._rows[pid] = row
+        d_cpu, d_mem, d_thr = row[2] - prev[2], row[3] - prev[3], row[4] - prev[4]
+        if propagate:
+            self._propagate(pid, d_cpu, d_mem, d_thr)
+        else:
+            t = self.total[pid]
+            t[_CPU] += d_cpu
+            t[_MEM] += d_mem
+            t[_THR] += d_thr
+
+    def _attach(self, pid: int):
+        ppid = self._rows[pid][1]
+        if self._valid_parent(pid, ppid):
+            self.parent[pid] = ppid
+            self.children[ppid].add(pid)
+            t = self.total[pid]
+            self._propagate(ppid, t[_CPU], t[_MEM], t[_THR], t[_CNT])
+        else:
+            self.parent[pid] = None
+            self._orphans.setdefault(ppid, set()).add(pid)
+        # Nhận lại các con đã xuất hiện trước cha
+        for child in self._orphans.pop(pid, ()):
+            if self._rows[child][1] == pid and self._valid_parent(child, pid):
+                self.parent[child] = pid
+                self.children[pid].add(child)
+                t = self.total[child]
+                self._propagate(pid, t[_CPU], t[_MEM], t[_THR], t[_CNT])
+            else:
+                self._orphans.setdefault(self._rows[child][1], set()).add(child)
+
+    def _detach(self, pid: int):
+        ppid = self.parent[pid]
+        if ppid is None:
+            bucket = self._orphans.get(self._rows[pid][1])
+            if bucket is not None:
+                bucket.discard(pid)
+                if not bucket:
+                    del self._orphans[self._rows[pid][1]]
+            return
+        self.children[ppid].discard(pid)
+        t = self.total[pid]
+        self._propagate(ppid, -t[_CPU], -t[_MEM], -t[_THR], -t[_CNT])
+        self.parent[pid] = None
+
+    def _remove(self, pid: int):
+        self._detach(pid)
+        # Con mồ côi thành gốc cho tới khi snapshot sau cho thấy cha mới (thường là init)
+        for child in self.children.pop(pid):
+            self.parent[child] = None
+            self._orphans.setdefault(pid, set()).add(child)
+        del self._rows[pid]
+        del self.parent[pid]
+        del self.total[pid]
+
+    # --- truy vấn ---------------------------------------------------------
+
+    def roots(self) -> List[int]:
+        return [pid for pid, ppid in self.parent.items() if ppid is None]
+
+    def _preorder(self, start: Iterable[int]) -> List[int]:
+        order, stack = [], list(start)
+        while stack:
+            pid = stack.pop()
+            order.append(pid)
+            stack.extend(self.children[pid])
+        return order
+
+    def subtree(self, pid: int) -> List[int]:
+        """pid và mọi hậu duệ, cha trước con."""
+        return self._preorder([pid]) if pid in self._rows else []
+
+    def flatten(self, sort_key: Callable[[int], object], descending: bool,
+                collapsed: Set[int]) -> List[Tuple[int, int, bool]]:
+        """Danh sách (pid, độ sâu, có con) theo thứ tự hiển thị; bỏ qua hậu duệ của nút đang thu gọn."""
+        result = []
+        stack = [(pid, 0) for pid in sorted(self.roots(), key=sort_key, reverse=not descending)]
+        while stack:
+            pid, depth = stack.pop()
+            kids = self.children[pid]
+            result.append((pid, depth, bool(kids)))
+            if kids and pid not in collapsed:
+                stack.extend((c, depth + 1) for c in sorted(kids, key=sort_key, reverse=not descending))
+        return result
+
+
+def signal_process_tree(pids: List[int], sig: int) -> SignalResult:
+    """
+    Gửi tín hiệu tới cả cây (pids theo thứ tự cha trước con). Với TERM/KILL/INT, cả cây
+    được SIGSTOP trước để tiến trình cha không kịp sinh thêm con, rồi SIGCONT sau đó
+    (trừ các tiến trình vốn đã dừng trước khi gửi). Nhóm tiến trình nằm trọn trong cây
+    được gửi bằng một lần killpg. pmon và tổ tiên của nó bị bỏ khỏi cây trước khi đóng băng.
+    """
+    pids, excluded = exclude_own(pids)
+    freeze = sig in (signal.SIGTERM, signal.SIGKILL, signal.SIGINT)
+    frozen = []
+    if freeze:
+        for pid in pids:
+            if is_stopped(pid):
+                continue        # job người dùng đã dừng: không đánh thức lại
+            try:
+                os.kill(pid, signal.SIGSTOP)
+                frozen.append(pid)
+            except OSError:
+                pass
+    result = signal_processes(pids, sig)
+    if sig != signal.SIGKILL:
+        for pid in frozen:
+            try:
+                os.kill(pid, signal.SIGCONT)
+            except OSError:
+                pass
+    return result._replace(failures=tuple(excluded) + result.failures)
@@ -1,80 +1,65 @@
 
 import curses
-import psutil
+import heapq
 import time
 import sys
 import signal
 import os
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, NamedTuple
 
+from .utils import format_bytes
+from .history import sparkline, SPARKLINE_WIDTH
+from .sampler import ProcessSampler
+from .render import Frame, ScreenRenderer
+from .recording import parse_goto
+from .tree import ProcessTree, signal_process_tree
+from .signals import group_members, signal_process_group, signal_processes
+from .groups import GROUP_KINDS, GroupAggregator, group_key
+from .filters import ProcessFilter, load_presets, save_preset
 
-class ProcessFilter:
-    """Class để quản lý bộ lọc tiến trình"""
-    def __init__(self):
-        self.name_filter = ""
-        self.cpu_threshold = 0.0
-        self.mem_threshold = 0.0
-    
-    def matches(self, proc_info: Dict) -> bool:
-        """Kiểm tra xem tiến trình có khớp với bộ lọc không"""
-        if self.name_filter and self.name_filter.lower() not in proc_info['name'].lower():
-            return False
-        if proc_info['cpu_percent'] < self.cpu_threshold:
-            return False
-        if proc_info['memory_percent'] < self.mem_threshold:
-            return False
-        return True
-    
-    def is_active(self) -> bool:
-        """Kiểm tra xem có bộ lọc nào đang hoạt động không"""
-        return bool(self.name_filter or self.cpu_threshold > 0 or self.mem_threshold > 0)
-    
-    def get_description(self) -> str:
-        """Trả về mô tả bộ lọc hiện tại"""
-        filters = []
-        if self.name_filter:
-            filters.append(f"name:'{self.name_filter}'")
-        if self.cpu_threshold > 0:
-            filters.append(f"CPU>{self.cpu_threshold}%")
-        if self.mem_threshold > 0:
-            filters.append(f"MEM>{self.mem_threshold}%")
-        return " | ".join(filters) if filters else "None"
-
-
-def get_process_info(proc: psutil.Process) -> Optional[Dict]:
-    """Lấy thông tin chi tiết của một tiến trình"""
-    try:
-        with proc.oneshot():
-            info = {
-                'pid': proc.pid,
-                'username': proc.username(),
-                'cpu_percent': proc.cpu_percent(interval=0),
-                'memory_percent': proc.memory_percent(),
-                'name': proc.name(),
-                'num_threads': proc.num_threads(),
-                'status': proc.status(),
-                'create_time': proc.create_time(),
-            }
-            # Lấy thông tin I/O nếu có thể
-            try:
-                io_counters = proc.io_counters()
-                info['io_read_bytes'] = io_counters.read_bytes
-                info['io_write_bytes'] = io_counters.write_bytes
-            except (psutil.AccessDenied, AttributeError):
-                info['io_read_bytes'] = 0
-                info['io_write_bytes'] = 0
-            return info
-    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-        return None
-
-
-def format_bytes(bytes_val: int) -> str:
-    """Format bytes thành dạng dễ đọc"""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if bytes_val < 1024.0:
-            return f"{bytes_val:.1f}{unit}"
-        bytes_val /= 1024.0
-    return f"{bytes_val:.1f}TB"
+# getch() chờ tối đa chừng này (ms) rồi kiểm tra snapshot mới từ sampler
+INPUT_TIMEOUT_MS = 50
+# ←/→ khi phát lại nhảy chừng này frame
+REPLAY_SEEK_FRAMES = 10
+# Kết quả gửi tín hiệu hiện ở dòng Filter trong chừng này giây
+MESSAGE_SECONDS = 5.0
+
+# Phím chọn tín hiệu: gửi cho dòng đang chọn/các dòng đánh dấu, hoặc trả lời lời nhắc cây con/nhóm
+SIGNAL_KEYS = {
+    ord('k'): (signal.SIGKILL, "SIGKILL"),
+    ord('t'): (signal.SIGTERM, "SIGTERM"),
+    ord('s'): (signal.SIGSTOP, "SIGSTOP"),
+    ord('C'): (signal.SIGCONT, "SIGCONT"),
+}
+
+
+class SortColumn(NamedTuple):
+    label: str
+    key: Callable[[Dict], float]
+    descending: bool          # chiều mặc định khi chọn cột
+    needs_details: bool       # cần tầng đắt (I/O) cho mọi dòng đã lọc
+
+
+# Phím 'o' xoay vòng qua các cột này, 'I' đảo chiều sắp xếp
+SORT_COLUMNS = (
+    SortColumn('%CPU', lambda p: p['cpu_percent'], True, False),
+    SortColumn('%MEM', lambda p: p['memory_percent'], True, False),
+    SortColumn('I/O', lambda p: p['io_read_rate'] + p['io_write_rate'], True, True),
+    SortColumn('THR', lambda p: p['num_threads'], True, False),
+    SortColumn('RUNTIME', lambda p: -p['create_time'], True, False),
+    SortColumn('PID', lambda p: p['pid'], False, False),
+)
+
+
+def top_processes(procs: List[Dict], column: SortColumn, descending: bool, k: int) -> List[Dict]:
+    """
+    k dòng đầu theo cột sắp xếp, dùng heapq thay vì sắp xếp cả danh sách.
+    Giá trị bằng nhau được xếp theo PID tăng dần để thứ tự ổn định giữa các lần refresh.
+    """
+    key = column.key
+    if descending:
+        return heapq.nlargest(k, procs, key=lambda p: (key(p), -p['pid']))
+    return heapq.nsmallest(k, procs, key=lambda p: (key(p), p['pid']))
 
 
 def format_runtime(create_time: float) -> str:
@@ -100,6 +85,52 @@ def format_runtime(create_time: float) -> str:
         return "N/A"
 
 
+def format_rate(bytes_per_sec: float) -> str:
+    """Tốc độ tăng/giảm bộ nhớ có dấu, vd. +1.2MB hoặc -40.0KB"""
+    if abs(bytes_per_sec) < 1:
+        return "0"
+    sign = "+" if bytes_per_sec > 0 else "-"
+    return sign + format_bytes(abs(bytes_per_sec))
+
+
+def _rate_items(items, width: int) -> str:
+    """Các thiết bị/giao diện bận nhất trước, thêm đến khi hết chiều rộng."""
+    parts = []
+    used = 0
+    for name, a, b in sorted(items, key=lambda item: item[1] + item[2], reverse=True):
+        part = f"{name} {format_bytes(a)}/s {format_bytes(b)}/s"
+        if parts and used + len(part) + 3 > width:
+            break
+        parts.append(part)
+        used += len(part) + 3
+    return " | ".join(parts) if parts else "-"
+
+
+def system_panel_lines(system, width: int) -> List[str]:
+    """Các dòng của panel hệ thống (phím 'P'): load/swap, từng core, disk, network."""
+    if system is None:
+        return ["System: no data (not recorded in this session)"]
+    load = " ".join(f"{v:.2f}" for v in system.load)
+    if system.swap_total:
+        swap = (f"{format_bytes(system.swap_used)}/{format_bytes(system.swap_total)}"
+                f" ({100.0 * system.swap_used / system.swap_total:.0f}%)")
+    else:
+        swap = "none"
+    lines = [f"Load: {load} | Swap: {swap}"]
+    cores = system.cores
+    if cores:
+        hottest = max(range(len(cores)), key=cores.__getitem__)
+        prefix = f"Cores({len(cores)}): "
+        suffix = f" avg {sum(cores) / len(cores):.0f}% max {cores[hottest]:.0f}% (cpu{hottest})"
+        # Mỗi core một ký tự; máy quá nhiều core thì phần thừa bị cắt ở mép màn hình
+        shown = max(1, min(len(cores), width - len(prefix) - len(suffix)))
+        bars = sparkline(cores[:shown], width=shown)
+        lines.append(prefix + bars + suffix)
+    lines.append("Disk R/W: " + _rate_items(system.disks, width - 10))
+    lines.append("Net RX/TX: " + _rate_items(system.nets, width - 11))
+    return lines
+
+
 def format_status(status: str) -> str:
     """Format status thành dạng dễ đọc"""
     status_map = {
@@ -120,14 +151,17 @@ def format_status(status: str) -> str:
     return status_map.get(status.lower(), status[:6])
 
 
-def show_process_monitor(stdscr):
+def show_process_monitor(stdscr, source=None):
     """
     Hàm này được gọi bởi curses, 'stdscr' là đối tượng màn hình.
     Cải thiện với nhiều tính năng mới.
+    source: nguồn snapshot thay cho ProcessSampler (vd. ReplaySource khi phát lại bản ghi).
     """
+    sampler = None
+    replay = getattr(source, 'replay', False)
     try:
         # Cấu hình curses
-        stdscr.nodelay(True)
+        stdscr.timeout(INPUT_TIMEOUT_MS)
         stdscr.clear()
         curses.curs_set(0)
         
@@ -145,12 +179,38 @@ def show_process_monitor(stdscr):
         current_page = 0
         processes_per_page = 15
         selected_row = 0
-        process_filter = ProcessFilter()
+        presets = load_presets()
+        process_filter = ProcessFilter(presets=presets)
+        status_message = None    # (thông báo, là lỗi, hết hạn lúc hoặc None) hiện ở dòng Filter
         search_mode = False
         search_buffer = ""
-        filter_mode = None  # 'name', 'cpu', 'mem', None
+        filter_mode = None  # 'name', 'cpu', 'mem', 'expr', 'preset', 'goto' (chỉ khi phát lại), None
         filter_buffer = ""
-        last_processes = []
+        last_processes = []      # chỉ (trang hiện tại + 1) * processes_per_page dòng đầu
+        filtered_processes = []
+        sort_index = 0           # SORT_COLUMNS[0]: %CPU
+        sort_descending = SORT_COLUMNS[0].descending
+        tree_mode = False
+        tree = ProcessTree()     # chỉ cập nhật khi đang ở chế độ cây
+        tree_seq = -1
+        collapsed = set()        # pid các nút đang thu gọn
+        tree_meta = {}           # pid -> (độ sâu, có con) của các dòng đang xem dạng cây
+        group_kind = None        # None hoặc một khoá của GROUP_KINDS
+        group_drill = None       # khoá nhóm đang xem danh sách thành viên
+        aggregator = None
+        groups = []
+        groups_seq = -1
+        marked = set()           # (pid, create_time) các tiến trình đã đánh dấu (Space, a)
+        confirm = None           # lời nhắc gửi tín hiệu: (câu hỏi, (tín hiệu, tên) hoặc None = chọn bằng phím, hàm gửi)
+        system_panel = False     # panel core/load/swap/disk/net (phím 'P')
+
+        # Thu thập tiến trình ở luồng nền; UI chỉ vẽ lại từ snapshot mới nhất
+        sampler = source if source is not None else ProcessSampler(refresh_interval)
+        sampler.start()
+        renderer = ScreenRenderer(stdscr)
+        last_seq = -1
+        view_key = None
+        filter_key = None
         
         while True:
             try:
@@ -160,123 +220,272 @@ def show_process_monitor(stdscr):
                 # 1. Xử lý phím bấm
                 key = stdscr.getch()
                 
-                if key == ord('q'):  # Thoát
+                if filter_mode:  # Đang nhập lời nhắc: mọi phím thuộc về ô nhập
+                    if key == 10 or key == curses.KEY_ENTER:  # Enter
+                        try:
+                            if filter_mode == 'name':
+                                process_filter = process_filter.with_clause('name', '~', filter_buffer)
+                            elif filter_mode in ('cpu', 'mem'):
+                                threshold = float(filter_buffer) if filter_buffer else None
+                                process_filter = process_filter.with_clause(filter_mode, '>=', threshold)
+                            elif filter_mode == 'expr':
+                                process_filter = ProcessFilter(filter_buffer, presets)
+                            elif filter_mode == 'preset':
+                                presets = save_preset(filter_buffer.strip(), process_filter.expression)
+                                process_filter = ProcessFilter(process_filter.expression, presets)
+                                action = "Saved" if process_filter.is_active() else "Deleted"
+                                status_message = (f"{action} preset @{filter_buffer.strip()}", False, None)
+                            elif filter_mode == 'goto' and sampler.latest() is not None:
+                                sampler.seek_time(parse_goto(filter_buffer, sampler.latest().timestamp))
+                            if filter_mode != 'preset':
+                                status_message = None
+                        except (ValueError, OSError) as e:
+                            # Giữ bộ lọc cũ, báo lỗi ở dòng Filter
+                            status_message = (str(e), True, None)
+                        filter_mode = None
+                        filter_buffer = ""
+                        current_page = 0
+                        selected_row = 0
+                    elif key == 27:  # ESC
+                        filter_mode = None
+                        filter_buffer = ""
+                    elif key in (curses.KEY_BACKSPACE, 127, 8):  # Backspace
+                        filter_buffer = filter_buffer[:-1]
+                    elif 32 <= key <= 126:  # Ký tự có thể in được
+                        filter_buffer += chr(key)
+                elif confirm is not None:  # Lời nhắc gửi tín hiệu: vòng lặp và sampler vẫn chạy trong lúc chờ
+                    if key not in (-1, curses.KEY_RESIZE):
+                        question, chosen, send = confirm
+                        if chosen is None:
+                            chosen = SIGNAL_KEYS.get(key)
+                        elif key not in (ord('y'), ord('Y')):
+                            chosen = None
+                        confirm = None
+                        if chosen is None:
+                            status_message = ("Cancelled", False, time.time() + MESSAGE_SECONDS)
+                        else:
+                            # Cả lô được gửi trong một lượt; kết quả gộp hiện ở dòng Filter, không chặn màn hình
+                            sig, sig_name = chosen
+                            result = send(sig)
+                            status_message = (result.summary(sig_name), bool(result.failures),
+                                              time.time() + MESSAGE_SECONDS)
+                            sampler.request_refresh()
+                elif key == ord('q'):  # Thoát
                     break
                 elif key == ord('h'):  # Hiển thị help
                     show_help(stdscr)
-                    stdscr.nodelay(True)
+                    stdscr.timeout(INPUT_TIMEOUT_MS)
+                    renderer.invalidate()
+                    last_seq = -1
                     continue
+                elif replay and not filter_mode and key in (ord(' '), ord('+'), ord('='), ord('-'), ord('_'),
+                                                            curses.KEY_LEFT, curses.KEY_RIGHT,
+                                                            ord(','), ord('.'), ord('g')):
+                    # Điều khiển phát lại: tạm dừng, tốc độ, seek, nhảy tới thời điểm
+                    if key == ord(' '):
+                        sampler.toggle_pause()
+                    elif key in (ord('+'), ord('=')):
+                        sampler.change_speed(1)
+                    elif key in (ord('-'), ord('_')):
+                        sampler.change_speed(-1)
+                    elif key == curses.KEY_LEFT:
+                        sampler.seek(-REPLAY_SEEK_FRAMES)
+                    elif key == curses.KEY_RIGHT:
+                        sampler.seek(REPLAY_SEEK_FRAMES)
+                    elif key in (ord(','), ord('.')):
+                        sampler.playing = False
+                        sampler.seek(-1 if key == ord(',') else 1)
+                    elif key == ord('g'):
+                        filter_mode = 'goto'
+                        filter_buffer = ""
                 elif key == ord('+') or key == ord('='):  # Tăng refresh interval
                     refresh_interval = min(10.0, refresh_interval + 0.5)
+                    sampler.interval = refresh_interval
                 elif key == ord('-') or key == ord('_'):  # Giảm refresh interval
                     refresh_interval = max(0.5, refresh_interval - 0.5)
+                    sampler.interval = refresh_interval
                 elif key == curses.KEY_UP and not search_mode and not filter_mode:  # Di chuyển lên
                     selected_row = max(0, selected_row - 1)
                     if selected_row < current_page * processes_per_page:
                         current_page = max(0, current_page - 1)
                 elif key == curses.KEY_DOWN and not search_mode and not filter_mode:  # Di chuyển xuống
-                    selected_row = min(len(last_processes) - 1, selected_row + 1)
+                    selected_row = min(len(filtered_processes) - 1, selected_row + 1)
                     if selected_row >= (current_page + 1) * processes_per_page:
                         current_page += 1
                 elif key == curses.KEY_PPAGE:  # Page Up
                     current_page = max(0, current_page - 1)
                     selected_row = current_page * processes_per_page
                 elif key == curses.KEY_NPAGE:  # Page Down
-                    max_page = max(0, (len(last_processes) - 1) // processes_per_page)
+                    max_page = max(0, (len(filtered_processes) - 1) // processes_per_page)
                     current_page = min(max_page, current_page + 1)
                     selected_row = current_page * processes_per_page
                 elif key == ord('/'):  # Bắt đầu tìm kiếm theo tên
                     filter_mode = 'name'
-                    filter_buffer = process_filter.name_filter
+                    filter_buffer = process_filter.clause_value('name')
                 elif key == ord('c'):  # Bắt đầu lọc theo CPU
                     filter_mode = 'cpu'
-                    filter_buffer = str(int(process_filter.cpu_threshold)) if process_filter.cpu_threshold > 0 else ""
+                    filter_buffer = process_filter.clause_value('cpu')
                 elif key == ord('m'):  # Bắt đầu lọc theo Memory
                     filter_mode = 'mem'
-                    filter_buffer = str(int(process_filter.mem_threshold)) if process_filter.mem_threshold > 0 else ""
-                elif key == ord('r'):  # Reset bộ lọc
-                    process_filter = ProcessFilter()
+                    filter_buffer = process_filter.clause_value('mem')
+                elif key == ord('f'):  # Sửa cả biểu thức lọc
+                    filter_mode = 'expr'
+                    filter_buffer = process_filter.expression
+                elif key == ord('F'):  # Lưu biểu thức hiện tại thành preset
+                    filter_mode = 'preset'
+                    filter_buffer = ""
+                elif key == ord('o') and not filter_mode:  # Đổi cột sắp xếp
+                    sort_index = (sort_index + 1) % len(SORT_COLUMNS)
+                    sort_descending = SORT_COLUMNS[sort_index].descending
                     current_page = 0
                     selected_row = 0
-                elif filter_mode:  # Đang ở chế độ nhập bộ lọc
-                    if key == 10 or key == curses.KEY_ENTER:  # Enter
-                        if filter_mode == 'name':
-                            process_filter.name_filter = filter_buffer
-                        elif filter_mode == 'cpu':
-                            try:
-                                process_filter.cpu_threshold = float(filter_buffer) if filter_buffer else 0.0
-                            except ValueError:
-                                process_filter.cpu_threshold = 0.0
-                        elif filter_mode == 'mem':
-                            try:
-                                process_filter.mem_threshold = float(filter_buffer) if filter_buffer else 0.0
-                            except ValueError:
-                                process_filter.mem_threshold = 0.0
-                        filter_mode = None
-                        filter_buffer = ""
+                elif key == ord('I') and not filter_mode:  # Đảo chiều sắp xếp
+                    sort_descending = not sort_descending
+                    current_page = 0
+                    selected_row = 0
+                elif key == ord('T') and not filter_mode:  # Bật/tắt chế độ cây
+                    tree_mode = not tree_mode
+                    if tree_mode and group_kind is not None:
+                        group_kind = group_drill = aggregator = None
+                    current_page = 0
+                    selected_row = 0
+                    view_key = None
+                elif key == ord('P') and not filter_mode:  # Mở/đóng panel hệ thống
+                    system_panel = not system_panel
+                    sampler.set_system_panel(system_panel)
+                elif key == ord('G') and not filter_mode:  # Gộp nhóm: tắt -> user -> name -> cgroup -> tắt
+                    kinds = [None] + list(GROUP_KINDS)
+                    group_kind = kinds[(kinds.index(group_kind) + 1) % len(kinds)]
+                    group_drill = None
+                    aggregator = GroupAggregator(group_kind) if group_kind else None
+                    groups_seq = -1
+                    tree_mode = False
+                    current_page = 0
+                    selected_row = 0
+                    view_key = None
+                elif group_kind and group_drill is None and not filter_mode and key in (10, curses.KEY_ENTER):
+                    if selected_row < len(last_processes):  # Xem các tiến trình của nhóm
+                        group_drill = last_processes[selected_row]['name']
                         current_page = 0
                         selected_row = 0
-                    elif key == 27:  # ESC
-                        filter_mode = None
-                        filter_buffer = ""
-                    elif key in (curses.KEY_BACKSPACE, 127, 8):  # Backspace
-                        filter_buffer = filter_buffer[:-1]
-                    elif 32 <= key <= 126:  # Ký tự có thể in được
-                        filter_buffer += chr(key)
-                elif key == ord('k'):  # SIGKILL
-                    send_signal_to_selected(stdscr, last_processes, selected_row, signal.SIGKILL, "SIGKILL")
-                elif key == ord('t'):  # SIGTERM
-                    send_signal_to_selected(stdscr, last_processes, selected_row, signal.SIGTERM, "SIGTERM")
-                elif key == ord('s'):  # SIGSTOP
-                    send_signal_to_selected(stdscr, last_processes, selected_row, signal.SIGSTOP, "SIGSTOP")
-                elif key == ord('C'):  # SIGCONT (Shift+C)
-                    send_signal_to_selected(stdscr, last_processes, selected_row, signal.SIGCONT, "SIGCONT")
-                
-                # 2. Xóa màn hình
-                stdscr.clear()
+                elif group_drill is not None and not filter_mode and key in (curses.KEY_BACKSPACE, 127, 8):
+                    group_drill = None  # Quay lại danh sách nhóm
+                    current_page = 0
+                    selected_row = 0
+                elif tree_mode and not filter_mode and key in (10, curses.KEY_ENTER):  # Thu gọn/mở rộng nút
+                    if selected_row < len(last_processes):
+                        pid = last_processes[selected_row]['pid']
+                        collapsed.symmetric_difference_update((pid,))
+                        view_key = None
+                elif key == ord('r'):  # Reset bộ lọc
+                    process_filter = ProcessFilter(presets=presets)
+                    status_message = None
+                    current_page = 0
+                    selected_row = 0
+                elif (replay or (group_kind and group_drill is None)) and (
+                        key in SIGNAL_KEYS or key in (ord('S'), ord('g'), ord(' '), ord('a'), ord('u'))):
+                    pass  # không gửi tín hiệu tới các PID trong bản ghi hay tới cả một dòng nhóm
+                elif key == ord(' '):  # Đánh dấu/bỏ đánh dấu dòng đang chọn rồi xuống dòng kế
+                    if selected_row < len(last_processes):
+                        info = last_processes[selected_row]
+                        marked.symmetric_difference_update(((info['pid'], info['create_time']),))
+                        selected_row = min(len(filtered_processes) - 1, selected_row + 1)
+                        if selected_row >= (current_page + 1) * processes_per_page:
+                            current_page += 1
+                elif key == ord('a'):  # Đánh dấu mọi tiến trình khớp bộ lọc hiện tại
+                    marked.update((info['pid'], info['create_time']) for info in filtered_processes)
+                elif key == ord('u'):  # Bỏ mọi đánh dấu
+                    marked.clear()
+                elif key in SIGNAL_KEYS:  # k/t/s/C: các tiến trình đã đánh dấu, nếu không thì dòng đang chọn
+                    sig, sig_name = SIGNAL_KEYS[key]
+                    if marked:
+                        pids = [pid for pid, _ in marked]
+                        confirm = (f"Send {sig_name} to {len(pids)} marked processes? (y/N)", SIGNAL_KEYS[key],
+                                   lambda sig, pids=pids: signal_processes(pids, sig))
+                    elif selected_row < len(last_processes):
+                        info = last_processes[selected_row]
+                        confirm = (f"Send {sig_name} to PID {info['pid']} ({info['name'][:20]})? (y/N)",
+                                   SIGNAL_KEYS[key], lambda sig, pid=info['pid']: signal_processes((pid,), sig))
+                elif key == ord('S') and tree_mode:  # Gửi tín hiệu cho cả cây con
+                    if selected_row < len(last_processes):
+                        info = last_processes[selected_row]
+                        pids = tree.subtree(info['pid'])
+                        if pids:
+                            confirm = (f"Signal subtree of PID {info['pid']} ({info['name'][:20]}, {len(pids)} processes)"
+                                       f" - k:KILL t:TERM s:STOP C:CONT, other:cancel", None,
+                                       lambda sig, pids=pids: signal_process_tree(pids, sig))
+                elif key == ord('g'):  # Gửi tín hiệu cho cả nhóm tiến trình (killpg) của dòng đang chọn
+                    if selected_row < len(last_processes):
+                        info = last_processes[selected_row]
+                        try:
+                            pgid = os.getpgid(info['pid'])
+                        except OSError:
+                            status_message = (f"PID {info['pid']}: no such process", True,
+                                              time.time() + MESSAGE_SECONDS)
+                        else:
+                            count = len(group_members((pgid,))[pgid])
+                            confirm = (f"Signal process group {pgid} of PID {info['pid']} ({count} processes)"
+                                       f" - k:KILL t:TERM s:STOP C:CONT, other:cancel", None,
+                                       lambda sig, pgid=pgid: signal_process_group(pgid, sig))
+
+                # username/I/O/cgroup cho mọi tiến trình chỉ khi gộp nhóm hoặc bộ lọc dùng user/cgroup
+                sampler.set_extended(group_kind is not None or process_filter.needs_extended)
+
+                # Không có phím mới và không có snapshot mới: khỏi vẽ lại
+                snapshot = sampler.latest()
+                frame = Frame(max_y, max_x)
+                if snapshot is None:
+                    frame.add(0, 0, "Collecting process information...", curses.A_DIM)
+                    renderer.render(frame)
+                    continue
+                if key == -1 and snapshot.seq == last_seq:
+                    continue
+                last_seq = snapshot.seq
+
+                # 2. Dựng khung hình mới (chỉ các dòng thay đổi mới được vẽ lại)
                 
-                # 3. Lấy thông tin hệ thống
-                cpu_percent = psutil.cpu_percent(interval=0)
-                mem = psutil.virtual_memory()
-                mem_percent = mem.percent
+                # 3. Lấy thông tin hệ thống (từ snapshot)
+                cpu_percent = snapshot.cpu_percent
+                mem_percent = snapshot.mem_percent
                 
                 # 4. Vẽ header
                 header_row = 0
-                try:
-                    stdscr.addstr(header_row, 0, "MiniShell Process Monitor", curses.A_BOLD)
-                    stdscr.addstr(header_row, 30, f"Refresh: {refresh_interval:.1f}s (+/- to adjust)", curses.A_DIM)
-                    stdscr.addstr(header_row, max_x - 20, "Press 'h' for help", curses.A_DIM)
-                except curses.error:
-                    pass
+                frame.add(header_row, 0, "MiniShell Process Monitor", curses.A_BOLD)
+                if not replay:
+                    frame.add(header_row, 30, f"Refresh: {refresh_interval:.1f}s (+/- to adjust)", curses.A_DIM)
+                frame.add(header_row, max_x - 20, "Press 'h' for help", curses.A_DIM)
                 
                 header_row += 1
                 cpu_color = get_color_for_percentage(cpu_percent)
                 mem_color = get_color_for_percentage(mem_percent)
-                try:
-                    stdscr.addstr(header_row, 0, f"CPU: [{cpu_percent:5.1f}%] ", curses.color_pair(cpu_color))
-                    stdscr.addstr(header_row, 18, '█' * min(30, int(cpu_percent * 30 / 100)), curses.color_pair(cpu_color))
-                except curses.error:
-                    pass
+                frame.add(header_row, 0, f"CPU: [{cpu_percent:5.1f}%] ", curses.color_pair(cpu_color))
+                frame.add(header_row, 18, '█' * min(30, int(cpu_percent * 30 / 100)), curses.color_pair(cpu_color))
                 
                 header_row += 1
-                try:
-                    stdscr.addstr(header_row, 0, f"MEM: [{mem_percent:5.1f}%] ", curses.color_pair(mem_color))
-                    stdscr.addstr(header_row, 18, '█' * min(30, int(mem_percent * 30 / 100)), curses.color_pair(mem_color))
-                except curses.error:
-                    pass
+                frame.add(header_row, 0, f"MEM: [{mem_percent:5.1f}%] ", curses.color_pair(mem_color))
+                frame.add(header_row, 18, '█' * min(30, int(mem_percent * 30 / 100)), curses.color_pair(mem_color))
+
+                if system_panel:
+                    for line in system_panel_lines(snapshot.system, max_x - 1):
+                        header_row += 1
+                        frame.add(header_row, 0, line, curses.color_pair(4))
+
+                if replay:
+                    header_row += 1
+                    frame.add(header_row, 0, sampler.status_line(), curses.color_pair(4) | curses.A_BOLD)
                 
                 # Hiển thị bộ lọc đang hoạt động
                 header_row += 1
                 if process_filter.is_active():
-                    try:
-                        stdscr.addstr(header_row, 0, f"Filter: {process_filter.get_description()}", curses.color_pair(4))
-                    except curses.error:
-                        pass
+                    filter_text = f"Filter: {process_filter.get_description()}"
+                    frame.add(header_row, 0, filter_text, curses.color_pair(4))
                 else:
-                    try:
-                        stdscr.addstr(header_row, 0, "Filter: None (/ for name, c for CPU, m for Memory, r to reset)", curses.A_DIM)
-                    except curses.error:
-                        pass
+                    filter_text = "Filter: None (f expression, / name, c CPU, m Memory, r reset)"
+                    frame.add(header_row, 0, filter_text, curses.A_DIM)
+                if status_message and (status_message[2] is None or time.time() < status_message[2]):
+                    message, is_error, _ = status_message
+                    frame.add(header_row, len(filter_text) + 2, f"[{message}]",
+                              curses.color_pair(1 if is_error else 3) | curses.A_BOLD)
                 
                 # Hiển thị chế độ nhập bộ lọc
                 if filter_mode:
@@ -284,52 +493,115 @@ def show_process_monitor(stdscr):
                     filter_prompts = {
                         'name': "Enter process name (substring): ",
                         'cpu': "Enter minimum CPU % (e.g., 10): ",
-                        'mem': "Enter minimum Memory % (e.g., 20): "
+                        'mem': "Enter minimum Memory % (e.g., 20): ",
+                        'expr': "Filter (e.g. user=root && cpu>5 && name~/^py/): ",
+                        'preset': "Save filter as preset (empty filter deletes it): ",
+                        'goto': "Go to time (HH:MM[:SS] or YYYY-MM-DD HH:MM): "
                     }
-                    try:
-                        stdscr.addstr(header_row, 0, filter_prompts.get(filter_mode, ""), curses.color_pair(4) | curses.A_BOLD)
-                        stdscr.addstr(header_row, len(filter_prompts.get(filter_mode, "")), filter_buffer)
-                        stdscr.addstr(header_row, len(filter_prompts.get(filter_mode, "")) + len(filter_buffer), "_", curses.A_BLINK)
-                    except curses.error:
-                        pass
+                    prompt = filter_prompts.get(filter_mode, "")
+                    frame.add(header_row, 0, prompt, curses.color_pair(4) | curses.A_BOLD)
+                    frame.add(header_row, len(prompt), filter_buffer)
+                    frame.add(header_row, len(prompt) + len(filter_buffer), "_", curses.A_BLINK)
+                    if filter_mode == 'expr' and presets:
+                        header_row += 1
+                        frame.add(header_row, 0, "Presets: " + " ".join(f"@{name}" for name in sorted(presets)),
+                                  curses.A_DIM)
+                if confirm is not None:
+                    header_row += 1
+                    frame.add(header_row, 0, confirm[0], curses.color_pair(1) | curses.A_BOLD)
                 
                 # 5. Vẽ header bảng
                 table_start_row = header_row + 2
-                try:
-                    stdscr.addstr(table_start_row, 0, 
-                                 f"{'PID':<8}{'USER':<10}{'%CPU':>6} {'%MEM':>6}{'STATUS':<7}{'RUNTIME':<9}{'THR':>4}{'I/O R':>8}{'I/O W':>8} {'COMMAND':<18}",
-                                 curses.A_BOLD | curses.A_UNDERLINE)
-                except curses.error:
-                    pass
-                
-                # 6. Lấy và lọc danh sách tiến trình
-                procs = []
-                for p in psutil.process_iter():
-                    info = get_process_info(p)
-                    if info and process_filter.matches(info):
-                        procs.append(info)
+                group_list = group_kind is not None and group_drill is None
+                if group_list:
+                    header = f"{'COUNT':>6} {'%CPU':>7} {'%MEM':>6} {'THR':>6}{'R/s':>9}{'W/s':>9}  {group_kind.upper()}"
+                else:
+                    header = f"{'PID':<8}{'USER':<10}{'%CPU':>6} {'%MEM':>6}{'MEM/s':>8} {'STATUS':<7}{'RUNTIME':<9}{'THR':>4}{'R/s':>8}{'W/s':>8} {'CPU HIST':<{SPARKLINE_WIDTH}} {'COMMAND':<18}"
+                frame.add(table_start_row, 0, header, curses.A_BOLD | curses.A_UNDERLINE)
                 
-                # Sắp xếp theo %CPU giảm dần
-                procs_sorted = sorted(procs, key=lambda x: x['cpu_percent'], reverse=True)
-                last_processes = procs_sorted
+                # 6. Lọc và sắp xếp danh sách tiến trình (chỉ làm lại khi snapshot/bộ lọc đổi)
+                new_filter_key = (snapshot.seq, process_filter.get_description(), group_kind, group_drill)
+                if new_filter_key != filter_key:
+                    filter_key = new_filter_key
+                    filtered_processes = process_filter.filter(snapshot.processes)
+                    if marked:
+                        # Bỏ đánh dấu các tiến trình đã kết thúc (hoặc PID đã bị dùng lại)
+                        marked.intersection_update([(info['pid'], info['create_time'])
+                                                    for info in snapshot.processes])
+                    if group_drill is not None:
+                        filtered_processes = [info for info in filtered_processes
+                                              if group_key(group_kind, info) == group_drill]
                 
                 # Tính toán phân trang
-                total_procs = len(procs_sorted)
+                total_procs = len(filtered_processes)
                 max_page = max(0, (total_procs - 1) // processes_per_page)
                 current_page = min(current_page, max_page)
+
+                # Chỉ chọn top-k đủ cho các trang đến trang hiện tại
+                sort_column = SORT_COLUMNS[sort_index]
+                needed = (current_page + 1) * processes_per_page
+                new_view_key = (new_filter_key, sort_index, sort_descending, needed)
+                if tree_mode:
+                    # Chỉ mục cây cập nhật tăng dần theo snapshot; anh em xếp theo cột đang chọn
+                    if tree_seq != snapshot.seq:
+                        tree_seq = snapshot.seq
+                        tree.update(snapshot.processes)
+                        collapsed.intersection_update(tree.parent)
+                    new_view_key = (new_filter_key, sort_index, sort_descending, 'tree')
+                    if new_view_key != view_key:
+                        view_key = new_view_key
+                        by_pid = {info['pid']: info for info in snapshot.processes}
+                        # Cột I/O cần tầng đắt cho mọi tiến trình: trong cây xếp theo PID
+                        column_key = sort_column.key if not sort_column.needs_details else SORT_COLUMNS[-1].key
+                        sign = -1 if sort_descending else 1
+                        order = tree.flatten(lambda pid: (column_key(by_pid[pid]), sign * pid),
+                                             sort_descending, collapsed)
+                        tree_meta = {pid: (depth, has_children) for pid, depth, has_children in order}
+                        last_processes = [by_pid[pid] for pid, _, _ in order
+                                          if process_filter.matches(by_pid[pid])]
+                        filtered_processes = last_processes
+                        total_procs = len(filtered_processes)
+                        max_page = max(0, (total_procs - 1) // processes_per_page)
+                        current_page = min(current_page, max_page)
+                elif group_list:
+                    # Một lượt duyệt snapshot cho mọi nhóm; bộ lọc và cột sắp xếp áp lên dòng nhóm
+                    if groups_seq != snapshot.seq:
+                        groups_seq = snapshot.seq
+                        groups = aggregator.update(snapshot.processes, snapshot.timestamp)
+                    if new_view_key != view_key:
+                        view_key = new_view_key
+                        filtered_processes = process_filter.filter(groups)
+                        total_procs = len(filtered_processes)
+                        max_page = max(0, (total_procs - 1) // processes_per_page)
+                        current_page = min(current_page, max_page)
+                        last_processes = top_processes(filtered_processes, sort_column, sort_descending, needed)
+                elif new_view_key != view_key:
+                    view_key = new_view_key
+                    rows = filtered_processes
+                    if sort_column.needs_details:
+                        rows = sampler.enrich(rows, snapshot)
+                    last_processes = top_processes(rows, sort_column, sort_descending, needed)
+                procs_sorted = last_processes
                 start_idx = current_page * processes_per_page
                 end_idx = min(start_idx + processes_per_page, total_procs)
                 
                 # Đảm bảo selected_row hợp lệ
                 selected_row = min(selected_row, total_procs - 1) if total_procs > 0 else 0
                 
-                # 7. Vẽ danh sách tiến trình
+                # 7. Vẽ danh sách tiến trình (username/threads/I/O chỉ lấy cho các dòng này)
                 row = table_start_row + 1
-                for idx in range(start_idx, end_idx):
-                    if row >= max_y - 2:
-                        break
-                    
-                    p = procs_sorted[idx]
+                end_idx = min(end_idx, start_idx + max(0, max_y - 2 - row))
+                if group_list:
+                    for idx, g in enumerate(procs_sorted[start_idx:end_idx], start_idx):
+                        attr = curses.color_pair(get_color_for_percentage(max(g['cpu_percent'], g['memory_percent'])))
+                        if idx == selected_row:
+                            attr = curses.color_pair(5) | curses.A_BOLD
+                        line = (f"{g['count']:>6} {g['cpu_percent']:>7.1f} {g['memory_percent']:>6.1f} {g['num_threads']:>6}"
+                                f"{format_bytes(g['io_read_rate']):>9}{format_bytes(g['io_write_rate']):>9}  {g['name']}")
+                        frame.add(row, 0, line, attr)
+                        row += 1
+                visible = [] if group_list else sampler.enrich(procs_sorted[start_idx:end_idx], snapshot)
+                for idx, p in enumerate(visible, start_idx):
                     user = p['username'] if p['username'] else 'N/A'
                     user_str = user[:8]
                     cmd_str = p['name'][:16]
@@ -341,37 +613,54 @@ def show_process_monitor(stdscr):
                     
                     # Highlight tiến trình được chọn
                     attr = curses.color_pair(color)
+                    is_marked = (p['pid'], p['create_time']) in marked
+                    if is_marked:
+                        attr = curses.color_pair(2) | curses.A_BOLD
                     if idx == selected_row:
                         attr = curses.color_pair(5) | curses.A_BOLD
                     
-                    line = f"{p['pid']:<8}{user_str:<10}{p['cpu_percent']:>6.1f} {p['memory_percent']:>6.1f}{status_str:<7}{runtime_str:<9}{p['num_threads']:>4}{format_bytes(p['io_read_bytes']):>8}{format_bytes(p['io_write_bytes']):>8} {cmd_str:<18}"
-                    
-                    try:
-                        stdscr.addstr(row, 0, line[:max_x-1], attr)
-                    except curses.error:
-                        pass
+                    mem_rate_str = format_rate(p['rss_rate'])
+                    spark_str = sparkline(p['cpu_history'])
+                    cpu, mem, threads = p['cpu_percent'], p['memory_percent'], p['num_threads']
+                    if tree_mode:
+                        depth, has_children = tree_meta.get(p['pid'], (0, False))
+                        folded = has_children and p['pid'] in collapsed
+                        if folded:
+                            # Nút thu gọn hiển thị tổng của cả cây con (như htop)
+                            cpu, mem, threads, _ = tree.total[p['pid']]
+                        marker = ("▸ " if folded else "▾ ") if has_children else "  "
+                        cmd_str = "  " * depth + marker + cmd_str
+                    line = f"{p['pid']:<7}{'*' if is_marked else ' '}{user_str:<10}{cpu:>6.1f} {mem:>6.1f}{mem_rate_str:>8} {status_str:<7}{runtime_str:<9}{int(threads):>4}{format_bytes(p['io_read_rate']):>8}{format_bytes(p['io_write_rate']):>8} {spark_str} {cmd_str:<18}"
+                    frame.add(row, 0, line, attr)
                     row += 1
                 
                 # 8. Vẽ footer với thông tin phân trang và hướng dẫn
                 footer_row = max_y - 2
-                try:
-                    page_info = f"Page {current_page + 1}/{max_page + 1} | Total: {total_procs} processes | Selected: {selected_row + 1}/{total_procs if total_procs > 0 else 0}"
-                    stdscr.addstr(footer_row, 0, page_info, curses.A_DIM)
-                except curses.error:
-                    pass
+                sort_arrow = "▼" if sort_descending else "▲"
+                view_label = " (tree)" if tree_mode else ""
+                noun = "groups" if group_list else "processes"
+                page_info = f"Page {current_page + 1}/{max_page + 1} | Total: {total_procs} {noun} | Selected: {selected_row + 1}/{total_procs if total_procs > 0 else 0} | Sort: {sort_column.label} {sort_arrow}{view_label} (o/I)"
+                frame.add(footer_row, 0, page_info, curses.A_DIM)
                 
                 footer_row += 1
-                try:
-                    controls = "↑↓:Select | PgUp/PgDn:Page | k:Kill | t:Term | s:Stop | C:Cont | q:Quit"
-                    stdscr.addstr(footer_row, 0, controls[:max_x-1], curses.A_DIM)
-                except curses.error:
-                    pass
-                
-                # 9. Cập nhật màn hình
-                stdscr.refresh()
+                if group_list:
+                    controls = f"Grouped by {group_kind} | Enter:Members | G:Next grouping | q:Quit"
+                elif marked:
+                    controls = f"Marked: {len(marked)} | k/t/s/C:Signal marked | Space:Toggle | a:Mark all | u:Unmark"
+                elif group_drill is not None:
+                    controls = f"Group {group_kind}={group_drill} | Backspace:Groups | k:Kill | t:Term | s:Stop | C:Cont | G:Next grouping"
+                elif tree_mode and selected_row < len(last_processes) and last_processes[selected_row]['pid'] in tree:
+                    pid = last_processes[selected_row]['pid']
+                    cpu, mem, threads, count = tree.total[pid]
+                    controls = (f"Subtree {pid}: {count} procs | CPU {cpu:.1f}% | MEM {mem:.1f}% | THR {int(threads)}"
+                                f" | Enter:Fold | S:Signal subtree | T:List")
+                else:
+                    controls = ("↑↓:Select | Space:Mark | k:Kill | t:Term | s:Stop | C:Cont | g:Pgrp"
+                                " | T:Tree | G:Group | q:Quit")
+                frame.add(footer_row, 0, controls, curses.A_DIM)
                 
-                # 10. Chờ theo refresh interval
-                time.sleep(refresh_interval)
+                # 9. Cập nhật màn hình: chỉ ghi những dòng khác khung trước
+                renderer.render(frame)
                 
             except curses.error as e:
                 # Xử lý lỗi curses cụ thể trong vòng lặp
@@ -399,6 +688,9 @@ def show_process_monitor(stdscr):
         print("\n📋 Chi tiết lỗi:")
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if sampler is not None:
+            sampler.stop()
 
 
 def get_color_for_percentage(percentage: float) -> int:
@@ -411,63 +703,6 @@ def get_color_for_percentage(percentage: float) -> int:
         return 3  # Xanh
 
 
-def send_signal_to_selected(stdscr, processes: List[Dict], selected_idx: int, sig: int, sig_name: str):
-    """Gửi tín hiệu tới tiến trình được chọn"""
-    if not processes or selected_idx >= len(processes):
-        return
-    
-    proc_info = processes[selected_idx]
-    pid = proc_info['pid']
-    
-    # Hiển thị hộp thoại xác nhận
-    max_y, max_x = stdscr.getmaxyx()
-    msg_lines = [
-        "┌─────────────────────────────────────────┐",
-        f"│ Send {sig_name} to process?            │",
-        f"│ PID: {pid:<6} Name: {proc_info['name'][:15]:<15} │",
-        "│                                         │",
-        "│ Press 'y' to confirm, any key to cancel│",
-        "└─────────────────────────────────────────┘"
-    ]
-    
-    start_y = (max_y - len(msg_lines)) // 2
-    start_x = (max_x - len(msg_lines[0])) // 2
-    
-    # Vẽ hộp thoại
-    for i, line in enumerate(msg_lines):
-        try:
-            stdscr.addstr(start_y + i, start_x, line, curses.color_pair(4) | curses.A_BOLD)
-        except curses.error:
-            pass
-    
-    stdscr.refresh()
-    
-    # Đợi xác nhận
-    stdscr.nodelay(False)
-    key = stdscr.getch()
-    stdscr.nodelay(True)
-    
-    if key == ord('y') or key == ord('Y'):
-        try:
-            os.kill(pid, sig)
-            result_msg = f"✓ Sent {sig_name} to PID {pid}"
-        except ProcessLookupError:
-            result_msg = f"✗ Process {pid} not found"
-        except PermissionError:
-            result_msg = f"✗ Permission denied for PID {pid}"
-        except Exception as e:
-            result_msg = f"✗ Error: {e}"
-        
-        # Hiển thị kết quả
-        try:
-            stdscr.addstr(start_y + 3, start_x + 2, " " * (len(msg_lines[0]) - 4))
-            stdscr.addstr(start_y + 3, start_x + 2, result_msg[:len(msg_lines[0]) - 4])
-        except curses.error:
-            pass
-        stdscr.refresh()
-        time.sleep(1.5)
-
-
 def show_help(stdscr):
     """Hiển thị màn hình help"""
     stdscr.clear()
@@ -483,10 +718,12 @@ def show_help(stdscr):
         "  USER        - Process owner",
         "  %CPU        - CPU usage percentage",
         "  %MEM        - Memory usage percentage",
+        "  MEM/s       - RSS growth per second over the history window",
         "  STATUS      - Process state (Run/Sleep/Stop/etc.)",
         "  RUNTIME     - How long process has been running",
         "  THR         - Number of threads",
-        "  I/O R/W     - Disk read/write bytes",
+        "  R/s, W/s    - Disk read/write bytes per second",
+        "  CPU HIST    - %CPU sparkline of the last samples",
         "  COMMAND     - Process name",
         "",
         "NAVIGATION:",
@@ -494,20 +731,53 @@ def show_help(stdscr):
         "  PgUp/PgDn   - Navigate pages",
         "",
         "SIGNALS:",
-        "  k           - Send SIGKILL to selected process",
-        "  t           - Send SIGTERM to selected process",
-        "  s           - Send SIGSTOP to selected process",
-        "  C (Shift+C) - Send SIGCONT to selected process",
+        "  Space       - Mark/unmark selected process",
+        "  a / u       - Mark all processes matching the filter / clear marks",
+        "  k           - Send SIGKILL to marked (or selected) processes",
+        "  t           - Send SIGTERM to marked (or selected) processes",
+        "  s           - Send SIGSTOP to marked (or selected) processes",
+        "  C (Shift+C) - Send SIGCONT to marked (or selected) processes",
+        "  g           - Send a signal to the selected process's process group",
+        "  Confirm with y; the result is shown on the Filter line",
         "",
         "FILTERING:",
+        "  f           - Edit filter expression, e.g.",
+        "                user=postgres && cpu>5 && name~/^python/ && status!=sleep",
+        "                fields: name user status cgroup pid ppid cpu mem rss threads",
+        "                ops: = != > >= < <= ~ (substring or /regex/) !~; && || ! ( )",
+        "  F (Shift+f) - Save current filter as a preset, use it as @name",
         "  /           - Filter by process name",
         "  c           - Filter by minimum CPU usage (%)",
         "  m           - Filter by minimum Memory usage (%)",
         "  r           - Reset all filters",
         "",
+        "SORTING:",
+        "  o           - Cycle sort column (%CPU/%MEM/I/O/THR/RUNTIME/PID)",
+        "  I (Shift+i) - Reverse sort direction",
+        "",
+        "TREE VIEW:",
+        "  T (Shift+t) - Toggle process tree / flat list",
+        "  Enter       - Collapse/expand selected process",
+        "  S (Shift+s) - Send a signal to the whole subtree",
+        "  Collapsed rows show subtree totals for %CPU/%MEM/THR",
+        "",
+        "GROUPING:",
+        "  G (Shift+g) - Group by user -> command name -> cgroup -> off",
+        "  Enter       - Show the processes of the selected group",
+        "  Backspace   - Back to the group list",
+        "",
+        "REPLAY (pmon --replay FILE):",
+        "  space       - Pause/resume playback",
+        "  ←/→         - Seek 10 samples back/forward",
+        "  , / .       - Step one sample back/forward (pauses)",
+        "  g           - Go to time (HH:MM[:SS])",
+        "  +/-         - Playback speed",
+        "",
         "DISPLAY:",
         "  +/=         - Increase refresh interval",
         "  -/_         - Decrease refresh interval",
+        "  P (Shift+p) - Show/hide system panel: load, swap, per-core CPU,",
+        "                disk read/write per device, network rx/tx per interface",
         "",
         "OTHER:",
         "  h           - Show this help",
@@ -537,10 +807,10 @@ def show_help(stdscr):
     stdscr.getch()
 
 
-def start_tui():
+def start_tui(source=None):
     """Hàm bao bọc để khởi động và dọn dẹp curses an toàn."""
     try:
-        curses.wrapper(show_process_monitor)
+        curses.wrapper(show_process_monitor, source)
     except curses.error as e:
         print(f"\n❌ Lỗi Curses: Không thể khởi động giao diện.")
         print(f"   Chi tiết: {e}")
@@ -1,6 +1,9 @@
 
 import psutil
+from typing import Dict, Iterable, Optional, Tuple
+
 from . import log
+from .procfs import read_cgroup
 
 
 def get_process_status(pid: int) -> str:
@@ -25,4 +28,104 @@ def get_process_status(pid: int) -> str:
         return "Terminated"
     except Exception as e:
         log.error(f"Error getting status for PID {pid}: {e}")
-        return "Unknown"
\ No newline at end of file
+        return "Unknown"
+
+def get_group_usage(pids: Iterable[int]) -> Tuple[float, int]:
+    """Tổng CPU time (giây, user+system) và RSS (bytes) của các tiến trình còn sống."""
+    cpu_time, rss = 0.0, 0
+    for pid in pids:
+        try:
+            p = psutil.Process(pid)
+            with p.oneshot():
+                times = p.cpu_times()
+                cpu_time += times.user + times.system
+                rss += p.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    return cpu_time, rss
+
+
+def format_bytes(bytes_val: int) -> str:
+    """Format bytes thành dạng dễ đọc"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if bytes_val < 1024.0:
+            return f"{bytes_val:.1f}{unit}"
+        bytes_val /= 1024.0
+    return f"{bytes_val:.1f}TB"
+
+
+def get_process_summary(proc: psutil.Process, extended: bool = False) -> Optional[Dict]:
+    """Tầng rẻ: đủ để lọc và sắp xếp toàn bộ danh sách tiến trình (extended: thêm user/I/O/cgroup để gộp nhóm)"""
+    try:
+        with proc.oneshot():
+            info = {
+                'pid': proc.pid,
+                'ppid': proc.ppid(),
+                'cpu_percent': proc.cpu_percent(interval=0),
+                'memory_percent': proc.memory_percent(),
+                'rss': proc.memory_info().rss,
+                'name': proc.name(),
+                'status': proc.status(),
+                'num_threads': proc.num_threads(),
+                'create_time': proc.create_time(),
+            }
+            if extended:
+                info['username'] = proc.username()
+                try:
+                    io_counters = proc.io_counters()
+                    info['io_read_bytes'] = io_counters.read_bytes
+                    info['io_write_bytes'] = io_counters.write_bytes
+                except (psutil.AccessDenied, AttributeError):
+                    info['io_read_bytes'] = 0
+                    info['io_write_bytes'] = 0
+                info['cgroup'] = read_cgroup(proc.pid)
+            return info
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+def get_process_details(pid: int, create_time: float) -> Optional[Dict]:
+    """Tầng đắt (username, I/O), chỉ lấy cho các dòng đang hiển thị"""
+    try:
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            if proc.create_time() != create_time:
+                return None   # pid đã bị tái sử dụng
+            details = {'username': proc.username()}
+            try:
+                io_counters = proc.io_counters()
+                details['io_read_bytes'] = io_counters.read_bytes
+                details['io_write_bytes'] = io_counters.write_bytes
+            except (psutil.AccessDenied, AttributeError):
+                details['io_read_bytes'] = 0
+                details['io_write_bytes'] = 0
+            return details
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+def get_process_info(proc: psutil.Process) -> Optional[Dict]:
+    """Lấy thông tin chi tiết của một tiến trình"""
+    try:
+        with proc.oneshot():
+            info = {
+                'pid': proc.pid,
+                'username': proc.username(),
+                'cpu_percent': proc.cpu_percent(interval=0),
+                'memory_percent': proc.memory_percent(),
+                'name': proc.name(),
+                'num_threads': proc.num_threads(),
+                'status': proc.status(),
+                'create_time': proc.create_time(),
+            }
+            # Lấy thông tin I/O nếu có thể
+            try:
+                io_counters = proc.io_counters()
+                info['io_read_bytes'] = io_counters.read_bytes
+                info['io_write_bytes'] = io_counters.write_bytes
+            except (psutil.AccessDenied, AttributeError):
+                info['io_read_bytes'] = 0
+                info['io_write_bytes'] = 0
+            return info
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
@@ -0,0 +1,123 @@
+# spawn.py
+# khoi chay tien trinh con cho MiniShell Plus, khong dung preexec_fn
+
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# Popen(process_group=...) có từ Python 3.11. Khi không có preexec_fn,
+# CPython dùng vfork/clone nên độ trễ không phụ thuộc RSS của shell.
+HAS_PROCESS_GROUP = sys.version_info >= (3, 11)
+# wait(timeout) của tiến trình posix_spawn kiểm tra lại sau mỗi khoảng này (giây)
+WAIT_POLL_INTERVAL = 0.005
+
+
+def _exit_code(status: int) -> int:
+    # os.waitstatus_to_exitcode chỉ có từ 3.9
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+class PosixSpawnProcess:
+    """
+    Tiến trình khởi chạy bằng os.posix_spawn(setpgroup=...) cho Python < 3.11: không fork
+    cả shell và không chạy mã Python nào trong tiến trình con, nên an toàn khi shell đã có
+    luồng (sampler, spool, parallel). Có phần giao diện của Popen mà shell dùng:
+    pid, returncode, stdin/stdout/stderr, poll(), wait(), send_signal(), terminate(), kill().
+    """
+
+    def __init__(self, args, executable=None, stdin=None, stdout=None, stderr=None, pgid=0):
+        self.args = args
+        self.returncode = None
+        self.stdin = self.stdout = self.stderr = None
+        file_actions = []
+        child_ends = []       # đầu pipe/devnull của tiến trình con, đóng ở shell sau khi spawn
+        parent_ends = []      # (tên thuộc tính, fd, mode) cho subprocess.PIPE
+        try:
+            for target, spec, mode in ((0, stdin, "wb"), (1, stdout, "rb"), (2, stderr, "rb")):
+                if spec is None:
+                    continue
+                if spec == subprocess.STDOUT and target == 2:
+                    file_actions.append((os.POSIX_SPAWN_DUP2, 1, 2))
+                    continue
+                if spec == subprocess.PIPE:
+                    r, w = os.pipe()
+                    child, parent = (r, w) if target == 0 else (w, r)
+                    child_ends.append(child)
+                    parent_ends.append((("stdin", "stdout", "stderr")[target], parent, mode))
+                    fd = child
+                elif spec == subprocess.DEVNULL:
+                    fd = os.open(os.devnull, os.O_RDWR)
+                    child_ends.append(fd)
+                else:
+                    fd = spec if isinstance(spec, int) else spec.fileno()
+                file_actions.append((os.POSIX_SPAWN_DUP2, fd, target))
+
+            self.pid = os.posix_spawn(executable or args[0], list(args), os.environ,
+                                      file_actions=file_actions, setpgroup=pgid)
+        except BaseException:
+            for _, fd, _ in parent_ends:
+                os.close(fd)
+            raise
+        finally:
+            for fd in child_ends:
+                os.close(fd)
+        for name, fd, mode in parent_ends:
+            setattr(self, name, open(fd, mode))
+
+    def poll(self):
+        if self.returncode is None:
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                # Đã được thu hồi ở nơi khác (vd. waitpid của fg): như Popen, coi như thoát 0
+                self.returncode = 0
+            else:
+                if pid:
+                    self.returncode = _exit_code(status)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if self.returncode is not None:
+            return self.returncode
+        if timeout is None:
+            try:
+                _, status = os.waitpid(self.pid, 0)
+                self.returncode = _exit_code(status)
+            except ChildProcessError:
+                self.returncode = 0
+            return self.returncode
+        deadline = time.monotonic() + timeout
+        while self.poll() is None:
+            if time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            time.sleep(WAIT_POLL_INTERVAL)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            os.kill(self.pid, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+def spawn_process(args, executable=None, stdin=None, stdout=None, stderr=None, pgid=0):
+    """
+    Khởi chạy args trong process group pgid (0 = tạo group mới với pgid = pid con).
+    Trả về subprocess.Popen (hoặc PosixSpawnProcess trên Python cũ) để job manager
+    dùng poll()/wait() như trước.
+    """
+    if not HAS_PROCESS_GROUP:
+        # Python cũ: posix_spawn đặt process group ngay trong lúc spawn, không cần preexec_fn
+        return PosixSpawnProcess(args, executable=executable, stdin=stdin, stdout=stdout,
+                                 stderr=stderr, pgid=pgid)
+
+    return subprocess.Popen(args, executable=executable, stdin=stdin, stdout=stdout,
+                            stderr=stderr, process_group=pgid)
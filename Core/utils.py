@@ -1,21 +1,17 @@
-import os, shlex
+import os
 
-def build_popen_args(cmd_str):
-    tokens = shlex.split(cmd_str)
-    args, stdin_f, stdout_f = [], None, None
-    i = 0
-    while i < len(tokens):
-        tok = tokens[i]
-        if tok == "<":
-            stdin_f = open(os.path.expanduser(tokens[i+1]), "rb")
-            i += 2
-        elif tok == ">":
-            stdout_f = open(os.path.expanduser(tokens[i+1]), "wb")
-            i += 2
-        elif tok == ">>":
-            stdout_f = open(os.path.expanduser(tokens[i+1]), "ab")
-            i += 2
+_OPEN_MODES = {"<": "rb", ">": "wb", ">>": "ab"}
+
+
+def build_popen_args(cmd):
+    """Mở các file redirect của một stage (Command) đã parse."""
+    args, stdin_f, stdout_f = list(cmd.argv), None, None
+    for redir in cmd.redirects:
+        f = open(os.path.expanduser(redir.target), _OPEN_MODES[redir.op])
+        if redir.op == "<":
+            if stdin_f: stdin_f.close()
+            stdin_f = f
         else:
-            args.append(tok)
-            i += 1
+            if stdout_f: stdout_f.close()
+            stdout_f = f
     return args, stdin_f, stdout_f
@@ -0,0 +1,95 @@
+# benchmarks/bench_alerts.py
+# Chi phi danh gia luat canh bao cua pmon moi snapshot: AlertEngine tang dan (chi
+# dua cac dong doi qua luat) so voi cung cac luat nhung moi tick dua moi tien trinh qua
+# moi luat (cach vong lap ps), va so voi chi loc lai danh sach (khong co trang thai).
+#
+#   python benchmarks/bench_alerts.py [PROCESSES] [TICKS] [CHANGED_PERCENT]
+
+import gc
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor import log
+from Core.process_monitor.alerts import AlertEngine, AlertRule
+from Core.process_monitor.sampler import Snapshot
+
+NAMES = ("python3", "postgres", "nginx", "bash", "java", "node", "sshd")
+STATUSES = ("sleeping", "running", "idle", "zombie")
+
+
+def make_rules():
+    return [AlertRule("cpu-hog", "cpu>90", duration=30),
+            AlertRule("java-hog", "name~java && cpu>50 && threads>100", duration=10),
+            AlertRule("leak", rss_growth=100 << 20),
+            AlertRule("zombies", "status=zombie", count=500),
+            AlertRule("big", "rss>2G", duration=60)]
+
+
+def make_ticks(n, ticks, changed_percent):
+    rng = random.Random(0)
+    procs = [{'pid': pid, 'ppid': 1, 'name': rng.choice(NAMES), 'status': rng.choice(STATUSES),
+              'cpu_percent': rng.expovariate(0.2), 'memory_percent': rng.uniform(0, 2),
+              'rss': rng.randrange(1 << 20, 1 << 31), 'num_threads': rng.randint(1, 200),
+              'create_time': 0.0} for pid in range(1, n + 1)]
+    snapshots = []
+    for seq in range(ticks):
+        for i in rng.sample(range(n), n * changed_percent // 100):
+            procs[i] = {**procs[i], 'cpu_percent': rng.expovariate(0.2),
+                        'rss': procs[i]['rss'] + rng.randrange(0, 1 << 22)}
+        snapshots.append(Snapshot(seq, 1000.0 + seq, 0.0, 0.0, tuple(procs), 0.0))
+    return snapshots
+
+
+def full_scan(rules, snapshot):
+    # Cách cũ: mọi tiến trình qua mọi luật mỗi lần (cùng trạng thái for/cửa sổ RSS/đếm)
+    for rule in rules:
+        rule.update(snapshot.processes, (), snapshot.timestamp)
+        rule.due(snapshot.timestamp)
+
+
+def filter_only(rules, snapshot):
+    # Cận dưới của mọi cách quét lại: chỉ lọc, không giữ trạng thái nào
+    return [rule.filter.filter(snapshot.processes) for rule in rules]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    changed_percent = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    log.setLevel(logging.ERROR)
+    snapshots = make_ticks(n, ticks, changed_percent)
+    # Watchdog thật chỉ giữ một hai snapshot; không để GC quét lại cả chuỗi snapshot dựng sẵn
+    gc.collect()
+    gc.freeze()
+    print(f"processes: {n}, ticks: {ticks}, changed rows/tick: {changed_percent}%, rules: {len(make_rules())}")
+
+    def per_tick(fn):
+        rules = make_rules()
+        fn(rules, snapshots[0])
+        start = time.perf_counter()
+        for snapshot in snapshots[1:]:
+            fn(rules, snapshot)
+        return (time.perf_counter() - start) / (ticks - 1)
+
+    scan = per_tick(full_scan)
+    filtered = per_tick(filter_only)
+
+    engine = AlertEngine(make_rules())
+    engine.evaluate(snapshots[0])     # lượt đầu: mọi dòng đều mới
+    start = time.perf_counter()
+    for snapshot in snapshots[1:]:
+        engine.evaluate(snapshot)
+    incremental = (time.perf_counter() - start) / (ticks - 1)
+
+    print(f"  every row through rules {scan * 1e3:7.2f} ms/tick")
+    print(f"  filter only (stateless) {filtered * 1e3:7.2f} ms/tick")
+    print(f"  AlertEngine incremental {incremental * 1e3:7.2f} ms/tick   ({scan / incremental:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
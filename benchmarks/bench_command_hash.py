@@ -0,0 +1,44 @@
+# benchmarks/bench_command_hash.py
+# So sanh shutil.which voi bang hash lenh khi tra cuu nhieu lan.
+#
+#   python benchmarks/bench_command_hash.py [N]
+
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.command_hash import CommandHashTable
+
+COMMANDS = ["ls", "grep", "cat", "sed", "awk", "sort", "head", "tail", "wc", "find"]
+
+
+def bench(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(COMMANDS[i % len(COMMANDS)])
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    table = CommandHashTable()
+
+    t0 = time.perf_counter()
+    table.lookup("ls")
+    build = time.perf_counter() - t0
+
+    t_which = bench(shutil.which, n)
+    t_hash = bench(table.lookup, n)
+
+    print(f"PATH dirs: {len(os.environ.get('PATH', '').split(os.pathsep))}, lookups: {n}")
+    print(f"  initial scandir build     {build * 1e3:8.2f} ms")
+    print(f"  shutil.which              {t_which / n * 1e6:8.2f} us/lookup")
+    print(f"  CommandHashTable.lookup   {t_hash / n * 1e6:8.2f} us/lookup")
+    print(f"  speedup                   {t_which / t_hash:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_exporter.py
+# Chay MetricsServer that tren localhost (port tu chon), scrape /metrics qua HTTP va kiem tra
+# noi dung (dinh dang text Prometheus, gioi han series, user "__other__"); do chi phi dung trang
+# moi snapshot so voi chi phi moi lan scrape (tra bytes dung san).
+#
+#   python benchmarks/bench_exporter.py [PROCESSES] [SCRAPES]
+
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor.exporter import (CONTENT_TYPE, DEFAULT_TOP_K, MAX_USERS, OTHER_USER,
+                                           MetricsExporter, MetricsServer)
+from Core.process_monitor.sampler import Snapshot
+
+NAMES = ("python3", "postgres", "nginx", "bash", "java", "node", "sshd")
+STATUSES = ("sleeping", "running", "idle", "zombie")
+
+
+def make_snapshot(n, seq, users):
+    rng = random.Random(seq)
+    procs = tuple({'pid': pid, 'ppid': 1, 'name': rng.choice(NAMES), 'status': rng.choice(STATUSES),
+                   'username': users[pid % len(users)],
+                   'cpu_percent': rng.expovariate(0.2), 'memory_percent': rng.uniform(0, 2),
+                   'num_threads': rng.randint(1, 200), 'create_time': 0.0,
+                   'io_read_bytes': seq * pid, 'io_write_bytes': seq * pid}
+                  for pid in range(1, n + 1))
+    return Snapshot(seq, 1000.0 + seq, 12.5, 40.0, procs, 0.01)
+
+
+def scrape(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.status, response.headers['Content-Type'], response.read().decode()
+
+
+def series(body, metric):
+    return [line for line in body.splitlines() if line.startswith(metric + "{") or line.startswith(metric + " ")]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    scrapes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    # Một user thật tên "other" không được bị gộp chung với phần dư
+    users = ["other"] + [f"user{i}" for i in range(MAX_USERS * 2)]
+    exporter = MetricsExporter()
+    server = MetricsServer(exporter, "127.0.0.1", 0)
+    server.start()
+    host, port = server.address
+    url = f"http://{host}:{port}/metrics"
+    try:
+        status, _, body = scrape(url)
+        assert status == 200 and body == "# no samples yet\n", body
+
+        start = time.perf_counter()
+        for seq in range(1, 4):
+            exporter.update(make_snapshot(n, seq, users))
+        build = (time.perf_counter() - start) / 3
+
+        status, content_type, body = scrape(url)
+        assert status == 200 and content_type == CONTENT_TYPE
+        assert series(body, "pmon_processes") == [f"pmon_processes {n}"]
+        for metric in ("pmon_top_cpu_percent", "pmon_top_memory_percent"):
+            values = series(body, metric)
+            assert len(values) == DEFAULT_TOP_K and all(v.startswith(metric + '{rank="') for v in values), values
+            assert all('pid=' not in v for v in series(body, metric + "_info"))
+        user_series = series(body, "pmon_user_processes")
+        assert len(user_series) == MAX_USERS, len(user_series)
+        assert sum(f'user="{OTHER_USER}"' in v for v in user_series) == 1
+        total = sum(float(v.rsplit(" ", 1)[1]) for v in user_series)
+        assert total == n, total
+        for line in body.splitlines():
+            if not line.startswith("#"):
+                float(line.rsplit(" ", 1)[1])     # mọi mẫu phải kết thúc bằng một số
+
+        try:
+            scrape(f"http://{host}:{port}/nope")
+            raise AssertionError("expected 404")
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+
+        start = time.perf_counter()
+        for _ in range(scrapes):
+            scrape(url)
+        per_scrape = (time.perf_counter() - start) / scrapes
+    finally:
+        server.stop()
+
+    print(f"processes: {n}, page: {len(body)} bytes, {len(body.splitlines())} lines (localhost:{port})")
+    print(f"  render per snapshot   {build * 1e3:7.2f} ms")
+    print(f"  HTTP scrape           {per_scrape * 1e3:7.2f} ms   ({scrapes} scrapes, cached bytes)")
+
+
+if __name__ == "__main__":
+    main()
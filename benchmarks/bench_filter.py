@@ -0,0 +1,77 @@
+# benchmarks/bench_filter.py
+# Chi phi loc moi tick cua pmon tren bang tien trinh gia lap: ProcessFilter cu
+# (.lower() ca hai chuoi cho moi dong) so voi bieu thuc loc da bien dich, goi tung
+# dong (matches) va loc ca danh sach mot lan (filter).
+#
+#   python benchmarks/bench_filter.py [PROCESSES] [ROUNDS]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor.filters import ProcessFilter
+
+NAMES = ("python3", "postgres", "nginx", "bash", "Chrome", "java", "node", "sshd")
+USERS = ("root", "postgres", "www-data", "alice")
+STATUSES = ("sleeping", "running", "idle", "disk-sleep")
+
+
+class LegacyFilter:
+    """ProcessFilter trước khi có biểu thức lọc (chuỗi con tên + hai ngưỡng)."""
+
+    def __init__(self, name_filter, cpu_threshold, mem_threshold):
+        self.name_filter = name_filter
+        self.cpu_threshold = cpu_threshold
+        self.mem_threshold = mem_threshold
+
+    def matches(self, proc_info):
+        if self.name_filter and self.name_filter.lower() not in proc_info['name'].lower():
+            return False
+        if proc_info['cpu_percent'] < self.cpu_threshold:
+            return False
+        if proc_info['memory_percent'] < self.mem_threshold:
+            return False
+        return True
+
+
+def make_processes(n):
+    rng = random.Random(0)
+    return tuple({'pid': pid, 'ppid': 1, 'name': f"{rng.choice(NAMES)}-{pid % 13}",
+                  'username': rng.choice(USERS), 'status': rng.choice(STATUSES),
+                  'cpu_percent': rng.expovariate(0.5), 'memory_percent': rng.uniform(0, 2),
+                  'rss': rng.randrange(1 << 20, 1 << 30), 'num_threads': rng.randint(1, 200),
+                  'create_time': 0.0} for pid in range(1, n + 1))
+
+
+def timed(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - start) / rounds, len(result)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    procs = make_processes(n)
+
+    legacy = LegacyFilter("python", 1.0, 0.5)
+    simple = ProcessFilter('name~python && cpu>=1 && mem>=0.5')
+    rich = ProcessFilter('user=postgres && cpu>1 && name~/^p/ && status!=sleep && threads>100')
+    cases = [
+        ("legacy matches (name/cpu/mem)", lambda: [p for p in procs if legacy.matches(p)]),
+        ("compiled matches (same filter)", lambda: [p for p in procs if simple.matches(p)]),
+        ("compiled filter  (same filter)", lambda: simple.filter(procs)),
+        ("compiled filter  (5 clauses)", lambda: rich.filter(procs)),
+    ]
+    print(f"processes: {n}, rounds: {rounds}")
+    for label, fn in cases:
+        t, count = timed(fn, rounds)
+        print(f"  {label:32} {t * 1e3:7.2f} ms/tick   ({count} rows matched)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_job_reaping.py
+# Chi phi cap nhat trang thai job truoc moi prompt: poll()+psutil cho tung job (cach cu)
+# so voi cap nhat theo su kien (pidfd + SIGCHLD).
+#
+#   python benchmarks/bench_job_reaping.py [JOBS] [ROUNDS]
+
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.parser import parse_command
+from Core.executor import execute_pipeline
+from Core.process_monitor.monitor import job_manager
+
+
+def legacy_update():
+    for job in job_manager.jobs.values():
+        job.update_status()
+
+
+def bench(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e3
+
+
+def main():
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    job_manager.set_max_concurrent(n_jobs)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    saved = os.dup(1)
+    os.dup2(devnull, 1)
+    try:
+        for _ in range(n_jobs):
+            execute_pipeline(parse_command("sleep 60 &"))
+    finally:
+        os.dup2(saved, 1)
+
+    try:
+        print(f"{n_jobs} background jobs, {rounds} prompts")
+        print(f"  legacy poll()+psutil per job  {bench(legacy_update, rounds):8.3f} ms/prompt")
+        print(f"  event-driven (no events)      {bench(job_manager.update_all_statuses, rounds):8.3f} ms/prompt")
+    finally:
+        for job in list(job_manager.jobs.values()):
+            os.killpg(job.pgid, signal.SIGKILL)
+
+
+if __name__ == "__main__":
+    main()
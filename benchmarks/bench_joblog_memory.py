@@ -0,0 +1,57 @@
+# benchmarks/bench_joblog_memory.py
+# Chay nhieu job nen ghi nhieu stderr/stdout: kiem tra khong bi treo vi pipe day
+# va bo nho cua spool giu duoi JOBLOG_MEMORY_LIMIT.
+#
+#   python benchmarks/bench_joblog_memory.py [JOBS] [MB_PER_JOB]
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.parser import parse_command
+from Core.executor import execute_pipeline
+from Core.process_monitor.monitor import job_manager
+from Core.process_monitor.spool import job_spooler, JOBLOG_MEMORY_LIMIT
+
+
+def main():
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    mb = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    nbytes = mb * 1024 * 1024
+
+    with tempfile.NamedTemporaryFile("w", suffix=".sh", delete=False) as f:
+        f.write(f"head -c {nbytes} /dev/zero >&2\nhead -c {nbytes} /dev/zero\n")
+        script = f.name
+
+    job_manager.set_max_concurrent(n_jobs)
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    start = time.perf_counter()
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    saved = os.dup(1)
+    os.dup2(devnull, 1)
+    try:
+        for _ in range(n_jobs):
+            execute_pipeline(parse_command(f"sh {script} &"))
+    finally:
+        os.dup2(saved, 1)
+        os.close(devnull)
+
+    while job_manager.jobs:
+        time.sleep(0.05)
+        job_manager.update_all_statuses()
+    elapsed = time.perf_counter() - start
+    os.unlink(script)
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0 - base
+    print(f"{n_jobs} jobs x {2 * mb} MB output, all finished in {elapsed:.2f}s")
+    print(f"  spool memory     {job_spooler.memory_usage() / 1024 / 1024:8.2f} MB "
+          f"(limit {JOBLOG_MEMORY_LIMIT / 1024 / 1024:.0f} MB)")
+    print(f"  shell RSS growth {rss:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
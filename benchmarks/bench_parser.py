@@ -0,0 +1,77 @@
+# benchmarks/bench_parser.py
+# Thong luong parse dong lenh: cach cu (shlex 2 lan) vs parser mot luot, co/khong cache.
+#
+#   python benchmarks/bench_parser.py [ROUNDS]
+
+import os
+import shlex
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.parser import parse_command, tokenize
+
+CORPUS = [
+    "ls -la",
+    "cd ~/projects/minishell",
+    "git status",
+    "git log --oneline -n 20",
+    "grep -rn 'TODO' src | sort | uniq -c | sort -rn | head -20",
+    "cat /var/log/syslog | grep -i error | tail -n 50 > errors.txt",
+    "find . -name '*.py' -newer setup.py",
+    "tar czf backup.tar.gz ./data >> backup.log &",
+    'echo "a | b" > out.txt',
+    "ps aux | awk '{print $1}' | sort | uniq -c",
+    "python3 -m pytest -q tests/ 2> /dev/null",
+    "sort < input.txt | uniq > output.txt",
+    "du -sh * | sort -h",
+    'printf "%s\\n" "hello world" | wc -c',
+    "make -j8 all &",
+]
+
+
+def legacy_parse(line):
+    """Cach cu: shlex.shlex de tach pipe, noi lai chuoi, roi shlex.split tung stage."""
+    line = line.strip()
+    background = line.endswith("&")
+    if background:
+        line = line[:-1].strip()
+    segments, cur = [], []
+    for tok in shlex.shlex(line, posix=True):
+        if tok == "|":
+            segments.append(" ".join(cur))
+            cur = []
+        else:
+            cur.append(tok)
+    if cur:
+        segments.append(" ".join(cur))
+    return [shlex.split(s) for s in segments], background
+
+
+def uncached_parse(line):
+    return parse_command.__wrapped__(line)
+
+
+def bench(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for line in CORPUS:
+            fn(line)
+    elapsed = time.perf_counter() - start
+    return rounds * len(CORPUS) / elapsed
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    parse_command.cache_clear()
+    print(f"corpus: {len(CORPUS)} lines x {rounds} rounds")
+    print(f"  legacy shlex x2        {bench(legacy_parse, rounds):12,.0f} lines/s")
+    print(f"  tokenize only          {bench(tokenize, rounds):12,.0f} lines/s")
+    print(f"  single-pass, no cache  {bench(uncached_parse, rounds):12,.0f} lines/s")
+    print(f"  single-pass, LRU cache {bench(parse_command, rounds):12,.0f} lines/s")
+    print(f"  {parse_command.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_pipeline_stream.py
+# Do RSS cua shell khi pipeline foreground ghi ra rat nhieu stdout/stderr.
+#
+#   python benchmarks/bench_pipeline_stream.py [MB]
+#
+# Output cua pipeline duoc dua vao /dev/null o muc fd, nen chi do bo nho cua shell.
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.executor import execute_pipeline
+from Core.parser import parse_command
+
+
+class _NoFdSink:
+    """Stream khong co fileno() de ep executor dung che do relay qua selector."""
+    def __init__(self, fd):
+        self.fd = fd
+
+    def write(self, s):
+        return len(s)
+
+    def flush(self):
+        pass
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    nbytes = size_mb * 1024 * 1024
+
+    with tempfile.NamedTemporaryFile("w", suffix=".sh", delete=False) as f:
+        f.write(f"head -c {nbytes} /dev/zero\nhead -c {nbytes} /dev/zero >&2\n")
+        script = f.name
+
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    saved_out, saved_err = os.dup(1), os.dup(2)
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    results = []
+    try:
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        base = max_rss_mb()
+
+        # 1. Streaming truc tiep ra fd cua terminal
+        execute_pipeline(parse_command(f"sh {script} | cat"))
+        results.append(("stream (direct fds)", max_rss_mb() - base))
+
+        # 2. Relay qua selector theo tung khoi
+        sys.stdout, sys.stderr = _NoFdSink(1), _NoFdSink(2)
+        execute_pipeline(parse_command(f"sh {script} | cat"))
+        sys.stdout, sys.stderr = real_stdout, real_stderr
+        results.append(("stream (selector relay)", max_rss_mb() - base))
+
+        # 3. Cach cu: communicate() buffer toan bo output
+        p = subprocess.Popen(["sh", script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        p.communicate()
+        results.append(("legacy communicate()", max_rss_mb() - base))
+    finally:
+        sys.stdout, sys.stderr = real_stdout, real_stderr
+        os.dup2(saved_out, 1)
+        os.dup2(saved_err, 2)
+        os.close(devnull)
+        os.unlink(script)
+
+    print(f"pipeline output: {size_mb} MB stdout + {size_mb} MB stderr")
+    for name, delta in results:
+        print(f"  {name:<26} max RSS growth: {delta:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_procfs.py
+# So sanh thu thap tien trinh qua psutil voi bo doc /proc truc tiep,
+# o nhieu so luong tien trinh (tao them tien trinh 'sleep' de gia lap).
+# Dong "full" lay ca chi tiet (username/threads/I/O) cho moi tien trinh nhu truoc,
+# dong "+ page" chi lay chi tiet cho mot trang (PAGE_ROWS dong) nhu pmon.
+#
+#   python benchmarks/bench_procfs.py [N1 N2 ...]
+
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor.procfs import ProcfsCollector, procfs_available
+from Core.process_monitor.sampler import PsutilCollector
+
+ROUNDS = 5
+TARGET_PROCESSES = 15000
+PAGE_ROWS = 15
+
+
+def with_details(collector, rows=None):
+    def run():
+        procs = collector.collect()
+        for p in procs[:rows]:
+            collector.details(p['pid'], p['create_time'])
+        return procs
+    return run
+
+
+def bench(fn):
+    fn()  # lần đầu: khởi tạo cache cpu_percent / uid
+    best, count = float("inf"), 0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        count = len(fn())
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main():
+    if not procfs_available():
+        print("/proc not available, nothing to compare")
+        return
+    extras = [int(a) for a in sys.argv[1:]] or [0, 500, 2000]
+    sleepers = []
+    collectors = [("psutil", PsutilCollector()), ("procfs", ProcfsCollector())]
+    try:
+        for extra in extras:
+            while len(sleepers) < extra:
+                sleepers.append(subprocess.Popen(["sleep", "600"]))
+            results = {}
+            for name, collector in collectors:
+                results[name + " full"] = bench(with_details(collector))
+                results[name + " + page"] = bench(with_details(collector, PAGE_ROWS))
+            n = results["psutil full"][1]
+            print(f"processes: {n}")
+            for label, (t, _) in results.items():
+                print(f"  {label:<16}{t * 1e3:8.2f} ms  ({t / n * 1e6:6.1f} us/proc, "
+                      f"est. @{TARGET_PROCESSES} {t / n * TARGET_PROCESSES:6.2f} s)")
+            print(f"  speedup (psutil full -> procfs + page) "
+                  f"{results['psutil full'][0] / results['procfs + page'][0]:6.1f}x")
+    finally:
+        for p in sleepers:
+            p.kill()
+        for p in sleepers:
+            p.wait()
+
+
+if __name__ == "__main__":
+    main()
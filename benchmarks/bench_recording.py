@@ -0,0 +1,90 @@
+# benchmarks/bench_recording.py
+# Kich thuoc va toc do seek cua ban ghi pmon (--record/--replay) voi snapshot gia lap:
+# so byte moi frame so voi NDJSON day du, va thoi gian seek ngau nhien theo thoi gian
+# (bisect tren chi muc mmap + giai ma tu keyframe gan nhat).
+#
+#   python benchmarks/bench_recording.py [PROCESSES] [FRAMES]
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor.sampler import Snapshot
+from Core.process_monitor.recording import RecordingWriter, RecordingReader
+
+CHANGED = 0.05   # tỉ lệ tiến trình đổi %CPU/RSS mỗi frame
+CHURN = 0.005    # tỉ lệ tiến trình kết thúc/được tạo mỗi frame
+SEEKS = 200
+
+
+def make_snapshots(n, frames):
+    rng = random.Random(0)
+    start = time.time() - frames * 1.5
+    procs = {pid: {'pid': pid, 'create_time': start - rng.uniform(0, 86400), 'cpu_percent': 0.0,
+                   'memory_percent': rng.uniform(0, 2), 'rss': rng.randrange(1 << 20, 1 << 30),
+                   'ppid': max(1, pid // 4), 'num_threads': 1,
+                   'status': 'sleeping', 'name': f"worker-{pid % 97}"} for pid in range(1, n + 1)}
+    next_pid = n + 1
+    for f in range(frames):
+        for pid in rng.sample(list(procs), int(n * CHANGED)):
+            p = dict(procs[pid])
+            p['cpu_percent'] = rng.uniform(0, 100)
+            p['rss'] += rng.randrange(-4096, 65536)
+            procs[pid] = p
+        for pid in rng.sample(list(procs), int(n * CHURN)):
+            del procs[pid]
+            procs[next_pid] = {**procs[rng.choice(list(procs))], 'pid': next_pid,
+                               'create_time': start + f * 1.5}
+            next_pid += 1
+        yield Snapshot(f + 1, start + f * 1.5, 12.5, 40.0, tuple(procs.values()), 0.0)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pmr")
+        writer = RecordingWriter(path)
+        ndjson_bytes = 0
+        timestamps = []
+        t_write = 0.0
+        for snapshot in make_snapshots(n, frames):
+            timestamps.append(snapshot.timestamp)
+            ndjson_bytes += sum(len(json.dumps(p)) + 1 for p in snapshot.processes)
+            start = time.perf_counter()
+            writer.write(snapshot)
+            t_write += time.perf_counter() - start
+        writer.close()
+        size = os.path.getsize(path) + os.path.getsize(path + ".idx")
+
+        reader = RecordingReader(path)
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for _ in range(SEEKS):
+            reader._position = None      # seek lạnh: không tận dụng frame đang giữ
+            reader.snapshot(reader.find(rng.uniform(timestamps[0], timestamps[-1])))
+        t_seek = (time.perf_counter() - start) / SEEKS
+
+        start = time.perf_counter()
+        reader._position = None
+        for i in range(frames):          # như một định dạng không có chỉ mục/keyframe
+            reader._apply(i)
+        t_linear = time.perf_counter() - start
+        reader.close()
+
+    print(f"processes: {n}, frames: {frames}, {CHANGED:.0%} changed and {CHURN:.1%} churn per frame")
+    print(f"  recording        {size / frames / 1024:9.1f} KiB/frame   ({size / 1e6:.1f} MB)")
+    print(f"  NDJSON           {ndjson_bytes / frames / 1024:9.1f} KiB/frame   ({ndjson_bytes / 1e6:.1f} MB)")
+    print(f"  ratio            {ndjson_bytes / size:9.1f}x smaller")
+    print(f"  write            {t_write / frames * 1e3:9.2f} ms/frame")
+    print(f"  random seek      {t_seek * 1e3:9.2f} ms   (bisect + decode from keyframe)")
+    print(f"  decode all       {t_linear * 1e3:9.2f} ms   (what seeking to the end costs without an index)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_render.py
+# Dem so byte ghi ra terminal moi khung hinh cua pmon: clear() + ve lai toan bo
+# (cach cu) so voi ScreenRenderer (chi ghi cac dong thay doi).
+# Moi che do chay curses trong mot pty rieng; tien trinh cha dem byte doc duoc.
+#
+#   python benchmarks/bench_render.py [FRAMES]
+
+import curses
+import fcntl
+import os
+import pty
+import random
+import select
+import struct
+import sys
+import termios
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor.render import Frame, ScreenRenderer
+
+ROWS, COLS = 40, 120
+TABLE_ROWS = 30
+CHANGED_ROWS = 3   # số dòng có %CPU đổi mỗi khung (giống một máy đang khá rảnh)
+
+
+def make_lines(cpu):
+    lines = [(0, "MiniShell Process Monitor"),
+             (1, f"CPU: [{sum(cpu) / len(cpu):5.1f}%] " + '█' * int(sum(cpu) / len(cpu) * 0.3)),
+             (2, "MEM: [ 42.0%] " + '█' * 12),
+             (3, "Filter: None (/ for name, c for CPU, m for Memory, r to reset)")]
+    for i, c in enumerate(cpu):
+        lines.append((5 + i, f"{1000 + i:<8}{'root':<10}{c:>6.1f} {1.5:>6.1f}Sleep  01:23:45   4   1.0MB   2.0MB proc-{i}"))
+    lines.append((ROWS - 2, f"Page 1/10 | Total: 150 processes | Selected: 1/150"))
+    return lines
+
+
+def run_frames(mode, frames):
+    def main(stdscr):
+        rng = random.Random(1)
+        cpu = [rng.uniform(0, 5) for _ in range(TABLE_ROWS)]
+        renderer = ScreenRenderer(stdscr)
+        for _ in range(frames):
+            for i in rng.sample(range(TABLE_ROWS), CHANGED_ROWS):
+                cpu[i] = rng.uniform(0, 5)
+            lines = make_lines(cpu)
+            if mode == "clear":
+                stdscr.clear()
+                for row, text in lines:
+                    stdscr.addstr(row, 0, text[:COLS - 1])
+                stdscr.refresh()
+            else:
+                frame = Frame(ROWS, COLS)
+                for row, text in lines:
+                    frame.add(row, 0, text)
+                renderer.render(frame)
+    curses.wrapper(main)
+
+
+def measure(mode, frames):
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.environ["TERM"] = "xterm"
+        os.environ["LINES"], os.environ["COLUMNS"] = str(ROWS), str(COLS)
+        run_frames(mode, frames)
+        os._exit(0)
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", ROWS, COLS, 0, 0))
+    total = 0
+    while True:
+        r, _, _ = select.select([fd], [], [], 5.0)
+        if not r:
+            break
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            break
+        if not data:
+            break
+        total += len(data)
+    os.waitpid(pid, 0)
+    os.close(fd)
+    return total
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{frames} frames, {ROWS}x{COLS}, {CHANGED_ROWS}/{TABLE_ROWS} table rows change per frame")
+    results = {mode: measure(mode, frames) for mode in ("clear", "diff")}
+    for mode, total in results.items():
+        print(f"  {mode:<6} {total:10d} bytes  {total / frames:10.1f} bytes/frame")
+    print(f"  reduction       {results['clear'] / results['diff']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
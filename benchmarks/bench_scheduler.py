@@ -0,0 +1,47 @@
+# benchmarks/bench_scheduler.py
+# Thong luong N job nen ton CPU: scheduler (toi da = so CPU) vs khoi chay khong gioi han.
+#
+#   python benchmarks/bench_scheduler.py [JOBS] [LOOP]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.parser import parse_command
+from Core.executor import execute_pipeline
+from Core.process_monitor.monitor import job_manager, DEFAULT_MAX_CONCURRENT
+
+
+def run_batch(n_jobs, loop, limit):
+    job_manager.set_max_concurrent(limit)
+    line = f"sh -c 'i=0; while [ $i -lt {loop} ]; do i=$((i+1)); done' &"
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    saved = os.dup(1)
+    os.dup2(devnull, 1)
+    start = time.perf_counter()
+    try:
+        for _ in range(n_jobs):
+            execute_pipeline(parse_command(line))
+    finally:
+        os.dup2(saved, 1)
+        os.close(devnull)
+    job_manager.wait_for_jobs()
+    return time.perf_counter() - start
+
+
+def main():
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    loop = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+    t_unbounded = run_batch(n_jobs, loop, n_jobs)
+    t_sched = run_batch(n_jobs, loop, DEFAULT_MAX_CONCURRENT)
+
+    print(f"{n_jobs} CPU-bound jobs, {DEFAULT_MAX_CONCURRENT} CPUs")
+    print(f"  unbounded launch     {t_unbounded:7.2f}s  ({n_jobs / t_unbounded:6.2f} jobs/s)")
+    print(f"  scheduler (max={DEFAULT_MAX_CONCURRENT:<3}) {t_sched:7.2f}s  ({n_jobs / t_sched:6.2f} jobs/s)")
+
+
+if __name__ == "__main__":
+    main()
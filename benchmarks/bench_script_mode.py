@@ -0,0 +1,60 @@
+# benchmarks/bench_script_mode.py
+# So lenh/giay: che do script (parse truoc, khong prompt/history/poll job)
+# so voi vong lap tuong tac (moi dong deu poll job, ve prompt, ghi history).
+#
+#   python benchmarks/bench_script_mode.py [N] [BG_JOBS]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import run_script, run_line
+from Core.parser import parse_command
+from Core.executor import execute_pipeline
+from Core.prompt import get_prompt
+from Core.history import add_history
+from Core.process_monitor.monitor import job_manager
+
+LINES = ["true", "true | true", "cd .", "true > /dev/null"]
+
+
+def interactive_loop(lines):
+    for line in lines:
+        job_manager.update_all_statuses()
+        get_prompt()
+        add_history(line)
+        run_line(line)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    bg_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    lines = [LINES[i % len(LINES)] for i in range(n)]
+
+    # Mot so job nen de vong lap tuong tac phai poll nhu thuc te
+    job_manager.set_max_concurrent(bg_jobs)
+    for _ in range(bg_jobs):
+        execute_pipeline(parse_command("sleep 30 &"))
+
+    start = time.perf_counter()
+    interactive_loop(lines)
+    t_inter = time.perf_counter() - start
+
+    # run_script cho moi job nen truoc khi tra ve, nen dung chung truoc
+    for job in list(job_manager.jobs.values()):
+        os.killpg(job.pgid, 9)
+    job_manager.wait_for_jobs()
+
+    start = time.perf_counter()
+    run_script(lines, "<bench>")
+    t_script = time.perf_counter() - start
+
+    print(f"{n} lines, {bg_jobs} background jobs")
+    print(f"  interactive loop   {n / t_inter:8.1f} commands/s")
+    print(f"  script mode        {n / t_script:8.1f} commands/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_spawn.py
+# Do do tre khoi chay tien trinh: preexec_fn (cu) vs process_group vs os.posix_spawn,
+# voi RSS cua shell nho va lon.
+#
+#   python benchmarks/bench_spawn.py [N] [BALLAST_MB]
+
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.spawn import spawn_process, HAS_PROCESS_GROUP
+
+TRUE = "/bin/true"
+
+
+def via_preexec():
+    subprocess.Popen([TRUE], preexec_fn=os.setpgrp).wait()
+
+
+def via_spawn_process():
+    spawn_process([TRUE]).wait()
+
+
+def via_posix_spawn():
+    pid = os.posix_spawn(TRUE, [TRUE], os.environ, setpgroup=0)
+    os.waitpid(pid, 0)
+
+
+def bench(fn, n):
+    fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def run_round(label, n):
+    print(f"{label}:")
+    print(f"  preexec_fn=os.setpgrp     {bench(via_preexec, n):9.1f} us/spawn")
+    print(f"  spawn_process()           {bench(via_spawn_process, n):9.1f} us/spawn")
+    print(f"  os.posix_spawn(setpgroup) {bench(via_posix_spawn, n):9.1f} us/spawn")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ballast_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+
+    print(f"process_group available: {HAS_PROCESS_GROUP}")
+    run_round("small shell RSS", n)
+
+    # Tang RSS cua shell (cham vao tung trang de chac chan duoc cap phat)
+    ballast = bytearray(ballast_mb * 1024 * 1024)
+    for i in range(0, len(ballast), 4096):
+        ballast[i] = 1
+    run_round(f"shell RSS +{ballast_mb} MB", n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# benchmarks/bench_sysstats.py
+# Chi phi moi lan lay mau panel he thong cua pmon (core, load, swap, disk, net):
+# doc thang /proc (moi file mot lan read vao buffer dung lai) so voi goi psutil.
+#
+#   python benchmarks/bench_sysstats.py [ROUNDS]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor.procfs import procfs_available
+from Core.process_monitor.sysstats import ProcfsSystemStats, PsutilSystemStats
+
+
+def timed(stats, rounds):
+    stats.sample()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        sample = stats.sample()
+    return (time.perf_counter() - start) / rounds, sample
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    cases = [("psutil", PsutilSystemStats)]
+    if procfs_available():
+        cases.insert(0, ("/proc direct", ProcfsSystemStats))
+    print(f"rounds: {rounds}")
+    for label, cls in cases:
+        t, sample = timed(cls(), rounds)
+        print(f"  {label:14} {t * 1e6:8.1f} us/sample   "
+              f"({len(sample.cores)} cores, {len(sample.disks)} disks, {len(sample.nets)} interfaces)")
+
+
+if __name__ == "__main__":
+    main()
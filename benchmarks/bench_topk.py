@@ -0,0 +1,63 @@
+# benchmarks/bench_topk.py
+# So sanh sorted() toan bo danh sach voi top_processes() (heapq top-k)
+# khi chi can hien thi vai trang dau cua bang tien trinh.
+#
+#   python benchmarks/bench_topk.py [N]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor.tui import SORT_COLUMNS, top_processes
+
+PAGE_SIZE = 15
+ROUNDS = 20
+
+
+def make_rows(n):
+    rng = random.Random(0)
+    now = time.time()
+    return [{
+        'pid': pid,
+        # phần lớn tiến trình rảnh (0.0%), giống một máy thật
+        'cpu_percent': rng.choice((0.0, 0.0, 0.0, rng.uniform(0, 100))),
+        'memory_percent': rng.uniform(0, 5),
+        'num_threads': rng.choice((1, 1, 1, rng.randint(2, 64))),
+        'create_time': now - rng.uniform(0, 86400),
+    } for pid in range(1, n + 1)]
+
+
+def bench(fn):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rows = make_rows(n)
+    print(f"rows: {n}, page size: {PAGE_SIZE}")
+    for column in SORT_COLUMNS:
+        if column.needs_details:
+            continue
+        key, desc = column.key, column.descending
+        sign = -1 if desc else 1
+        t_sorted = bench(lambda: sorted(rows, key=lambda p: (key(p), sign * p['pid']), reverse=desc))
+        for page in (0, 9):
+            k = (page + 1) * PAGE_SIZE
+            t_top = bench(lambda: top_processes(rows, column, desc, k))
+            print(f"  {column.label:<8} page {page + 1:<3} sorted {t_sorted * 1e3:7.2f} ms   "
+                  f"top-{k:<4} {t_top * 1e3:7.2f} ms   {t_sorted / t_top:5.1f}x")
+
+    # Thứ tự phải khớp với sắp xếp đầy đủ
+    column = SORT_COLUMNS[0]
+    expected = sorted(rows, key=lambda p: (column.key(p), -p['pid']), reverse=True)[:PAGE_SIZE]
+    assert top_processes(rows, column, True, PAGE_SIZE) == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_tree.py
+# Chi muc cay tien trinh cua pmon: cap nhat tang dan (chi xu ly cac dong doi so voi
+# snapshot truoc, cong don delta len to tien) so voi dung lai ca cay moi tick.
+#
+#   python benchmarks/bench_tree.py [PROCESSES] [TICKS]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.process_monitor.tree import ProcessTree
+
+CHANGED = 0.05   # tỉ lệ tiến trình đổi %CPU mỗi tick
+CHURN = 0.005    # tỉ lệ tiến trình kết thúc/được tạo mỗi tick
+
+
+def make_ticks(n, ticks):
+    rng = random.Random(0)
+    procs = {1: {'pid': 1, 'ppid': 0, 'create_time': 0.0, 'cpu_percent': 0.0,
+                 'memory_percent': 0.1, 'num_threads': 1}}
+    for pid in range(2, n + 1):
+        # Cây lệch như hệ thống thật: đa số tiến trình có cha nằm gần gốc
+        ppid = rng.randrange(1, min(pid, 50)) if rng.random() < 0.7 else rng.randrange(1, pid)
+        procs[pid] = {'pid': pid, 'ppid': ppid, 'create_time': float(pid), 'cpu_percent': 0.0,
+                      'memory_percent': rng.uniform(0, 1), 'num_threads': rng.randint(1, 16)}
+    next_pid = n + 1
+    for tick in range(ticks):
+        for pid in rng.sample(list(procs), int(n * CHANGED)):
+            procs[pid] = {**procs[pid], 'cpu_percent': rng.uniform(0, 100)}
+        for pid in rng.sample(list(procs)[1:], int(n * CHURN)):
+            del procs[pid]
+            for child in [p for p in procs.values() if p['ppid'] == pid]:
+                procs[child['pid']] = {**child, 'ppid': 1}     # init nhận con mồ côi
+            procs[next_pid] = {**procs[rng.choice(list(procs))], 'pid': next_pid,
+                               'ppid': rng.choice(list(procs)), 'create_time': float(next_pid)}
+            next_pid += 1
+        yield tuple(procs.values())
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    snapshots = list(make_ticks(n, ticks))
+
+    incremental = ProcessTree()
+    incremental.update(snapshots[0])
+    start = time.perf_counter()
+    for snapshot in snapshots[1:]:
+        incremental.update(snapshot)
+    t_incremental = (time.perf_counter() - start) / (ticks - 1)
+
+    rebuilt = ProcessTree()
+    start = time.perf_counter()
+    for snapshot in snapshots[1:]:
+        rebuilt.rebuild(snapshot)
+    t_rebuild = (time.perf_counter() - start) / (ticks - 1)
+
+    assert incremental.children == rebuilt.children
+    print(f"processes: {n}, ticks: {ticks}, {CHANGED:.0%} changed and {CHURN:.1%} churn per tick")
+    print(f"  incremental update {t_incremental * 1e3:8.2f} ms/tick")
+    print(f"  full rebuild       {t_rebuild * 1e3:8.2f} ms/tick")
+    print(f"  speedup            {t_rebuild / t_incremental:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
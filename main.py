@@ -1,13 +1,111 @@
 from Core.prompt import get_prompt
-from Core.parser import parse_command
+from Core.parser import parse_command, ParseError
 from Core.executor import execute_pipeline
-from Core.builtin import handle_builtin
+from Core.builtin import handle_builtin, is_builtin
 from Core.history import init_history, load_history, add_history, save_history_file
 from Core.process_monitor.monitor import job_manager
 
 import signal
 import sys
 
+USAGE = "usage: main.py [-c command | script.msh]"
+
+# Exit status cua che do khong tuong tac (-c / script):
+#   status cua lenh cuoi cung da chay (128+N neu bi signal N)
+#   127  lenh khong tim thay, hoac file script khong ton tai
+#   2    loi cu phap (script khong chay lenh nao) hoac sai cach goi
+#   1    loi khi thuc thi (vd. khong mo duoc file redirect)
+# Truoc khi thoat (ke ca bang 'exit N'), shell cho moi job nen (ke ca job dang xep hang) chay xong.
+# Built-in cung tra ve exit status cua no (vd. parallel, wait, pmon).
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_NOT_FOUND = 127
+
+
+def run_line(line):
+    """Chạy một dòng lệnh (built-in hoặc pipeline), trả về exit status."""
+    if is_builtin(line):
+        return handle_builtin(line)
+    try:
+        return run_parsed(parse_command(line))
+    except ParseError as e:
+        print(f"minishell: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+
+def run_parsed(pipeline):
+    if not pipeline.stages:
+        return EXIT_OK
+    try:
+        return execute_pipeline(pipeline)
+    except Exception as e:
+        print(f"Execution error: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+
+
+def compile_script(lines, source):
+    """
+    Parse toàn bộ script trước khi chạy. Trả về list các (raw_line, Pipeline | None),
+    với None là dòng built-in; hoặc None nếu có lỗi cú pháp.
+    """
+    program, ok = [], True
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if is_builtin(line):
+            program.append((line, None))
+            continue
+        try:
+            program.append((line, parse_command(line)))
+        except ParseError as e:
+            print(f"{source}: line {lineno}: {e}", file=sys.stderr)
+            ok = False
+    return program if ok else None
+
+
+def run_script(lines, source):
+    """Chạy script không tương tác: không prompt, không history, không poll job mỗi dòng."""
+    program = compile_script(lines, source)
+    if program is None:
+        return EXIT_USAGE
+
+    status = EXIT_OK
+    for line, pipeline in program:
+        if pipeline is None:
+            try:
+                status = handle_builtin(line)
+            except SystemExit as e:
+                # 'exit N' đi qua cùng đường dọn dẹp như khi script chạy hết
+                status = e.code if isinstance(e.code, int) else EXIT_OK
+                break
+        else:
+            status = run_parsed(pipeline)
+
+    job_manager.wait_for_jobs()
+    return status
+
+
+def run_noninteractive(argv):
+    if argv[0] == "-c":
+        if len(argv) < 2:
+            print(f"minishell: -c: option requires an argument\n{USAGE}", file=sys.stderr)
+            return EXIT_USAGE
+        return run_script(argv[1].splitlines(), "-c")
+
+    if argv[0].startswith("-"):
+        print(f"minishell: {argv[0]}: invalid option\n{USAGE}", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        with open(argv[0], encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        print(f"minishell: {argv[0]}: {e.strerror}", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    return run_script(lines, argv[0])
+
 
 def main():
     try:
@@ -36,16 +134,7 @@ def main():
 
             add_history(line)
 
-            # Built-ins
-            if handle_builtin(line):
-                continue
-
-            # External / Pipeline
-            try:
-                cmds, background = parse_command(line)
-                execute_pipeline(cmds, background)
-            except Exception as e:
-                print(f"Execution error: {e}", file=sys.stderr)
+            run_line(line)
 
     finally:
         save_history_file()
@@ -53,4 +142,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        sys.exit(run_noninteractive(sys.argv[1:]))
+    main()